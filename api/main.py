@@ -1,15 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Response, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from typing import List
-import os
+from typing import List, Optional, Literal
+import json
+import time
 
-from timetable_system.models import init_db, SessionLocal
-from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.models import ensure_schema, SessionLocal
+from timetable_system.repositories.timetable_manager import TimetableManager, RevisionConflictError
+from timetable_system.repositories.resource_manager import ResourceManager
 from timetable_system.services.scheduler import TimetableScheduler
-from .models import TimetableCreate, TimetableResponse, GenerateRequest
+from timetable_system.services.parallel import ParallelScheduler, shutdown_pool
+from timetable_system.services.jobs import JobQueue, QueueFullError
+from timetable_system.services.cache import SolveCache
+from timetable_system.services.export import export_lines
+from timetable_system.services.batch import solve_batch
+from timetable_system.services.resources import ResourceCache
+from timetable_system.services.weekly import WeeklyScheduler
+from timetable_system.services.optimizer import ScheduleOptimizer
+from timetable_system.services.validator import find_clashes, clash_count, report_lines
+from timetable_system.config import CACHE_PERSIST, LIST_PAGE_SIZE, LIST_MAX_PAGE_SIZE, BATCH_MAX_ITEMS, VALIDATE_ON_SAVE
+from timetable_system.utils.metrics import registry, record_solve, solve_outcome
+from .metrics import MetricsMiddleware
+from .read_cache import ReadCache, etag_matches
+from .static import StaticManifest
+from .models import (
+    TimetableCreate, TimetableResponse, BulkTimetableResult, GenerateRequest, BestEffortResponse, OptimizedResponse,
+    BatchGenerateRequest, WeeklyGenerateRequest, WeeklyScheduleResponse, JobRequest, JobResponse, RepairRequest,
+    ResourceModel, TimetableUpdate, RevisionInfo, RevisionDiff, ValidateRequest, ValidationResponse
+)
 
 app = FastAPI(title="Timetable Management API")
 
@@ -19,13 +38,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"], # GET /timetables pagination
 )
+app.add_middleware(MetricsMiddleware)
+
 
-# Mount static files
-if os.path.exists("web/dist/assets"):
-    app.mount("/assets", StaticFiles(directory="web/dist/assets"), name="assets")
-else:
-    print("WARNING: web/dist/assets not found. Frontend assets will not be served.")
+static_files = StaticManifest()
+job_queue = JobQueue(session_factory=SessionLocal)
+solve_cache = SolveCache(session_factory=SessionLocal if CACHE_PERSIST else None)
+read_cache = ReadCache()
+TimetableManager.change_listeners.append(read_cache.invalidate)
+resource_cache = ResourceCache(SessionLocal)
+ResourceManager.change_listeners.append(resource_cache.invalidate)
 
 # Dependency
 def get_db():
@@ -37,69 +61,440 @@ def get_db():
 
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    ensure_schema()
+    static_files.load()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_pool()
+    job_queue.shutdown()
 
 @app.post("/generate")
 def generate_timetable(request: GenerateRequest):
     """
     Generate a schedule based on provided constraints. 
     Does NOT save to DB automatically.
+    With time_budget, returns a BestEffortResponse instead of the bare schedule,
+    with soft an OptimizedResponse.
     """
-    scheduler = TimetableScheduler(request.classes, request.periods)
-    schedule = scheduler.solve()
+    if request.time_budget is not None:
+        if request.soft is not None:
+            raise HTTPException(status_code=400, detail="time_budget cannot be combined with soft.")
+        return generate_best_effort(request)
+
+    resources = resource_cache.get()
+    if request.parallel:
+        scheduler = ParallelScheduler(request.classes, request.periods, engine=request.engine, resources=resources)
+    else:
+        scheduler = TimetableScheduler(request.classes, request.periods, engine=request.engine, resources=resources)
+
+    hit, schedule = solve_cache.get(request.classes, request.periods, scheduler.engine, resources)
+    if hit:
+        if schedule is None:
+            # Cheap to rebuild, and it names this request's classes
+            scheduler.conflicts = scheduler.check_feasibility()
+    else:
+        started = time.perf_counter()
+        schedule = scheduler.solve()
+        record_solve(scheduler.engine, time.perf_counter() - started, scheduler.attempts,
+                     solve_outcome(scheduler, schedule))
+        # A random-engine miss or a timeout proves nothing, so don't cache it
+        if schedule is not None or scheduler.conflicts or \
+                (scheduler.engine == "backtracking" and not scheduler.stopped):
+            solve_cache.put(request.classes, request.periods, scheduler.engine, schedule, resources)
     
+    if scheduler.conflicts:
+        return JSONResponse(status_code=400, content={
+            "detail": " ".join(c["reason"] for c in scheduler.conflicts),
+            "conflicts": scheduler.conflicts
+        })
     if not schedule:
         raise HTTPException(status_code=400, detail="Could not generate a conflict-free timetable.")
+    if request.soft is not None:
+        return optimize_schedule(schedule, request, resources)
     
     return schedule
 
+def optimize_schedule(schedule: dict, request: GenerateRequest, resources: dict) -> OptimizedResponse:
+    optimizer = ScheduleOptimizer(schedule, request.periods, request.soft.model_dump(), resources=resources)
+    optimized = optimizer.optimize(request.optimize_budget)
+    stats = optimizer.stats
+    return OptimizedResponse(schedule=optimized, score=stats["score"], breakdown=stats["breakdown"], stats=stats)
+
+def generate_best_effort(request: GenerateRequest) -> BestEffortResponse:
+    if request.parallel:
+        raise HTTPException(status_code=400, detail="time_budget cannot be combined with parallel.")
+    resources = resource_cache.get()
+    scheduler = TimetableScheduler(request.classes, request.periods, engine=request.engine, resources=resources)
+
+    hit, schedule = solve_cache.get(request.classes, request.periods, scheduler.engine, resources)
+    if hit and schedule is not None:
+        return BestEffortResponse(
+            schedule=schedule, complete=True, clash_count=0,
+            stats={"engine": scheduler.engine, "candidates": 0, "elapsed": 0, "cached": True}
+        )
+
+    schedule, clashes = scheduler.solve_best_effort(request.time_budget)
+    stats = scheduler.solve_stats
+    record_solve(scheduler.engine, stats["elapsed"], stats["candidates"] + stats["nodes"],
+                 "partial" if clashes else "solved")
+    # The exact-solve cache serves plain /generate, so only a fully checked schedule goes in
+    if not clashes and scheduler._is_valid_schedule(schedule):
+        solve_cache.put(request.classes, request.periods, scheduler.engine, schedule, resources)
+    return BestEffortResponse(
+        schedule=schedule,
+        complete=not clashes,
+        clash_count=clash_count(clashes),
+        clashes=clashes,
+        conflicts=scheduler.conflicts,
+        stats=stats
+    )
+
+@app.post("/generate/batch")
+def generate_batch(request: BatchGenerateRequest):
+    """
+    Solve many independent requests in parallel, deduplicating identical ones.
+    Streams NDJSON: one {"index", "status", "schedule", ...} line per item as
+    it finishes. If any item has save_as, the solved ones are then saved in
+    one transaction and reported in a final {"saved": [...]} line.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch.")
+    if any(item.time_budget is not None or item.soft is not None for item in request.items):
+        raise HTTPException(status_code=400, detail="time_budget and soft are only supported by /generate.")
+
+    items = request.items
+    problems = [{"classes": item.classes, "periods": item.periods, "engine": item.engine} for item in items]
+
+    def stream():
+        to_save = []
+        for result in solve_batch(problems, cache=solve_cache, resources=resource_cache.get()):
+            item = items[result["index"]]
+            if item.save_as and result["schedule"] is not None:
+                to_save.append((result["index"], {"name": item.save_as, "entries": result["schedule"], "periods": item.periods}))
+            yield json.dumps(result, separators=(",", ":")) + "\n"
+
+        if any(item.save_as for item in items):
+            yield json.dumps(save_batch(sorted(to_save, key=lambda pair: pair[0])), separators=(",", ":")) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def save_batch(to_save: list) -> dict:
+    """to_save: [(item index, create_timetables item)]. Runs after the response has started."""
+    db = SessionLocal()
+    try:
+        results = TimetableManager(db).create_timetables([item for _, item in to_save])
+    except ValueError as e:
+        return {"saved": [], "error": str(e)}
+    finally:
+        db.close()
+    return {"saved": [dict(result, index=index) for (index, _), result in zip(to_save, results)]}
+
+@app.post("/generate/week", response_model=WeeklyScheduleResponse)
+def generate_week(request: WeeklyGenerateRequest):
+    """
+    Generate a weekly schedule from weekly subject quotas per class.
+    Quotas are split across days and the days solved in parallel.
+    Does NOT save to DB automatically (POST /timetables takes the list of days).
+    """
+    try:
+        scheduler = WeeklyScheduler(request.quotas, request.days, request.periods, engine=request.engine,
+                                    resources=resource_cache.get())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    week = scheduler.solve(cache=solve_cache)
+
+    if scheduler.conflicts:
+        return JSONResponse(status_code=400, content={
+            "detail": " ".join(c["reason"] for c in scheduler.conflicts),
+            "conflicts": scheduler.conflicts
+        })
+    if week is None:
+        where = f" for day {scheduler.failed_day + 1}" if scheduler.failed_day is not None else ""
+        raise HTTPException(status_code=400, detail=f"Could not generate a conflict-free timetable{where}.")
+    return {"schedule": week}
+
+@app.get("/resources", response_model=ResourceModel)
+def get_resources(db: Session = Depends(get_db)):
+    return ResourceManager(db).get_resources()
+
+@app.put("/resources", response_model=ResourceModel)
+def replace_resources(resources: ResourceModel, db: Session = Depends(get_db)):
+    """
+    Replace the teacher/resource model used by every solve.
+    Other workers pick it up within TT_RESOURCE_CACHE_TTL seconds.
+    """
+    try:
+        return ResourceManager(db).replace_resources(resources.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/cache/stats")
+def cache_stats():
+    return solve_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text format. Counters are per worker process."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+def submit_job(request: JobRequest):
+    """
+    Queue a schedule generation and return immediately.
+    Poll GET /jobs/{id} for the result.
+    """
+    if request.time_budget is not None or request.soft is not None:
+        raise HTTPException(status_code=400, detail="time_budget and soft are only supported by /generate.")
+    try:
+        job_id = job_queue.submit(request.classes, request.periods, engine=request.engine, save_as=request.save_as,
+                                  resources=resource_cache.get())
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job_queue.get(job_id)
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/validate", response_model=ValidationResponse)
+def validate(request: ValidateRequest):
+    """Every clash in a timetable, against the stored resource model. Saves nothing."""
+    clashes = find_clashes(request.entries, request.periods, resource_cache.get())
+    return {"valid": not clashes, "clash_count": clash_count(clashes), "clashes": clashes}
+
+@app.get("/validate/stored")
+def validate_stored(after_id: Optional[int] = None, invalid_only: bool = False):
+    """
+    Check every saved timetable, streamed as NDJSON: one {"id", "name",
+    "valid", "clashes"} per timetable, then {"checked", "invalid"}.
+    Resume with after_id = the last id received.
+    """
+    resources = resource_cache.get()
+
+    def stream():
+        db = SessionLocal()
+        try:
+            yield from report_lines(TimetableManager(db), resources, after_id=after_id, invalid_only=invalid_only)
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def save_clashes(entries, periods: int) -> list:
+    """Clashes that block saving `entries` (none when TT_VALIDATE_ON_SAVE is off)."""
+    return find_clashes(entries, periods, resource_cache.get()) if VALIDATE_ON_SAVE else []
+
+def clash_response(clashes: list) -> JSONResponse:
+    return JSONResponse(status_code=400, content={
+        "detail": " ".join(c["reason"] for c in clashes),
+        "clashes": clashes
+    })
+
 @app.post("/timetables", response_model=TimetableResponse)
 def create_timetable(timetable: TimetableCreate, db: Session = Depends(get_db)):
+    clashes = save_clashes(timetable.entries, timetable.periods)
+    if clashes:
+        return clash_response(clashes)
     tm = TimetableManager(db)
     try:
         created = tm.create_timetable(timetable.name, timetable.entries, timetable.periods)
-        return TimetableResponse(
-            id=created.id,
-            name=created.name,
-            created_at=created.created_at.isoformat(),
-            entries=[
-                {"period_index": e.period_index, "class_name": e.class_name, "subject": e.subject}
-                for e in created.entries
-            ]
-        )
+        data = tm.get_timetable_data(created.name)
+        data["created_at"] = data["created_at"].isoformat()
+        return data
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/timetables/bulk", response_model=List[BulkTimetableResult])
+def create_timetables_bulk(timetables: List[TimetableCreate], db: Session = Depends(get_db)):
+    """
+    Import many timetables in one transaction.
+    Name conflicts and clashes are reported per item and do not abort the batch.
+    """
+    results, valid = [], []
+    for t in timetables:
+        clashes = save_clashes(t.entries, t.periods)
+        if clashes:
+            results.append({"name": t.name, "id": None, "error": " ".join(c["reason"] for c in clashes)})
+        else:
+            results.append(None)
+            valid.append(t.model_dump())
+
+    tm = TimetableManager(db)
+    try:
+        created = iter(tm.create_timetables(valid))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return [result or next(created) for result in results]
+
 @app.get("/timetables", response_model=List[TimetableResponse])
-def list_timetables(db: Session = Depends(get_db)):
+def list_timetables(
+    response: Response,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    One page of timetables ordered by id. When more exist, the
+    X-Next-Cursor header holds the value to pass as `cursor`.
+    """
     tm = TimetableManager(db)
-    timetables = tm.get_all_timetables()
+    timetables = tm.list_timetables(limit=limit + 1, after_id=cursor)
+    if len(timetables) > limit:
+        timetables = timetables[:limit]
+        response.headers["X-Next-Cursor"] = str(timetables[-1].id)
     return [
-        TimetableResponse(
-            id=t.id,
-            name=t.name,
-            created_at=t.created_at.isoformat(),
-            entries=[] # Omit entries for list view to save bandwidth
-        )
+        {
+            "id": t.id,
+            "name": t.name,
+            "created_at": t.created_at.isoformat(),
+            "days": t.days,
+            "entries": [] # Omit entries for list view to save bandwidth
+        }
         for t in timetables
     ]
 
 @app.get("/timetables/{name}", response_model=TimetableResponse)
-def get_timetable(name: str, db: Session = Depends(get_db)):
+def get_timetable(name: str, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """
+    Served from pre-serialized JSON when cached. Clients revalidate with
+    If-None-Match and get 304 while the timetable is unchanged.
+    """
+    cached = read_cache.get(name)
+    if cached is None:
+        t = TimetableManager(db).get_timetable_data(name)
+        if not t:
+            raise HTTPException(status_code=404, detail="Timetable not found")
+        t["created_at"] = t["created_at"].isoformat()
+        cached = read_cache.put(name, t)
+
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.put("/timetables/{name}", response_model=TimetableResponse)
+def update_timetable(name: str, update: TimetableUpdate, db: Session = Depends(get_db)):
+    """
+    Save new contents as the timetable's next revision. Only the changed
+    cells are stored. With base_revision, a stale edit gets 409.
+    """
+    clashes = save_clashes(update.entries, update.periods)
+    if clashes:
+        return clash_response(clashes)
     tm = TimetableManager(db)
-    t = tm.get_timetable_by_name(name)
-    if not t:
+    try:
+        revision = tm.update_timetable(name, update.entries, update.periods, base_revision=update.base_revision)
+    except RevisionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if revision is None:
         raise HTTPException(status_code=404, detail="Timetable not found")
-        
-    return TimetableResponse(
-        id=t.id,
-        name=t.name,
-        created_at=t.created_at.isoformat(),
-        entries=[
-            {"period_index": e.period_index, "class_name": e.class_name, "subject": e.subject}
-            for e in t.entries
+    data = tm.get_timetable_data(name)
+    data["created_at"] = data["created_at"].isoformat()
+    return data
+
+@app.get("/timetables/{name}/revisions", response_model=List[RevisionInfo])
+def list_revisions(name: str, db: Session = Depends(get_db)):
+    revisions = TimetableManager(db).list_revisions(name)
+    if revisions is None:
+        raise HTTPException(status_code=404, detail="Timetable not found")
+    return [dict(r, created_at=r["created_at"].isoformat()) for r in revisions]
+
+@app.get("/timetables/{name}/revisions/{number}", response_model=TimetableResponse)
+def get_revision(name: str, number: int, db: Session = Depends(get_db)):
+    """The timetable as it was at revision `number`."""
+    tm = TimetableManager(db)
+    revision = tm.get_revision(name, number)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {
+        "id": tm.get_timetable_by_name(name).id,
+        "name": name,
+        "created_at": revision["created_at"].isoformat(),
+        "days": revision["days"],
+        "revision": number,
+        "entries": [
+            {"day_index": day, "period_index": i, "class_name": cls, "subject": subject}
+            for day, schedule in enumerate(revision["week"])
+            for cls, subjects in sorted(schedule.items())
+            for i, subject in enumerate(subjects)
         ]
-    )
+    }
+
+@app.get("/timetables/{name}/diff", response_model=RevisionDiff)
+def diff_revisions(name: str, from_revision: int = Query(..., alias="from"), to_revision: int = Query(..., alias="to"),
+                   db: Session = Depends(get_db)):
+    """Cells that differ between two revisions, e.g. /timetables/X/diff?from=1&to=3."""
+    changes = TimetableManager(db).diff_revisions(name, from_revision, to_revision)
+    if changes is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {"from_revision": from_revision, "to_revision": to_revision, "changes": changes}
+
+@app.get("/export")
+def export_timetables(format: Literal["ndjson", "csv"] = "ndjson", after_id: Optional[int] = None):
+    """
+    Stream every saved timetable. Memory use stays flat regardless of how
+    many exist. Resume an interrupted export with after_id = the last id received.
+    """
+    def stream():
+        # Own session: the response body outlives request-scoped dependencies
+        db = SessionLocal()
+        try:
+            yield from export_lines(TimetableManager(db), format, after_id=after_id)
+        finally:
+            db.close()
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="timetables.{format}"'}
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
+
+@app.get("/query/classes")
+def query_classes(subject: str, period_index: Optional[int] = None, timetable: Optional[str] = None,
+                  day_index: Optional[int] = None, db: Session = Depends(get_db)):
+    """Which classes have `subject` (in `period_index`, on `day_index`), across all timetables or one."""
+    return TimetableManager(db).find_classes(subject, period_index=period_index, timetable=timetable,
+                                             day_index=day_index)
+
+@app.get("/query/load")
+def query_load(timetable: Optional[str] = None, db: Session = Depends(get_db)):
+    """Classes per subject per period and day, across all timetables or one."""
+    return TimetableManager(db).subject_load(timetable=timetable)
+
+@app.post("/timetables/{name}/repair")
+def repair_timetable(name: str, request: RepairRequest, db: Session = Depends(get_db)):
+    """
+    Re-solve a saved timetable after some classes' subjects changed,
+    moving as few cells of the other classes as possible.
+    Does NOT save to DB automatically.
+    """
+    tm = TimetableManager(db)
+    try:
+        current = tm.get_schedule_by_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{e} Repair works on single-day timetables.")
+    if current is None:
+        raise HTTPException(status_code=404, detail="Timetable not found")
+
+    data = {**current, **request.classes}
+    periods = request.periods or max((len(row) for row in current.values()), default=0)
+    scheduler = TimetableScheduler(data, periods, resources=resource_cache.get())
+    schedule = scheduler.repair(current)
+
+    if scheduler.conflicts:
+        return JSONResponse(status_code=400, content={
+            "detail": " ".join(c["reason"] for c in scheduler.conflicts),
+            "conflicts": scheduler.conflicts
+        })
+    if not schedule:
+        raise HTTPException(status_code=400, detail="Could not repair the timetable.")
+
+    return {"schedule": schedule, **scheduler.repair_stats}
 
 @app.delete("/timetables/{name}")
 def delete_timetable(name: str, db: Session = Depends(get_db)):
@@ -111,29 +506,6 @@ def delete_timetable(name: str, db: Session = Depends(get_db)):
 
 # Catch-all for SPA
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
-    possible_path = os.path.join("web/dist", full_path)
-    if os.path.exists(possible_path) and os.path.isfile(possible_path):
-        return FileResponse(possible_path)
-    
-    index_path = "web/dist/index.html"
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-        
-    return HTMLResponse(
-        content=f"<h1>Deployment Error</h1><p>Frontend not found. Checked {os.path.abspath(index_path)}</p>", 
-        status_code=404
-    )
-
-@app.on_event("startup")
-async def startup_check():
-    print("--- Startup Check ---")
-    print(f"CWD: {os.getcwd()}")
-    if os.path.exists("web/dist"):
-        print("web/dist exists. Contents:")
-        for root, dirs, files in os.walk("web/dist"):
-            for name in files:
-                print(os.path.join(root, name))
-    else:
-        print("web/dist does NOT exist.")
-    print("---------------------")
+async def serve_frontend(full_path: str, accept_encoding: Optional[str] = Header(None),
+                         if_none_match: Optional[str] = Header(None)):
+    return static_files.respond(full_path, accept_encoding, if_none_match)
@@ -0,0 +1,32 @@
+import time
+from timetable_system.utils.metrics import REQUEST_DURATION
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency per route template
+    (e.g. /timetables/{name}), so path parameters don't explode cardinality.
+    Time is measured until the response has been sent.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], path, status)
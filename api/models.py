@@ -1,25 +1,158 @@
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Literal, Union
+from timetable_system.config import MAX_TIME_BUDGET, MAX_DAYS
 
 class TimetableEntryBase(BaseModel):
+    day_index: int = 0
     period_index: int
     class_name: str
     subject: str
 
 class TimetableCreate(BaseModel):
     name: str
-    entries: Dict[str, List[str]] # Class -> List of Subjects
+    # Class -> List of Subjects, or a list of those (one per day) for a weekly timetable
+    entries: Union[Dict[str, List[str]], List[Dict[str, List[str]]]]
     periods: int
 
+class BulkTimetableResult(BaseModel):
+    name: str
+    id: Optional[int] = None
+    error: Optional[str] = None # Set when this item was not imported
+
 class TimetableResponse(BaseModel):
     id: int
     name: str
     created_at: str
+    days: int = 1
+    revision: int = 1
     entries: List[TimetableEntryBase]
 
     class Config:
         from_attributes = True
 
+class TimetableUpdate(BaseModel):
+    entries: Union[Dict[str, List[str]], List[Dict[str, List[str]]]]
+    periods: int
+    base_revision: Optional[int] = None # Reject the edit (409) if the timetable has moved on
+
+class RevisionInfo(BaseModel):
+    number: int
+    created_at: str
+    periods: Optional[int] = None
+    days: int
+    snapshot: bool # Stored in full; otherwise as the cells changed from number - 1
+    changes: Optional[int] = None
+
+class CellChange(BaseModel):
+    day_index: int
+    class_name: str
+    period_index: int
+    before: Optional[str] = None # None: the cell did not exist
+    after: Optional[str] = None
+
+class RevisionDiff(BaseModel):
+    from_revision: int
+    to_revision: int
+    changes: List[CellChange]
+
+class AvoidRule(BaseModel):
+    subject: str
+    periods: List[int] # 0-indexed periods to keep the subject out of
+    weight: float = Field(1, ge=0)
+
+class SoftConstraints(BaseModel):
+    spread: float = Field(0, ge=0) # Per pair of adjacent periods with the same subject
+    heavy: List[str] = [] # Subjects that shouldn't run back to back...
+    max_heavy_run: int = Field(2, ge=1) # ...more than this many periods in a row
+    heavy_weight: float = Field(1, ge=0) # Per heavy period beyond max_heavy_run
+    avoid: List[AvoidRule] = []
+
 class GenerateRequest(BaseModel):
     periods: int
     classes: Dict[str, List[str]] # Class -> List of Subjects to process
+    engine: Optional[Literal["backtracking", "random"]] = None # Defaults to SOLVER_ENGINE
+    parallel: bool = False # Race seeded searches across SOLVE_WORKERS processes
+    # Seconds; returns the best schedule found by then (BestEffortResponse), even with clashes
+    time_budget: Optional[float] = Field(None, gt=0, le=MAX_TIME_BUDGET)
+    # Improve the schedule against these preferences (OptimizedResponse) for optimize_budget seconds
+    soft: Optional[SoftConstraints] = None
+    optimize_budget: Optional[float] = Field(None, gt=0, le=MAX_TIME_BUDGET) # Defaults to TT_OPTIMIZE_BUDGET
+
+class Clash(BaseModel):
+    day: int = 0
+    period: int
+    subject: str # "A+B" when subjects sharing teachers only clash together
+    classes: List[str] # Classes holding the subject in that period
+    capacity: int = 1 # Classes the subject can host per period
+    excess: Optional[int] = None # Placements to move once the clashes before it are fixed (validation)
+    reason: Optional[str] = None
+
+class ValidateRequest(BaseModel):
+    # Class -> List of Subjects, or a list of those (one per day)
+    entries: Union[Dict[str, List[str]], List[Dict[str, List[str]]]]
+    periods: Optional[int] = Field(None, gt=0) # Only the first `periods` cells of a row count, as when saving
+
+class ValidationResponse(BaseModel):
+    valid: bool
+    clash_count: int # Placements that must move to clear every clash
+    clashes: List[Clash]
+
+class SolveStats(BaseModel):
+    engine: str
+    candidates: int # Complete schedules evaluated
+    nodes: int = 0 # Backtracking search nodes
+    best_clashes: List[List[float]] = [] # [elapsed seconds, clash count] at each improvement
+    elapsed: float # Seconds
+    cached: bool = False
+
+class BestEffortResponse(BaseModel):
+    schedule: Dict[str, List[str]]
+    complete: bool # True when there are no clashes
+    clash_count: int # Placements that must move to clear every clash
+    clashes: List[Clash] = []
+    conflicts: List[dict] = [] # Why no complete schedule exists, when provable
+    stats: SolveStats
+
+class WeeklyGenerateRequest(BaseModel):
+    days: int = Field(gt=0, le=MAX_DAYS)
+    periods: int = Field(gt=0) # Per day
+    quotas: Dict[str, Dict[str, int]] # Class -> Subject -> lessons per week
+    engine: Optional[Literal["backtracking", "random"]] = None
+
+class WeeklyScheduleResponse(BaseModel):
+    schedule: List[Dict[str, List[str]]] # One class -> subjects per day; save as a weekly timetable's entries
+
+class OptimizeStats(BaseModel):
+    initial_score: float # Penalty of the schedule the solver returned
+    moves: int # Swaps tried
+    accepted: int
+    elapsed: float # Seconds
+
+class OptimizedResponse(BaseModel):
+    schedule: Dict[str, List[str]]
+    score: float # Weighted soft-constraint penalty, lower is better
+    breakdown: Dict[str, float] # Penalty per constraint kind: spread, heavy, avoid
+    stats: OptimizeStats
+
+class JobRequest(GenerateRequest):
+    save_as: Optional[str] = None # Save the result under this name when done
+
+class BatchGenerateRequest(BaseModel):
+    # Items with save_as are saved together in one transaction once all are solved
+    items: List[JobRequest]
+
+class JobResponse(BaseModel):
+    id: str
+    status: str # queued, running, done or failed
+    result: Optional[Dict[str, List[str]]] = None
+    conflicts: List[dict] = []
+    error: Optional[str] = None
+    save_as: Optional[str] = None
+
+class ResourceModel(BaseModel):
+    teachers: Dict[str, List[str]] = {} # Teacher -> subjects they can teach
+    capacities: Dict[str, int] = {} # Shared resource (e.g. LIB) -> classes per period
+
+class RepairRequest(BaseModel):
+    classes: Dict[str, List[str]] # Only the classes whose subjects changed
+    periods: Optional[int] = None # Defaults to the saved timetable's period count
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from timetable_system.config import READ_CACHE_MAX_BYTES, READ_CACHE_TTL
+
+def make_etag(timetable_id: int, created_at: str, revision: int = 1) -> str:
+    """Strong ETag for a stored timetable; its contents only change with a new revision."""
+    digest = hashlib.sha1(f"{timetable_id}:{created_at}:{revision}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+class ReadCache:
+    """
+    Pre-serialized GET /timetables/{name} responses: name -> (etag, JSON bytes).
+    Bounded by total body size (LRU). Entries are dropped when this process
+    creates, edits or deletes the timetable, and expire after READ_CACHE_TTL so
+    changes made by other workers show up within that window.
+    """
+    def __init__(self, max_bytes: int = None, ttl: float = None):
+        self.max_bytes = max_bytes or READ_CACHE_MAX_BYTES
+        self.ttl = ttl if ttl is not None else READ_CACHE_TTL
+        self.size = 0
+        self._entries = OrderedDict() # name -> (stored_at, etag, body)
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Returns (etag, body) or None."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            stored_at, etag, body = entry
+            if time.time() - stored_at > self.ttl:
+                self._drop(name)
+                return None
+            self._entries.move_to_end(name)
+            return etag, body
+
+    def put(self, name: str, data: dict) -> tuple:
+        """Serialize `data` once, cache it and return (etag, body)."""
+        etag = make_etag(data["id"], data["created_at"], data.get("revision", 1))
+        body = json.dumps(data, separators=(",", ":")).encode()
+        if len(body) > self.max_bytes:
+            return etag, body
+        with self._lock:
+            self._drop(name)
+            self._entries[name] = (time.time(), etag, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+        return etag, body
+
+    def invalidate(self, name: str):
+        with self._lock:
+            self._drop(name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _drop(self, name: str):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= len(entry[2])
@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from fastapi import Response
+from fastapi.responses import HTMLResponse
+from timetable_system.config import STATIC_DIR, STATIC_COMPRESS_MIN_BYTES
+from timetable_system.utils.logger import logger
+from .read_cache import etag_matches
+
+try:
+    import brotli
+except ImportError: # Optional: gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+# Vite puts content-hashed bundles here, so their URLs change whenever they do
+IMMUTABLE_PREFIX = "assets/"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+def preferred_encodings(accept_encoding: str) -> list:
+    """Encodings the client accepts (q > 0), best first: br, then gzip."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    return [enc for enc in ("br", "gzip") if enc in accepted or "*" in accepted]
+
+class StaticAsset:
+    def __init__(self, path: str, body: bytes):
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.cache_control = IMMUTABLE_CACHE if path.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        # Each encoding is a different representation, so it gets its own ETag
+        self.variants = {"identity": (body, f'"{digest}"')}
+        if len(body) >= STATIC_COMPRESS_MIN_BYTES and self.media_type.startswith(COMPRESSIBLE_TYPES):
+            encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                encoded["br"] = brotli.compress(body, quality=11)
+            for encoding, data in encoded.items():
+                if len(data) < len(body):
+                    self.variants[encoding] = (data, f'"{digest}-{encoding}"')
+
+    def respond(self, accept_encoding: str = None, if_none_match: str = None) -> Response:
+        encoding = next((enc for enc in preferred_encodings(accept_encoding) if enc in self.variants), "identity")
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+class StaticManifest:
+    """
+    The built SPA (web/dist) held in memory: every file read, hashed and
+    compressed once, so page hits do no filesystem work. Paths that match
+    no file fall back to index.html for client-side routing, except under
+    /assets where a miss is a 404. Rebuild (e.g. after a deploy) by
+    restarting the process or calling load().
+    """
+    def __init__(self, root: str = None):
+        self.root = root or STATIC_DIR
+        self.assets = None # url path -> StaticAsset
+        self._lock = threading.Lock()
+
+    def load(self):
+        assets, raw, compressed = {}, 0, 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                path = os.path.relpath(full, self.root).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    asset = StaticAsset(path, f.read())
+                assets[path] = asset
+                raw += len(asset.variants["identity"][0])
+                compressed += min(len(body) for body, _ in asset.variants.values())
+        with self._lock:
+            self.assets = assets
+
+        if assets:
+            logger.info(f"Serving {len(assets)} static files from {self.root} "
+                        f"({raw // 1024} KB, {compressed // 1024} KB compressed)")
+        else:
+            logger.warning(f"{os.path.abspath(self.root)} not found or empty. Frontend will not be served.")
+
+    def lookup(self, path: str):
+        """StaticAsset for a URL path, or None."""
+        if self.assets is None:
+            self.load()
+        path = path.lstrip("/")
+        asset = self.assets.get(path)
+        if asset is None and not path.startswith(IMMUTABLE_PREFIX):
+            asset = self.assets.get("index.html")
+        return asset
+
+    def respond(self, path: str, accept_encoding: str = None, if_none_match: str = None) -> Response:
+        asset = self.lookup(path)
+        if asset is not None:
+            return asset.respond(accept_encoding, if_none_match)
+        if self.assets:
+            return Response(status_code=404)
+        return HTMLResponse(
+            content=f"<h1>Deployment Error</h1><p>Frontend not found. Checked {os.path.abspath(self.root)}</p>",
+            status_code=404
+        )
@@ -0,0 +1,53 @@
+"""
+Wall-clock speedup of the portfolio solver against worker count.
+
+    python -m benchmarks.bench_parallel [--engine random] [--runs 5]
+
+Each worker count gets its own process pool; the reported time is the
+median over --runs solves of the same instance.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from timetable_system.services import parallel
+from timetable_system.services.parallel import ParallelScheduler
+from .instances import generate_instance
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engine", default="random", choices=["random", "backtracking"])
+    parser.add_argument("--classes", type=int, default=5)
+    parser.add_argument("--periods", type=int, default=6)
+    parser.add_argument("--subjects", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    data = generate_instance(args.classes, args.periods, tightness=args.classes / args.subjects, seed=0)
+    counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+    print(f"engine={args.engine} classes={args.classes} periods={args.periods} cores={os.cpu_count()}")
+    print(f"{'workers':>8} {'median_s':>10} {'speedup':>8} {'solved':>7}")
+    baseline = None
+    for workers in counts:
+        parallel.SOLVE_WORKERS = workers
+        parallel.shutdown_pool()
+        # Warm the pool so process start-up is not billed to the first run
+        ParallelScheduler(data, args.periods, engine=args.engine, workers=workers).solve()
+
+        times, solved = [], 0
+        for run in range(args.runs):
+            scheduler = ParallelScheduler(data, args.periods, engine=args.engine, workers=workers, seed=run * 1000)
+            start = time.perf_counter()
+            solved += scheduler.solve() is not None
+            times.append(time.perf_counter() - start)
+
+        median = statistics.median(times)
+        baseline = baseline or median
+        print(f"{workers:>8} {median:>10.4f} {baseline / median:>8.2f} {solved:>4}/{args.runs}")
+    parallel.shutdown_pool()
+
+if __name__ == "__main__":
+    main()
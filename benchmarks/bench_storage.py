@@ -0,0 +1,72 @@
+"""
+Database size and read latency of the "rows" and "grid" storage formats.
+
+    python -m benchmarks.bench_storage [--timetables 200] [--classes 40] [--periods 10]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from timetable_system.models.engine import create_db_engine
+from timetable_system.models.timetable import Base
+from timetable_system.repositories.timetable_manager import TimetableManager
+
+SUBJECTS = ["MATH", "PHY", "CHEM", "BIO", "ENG", "CS", "PT", "LIB", "ACC", "BST", "ECO", "IP"]
+
+def make_schedule(classes: int, periods: int, rng: random.Random) -> dict:
+    return {f"C{k:02d}": [rng.choice(SUBJECTS) for _ in range(periods)] for k in range(classes)}
+
+def measure(storage_format: str, args) -> dict:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_db_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        tm = TimetableManager(db, storage_format=storage_format)
+
+        tm.create_timetables([
+            {"name": f"T{i}", "entries": make_schedule(args.classes, args.periods, rng), "periods": args.periods}
+            for i in range(args.timetables)
+        ])
+
+        latencies = []
+        for _ in range(args.reads):
+            name = f"T{rng.randrange(args.timetables)}"
+            start = time.perf_counter()
+            tm.get_timetable_data(name)
+            latencies.append(time.perf_counter() - start)
+
+        db.close()
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.exec_driver_sql("VACUUM")
+        engine.dispose()
+        return {
+            "size_kb": os.path.getsize(path) / 1024,
+            "read_ms": statistics.median(latencies) * 1000
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--timetables", type=int, default=200)
+    parser.add_argument("--classes", type=int, default=40)
+    parser.add_argument("--periods", type=int, default=10)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {fmt: measure(fmt, args) for fmt in ("rows", "grid")}
+    print(f"{args.timetables} timetables of {args.classes} classes x {args.periods} periods")
+    print(f"{'format':>8} {'db_kb':>10} {'read_ms':>9}")
+    for fmt, r in results.items():
+        print(f"{fmt:>8} {r['size_kb']:>10.1f} {r['read_ms']:>9.3f}")
+    rows, grid = results["rows"], results["grid"]
+    print(f"grid: {rows['size_kb'] / grid['size_kb']:.1f}x smaller, {rows['read_ms'] / grid['read_ms']:.1f}x faster reads")
+
+if __name__ == "__main__":
+    main()
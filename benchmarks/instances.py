@@ -0,0 +1,32 @@
+"""Seeded synthetic scheduling instances for benchmarks."""
+import random
+
+def generate_instance(classes: int, periods: int, overlap: float = 1.0, tightness: float = 0.8,
+                      seed: int = 0) -> dict:
+    """
+    Build a solvable GenerateRequest-style instance: class -> [subjects].
+
+    overlap:   share of cells drawn from the school-wide subject pool; the
+               rest are class-only subjects that can never clash.
+    tightness: classes / shared pool size. At 1.0 every shared subject is
+               taught in every period, so only exact solutions remain.
+
+    Cells are assigned period by period without clashes, then each class's
+    list is shuffled, so a valid schedule always exists.
+    """
+    rng = random.Random(seed)
+    pool_size = max(classes, round(classes / max(tightness, 1e-6)))
+    pool = [f"S{i}" for i in range(pool_size)]
+    data = {f"C{k}": [] for k in range(classes)}
+
+    for p in range(periods):
+        shared = [cls for cls in data if rng.random() < overlap]
+        for cls, subject in zip(shared, rng.sample(pool, len(shared))):
+            data[cls].append(subject)
+        for cls in data:
+            if len(data[cls]) <= p:
+                data[cls].append(f"{cls}-{rng.randrange(3)}")
+
+    for row in data.values():
+        rng.shuffle(row)
+    return data
@@ -0,0 +1,282 @@
+"""
+Scheduler, repository and API benchmark suite with machine-readable output.
+
+    python -m benchmarks.suite [--quick] [--output results.json]
+    python -m benchmarks.suite --compare before.json after.json
+
+Every instance comes from benchmarks.instances with a fixed seed, so two
+runs on the same machine measure the same work. --compare prints the
+ratio of every latency/throughput figure and flags regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from timetable_system.models.engine import create_db_engine
+from timetable_system.models.timetable import Base
+from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.services import scheduler as scheduler_module
+from timetable_system.services.scheduler import TimetableScheduler
+from .instances import generate_instance
+
+FULL = {
+    "solver_sizes": [5, 10, 20, 40],
+    "tightness": [0.5, 0.8, 1.0],
+    "seeds": 10,
+    "attempt_counts": [10, 100, 1000, 10000],
+    "timetables": 500,
+    "api_requests": 100
+}
+QUICK = {
+    "solver_sizes": [5, 10],
+    "tightness": [0.5, 1.0],
+    "seeds": 3,
+    "attempt_counts": [10, 1000],
+    "timetables": 50,
+    "api_requests": 20
+}
+PERIODS = 8
+SOLVE_TIMEOUT = 10.0 # Seconds per solve before it counts as a failure
+REGRESSION_THRESHOLD = 1.10 # Slower than this ratio is flagged
+
+def percentiles(samples: list) -> dict:
+    """Latency summary in milliseconds."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {
+        "p50_ms": round(pick(0.50), 3),
+        "p90_ms": round(pick(0.90), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3)
+    }
+
+def timed_solve(data: dict, engine: str, seed: int):
+    deadline = time.perf_counter() + SOLVE_TIMEOUT
+    scheduler = TimetableScheduler(
+        data, PERIODS, engine=engine, seed=seed,
+        should_stop=lambda: time.perf_counter() > deadline
+    )
+    start = time.perf_counter()
+    schedule = scheduler.solve()
+    return schedule is not None, time.perf_counter() - start
+
+def bench_solver(cfg: dict) -> list:
+    results = []
+    for classes in cfg["solver_sizes"]:
+        for tightness in cfg["tightness"]:
+            for engine in ("backtracking", "random"):
+                solved, times = 0, []
+                for seed in range(cfg["seeds"]):
+                    data = generate_instance(classes, PERIODS, overlap=0.8, tightness=tightness, seed=seed)
+                    ok, elapsed = timed_solve(data, engine, seed)
+                    solved += ok
+                    times.append(elapsed)
+                results.append({
+                    "engine": engine,
+                    "classes": classes,
+                    "periods": PERIODS,
+                    "overlap": 0.8,
+                    "tightness": tightness,
+                    "runs": cfg["seeds"],
+                    "success_rate": solved / cfg["seeds"],
+                    **percentiles(times)
+                })
+                print(f"  solve {engine:<12} classes={classes:<3} tightness={tightness:<4} "
+                      f"success={solved}/{cfg['seeds']} p50={results[-1]['p50_ms']}ms", file=sys.stderr)
+    return results
+
+def bench_attempts(cfg: dict) -> list:
+    """Random-engine success rate as MAX_ATTEMPTS grows."""
+    results = []
+    original = scheduler_module.MAX_ATTEMPTS
+    try:
+        for attempts in cfg["attempt_counts"]:
+            scheduler_module.MAX_ATTEMPTS = attempts
+            solved, times = 0, []
+            for seed in range(cfg["seeds"] * 3):
+                data = generate_instance(6, PERIODS, overlap=0.8, tightness=0.5, seed=seed)
+                ok, elapsed = timed_solve(data, "random", seed)
+                solved += ok
+                times.append(elapsed)
+            results.append({
+                "attempts": attempts,
+                "classes": 6,
+                "runs": len(times),
+                "success_rate": solved / len(times),
+                **percentiles(times)
+            })
+    finally:
+        scheduler_module.MAX_ATTEMPTS = original
+    return results
+
+def bench_repository(cfg: dict) -> list:
+    """Save and read throughput against a fresh SQLite file, per storage format."""
+    rng = random.Random(0)
+    items = [
+        {"name": f"T{i}", "entries": generate_instance(20, PERIODS, seed=rng.randrange(10 ** 6)), "periods": PERIODS}
+        for i in range(cfg["timetables"])
+    ]
+    results = []
+    for storage_format in ("rows", "grid"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(engine)
+            db = sessionmaker(bind=engine)()
+            tm = TimetableManager(db, storage_format=storage_format)
+            half = len(items) // 2
+
+            start = time.perf_counter()
+            for item in items[:half]:
+                tm.create_timetable(item["name"], item["entries"], item["periods"])
+            single = half / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            tm.create_timetables(items[half:])
+            bulk = (len(items) - half) / (time.perf_counter() - start)
+
+            reads = []
+            for _ in range(len(items)):
+                name = f"T{rng.randrange(len(items))}"
+                start = time.perf_counter()
+                tm.get_timetable_data(name)
+                reads.append(time.perf_counter() - start)
+
+            db.close()
+            engine.dispose()
+        results.append({
+            "storage_format": storage_format,
+            "timetables": len(items),
+            "classes": 20,
+            "periods": PERIODS,
+            "save_per_s": round(single, 1),
+            "bulk_save_per_s": round(bulk, 1),
+            "read_per_s": round(len(reads) / sum(reads), 1),
+            **{f"read_{k}": v for k, v in percentiles(reads).items()}
+        })
+    return results
+
+def bench_api(cfg: dict) -> dict:
+    """End-to-end POST /generate latency through the ASGI app (no network)."""
+    from fastapi.testclient import TestClient
+    from api import main
+
+    client = TestClient(main.app)
+    main.solve_cache.clear()
+    # Read the (empty) resource model from a scratch database, not the working one
+    tmp = tempfile.TemporaryDirectory()
+    engine = create_db_engine(f"sqlite:///{os.path.join(tmp.name, 'bench.db')}")
+    Base.metadata.create_all(engine)
+    main.resource_cache.session_factory = sessionmaker(bind=engine)
+    main.resource_cache.invalidate()
+    payloads = [
+        {"periods": PERIODS, "classes": generate_instance(10, PERIODS, overlap=0.8, tightness=0.8, seed=seed)}
+        for seed in range(cfg["api_requests"])
+    ]
+
+    results = {}
+    for label in ("cold", "cached"):
+        times, ok = [], 0
+        for payload in payloads:
+            start = time.perf_counter()
+            response = client.post("/generate", json=payload)
+            times.append(time.perf_counter() - start)
+            ok += response.status_code == 200
+        results[label] = {"requests": len(payloads), "success_rate": ok / len(payloads), **percentiles(times)}
+    engine.dispose()
+    tmp.cleanup()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(value, prefix=""):
+    """Yields (path, number) for every metric, keyed by the benchmark parameters."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for item in value:
+            labels = ",".join(
+                f"{k}={v}" for k, v in item.items()
+                if k in ("engine", "classes", "tightness", "attempts", "storage_format")
+            )
+            yield from flatten({k: v for k, v in item.items()}, f"{prefix}[{labels}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+def compare(before_path: str, after_path: str) -> int:
+    with open(before_path) as f:
+        before = dict(flatten({k: v for k, v in json.load(f).items() if k != "meta"}))
+    with open(after_path) as f:
+        after = dict(flatten({k: v for k, v in json.load(f).items() if k != "meta"}))
+
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        if old == new:
+            ratio = 1.0
+        elif key.endswith("_ms"):
+            ratio = new / old if old else 1.0 # > 1 is slower
+        elif key.endswith("_per_s") or key.endswith("success_rate"):
+            ratio = old / new if new else float("inf") # > 1 is worse
+        else:
+            continue
+        flag = "REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        regressions += bool(flag)
+        print(f"{key:<90} {old:>12} -> {new:<12} x{ratio:.2f} {flag}")
+    print(f"{regressions} regression(s) beyond {REGRESSION_THRESHOLD:.2f}x")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for CI")
+    parser.add_argument("--output", default="-", help="JSON results file (default: stdout)")
+    parser.add_argument("--only", nargs="+", choices=["solver", "attempts", "repository", "api"])
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare))
+
+    cfg = QUICK if args.quick else FULL
+    sections = {"solver": bench_solver, "attempts": bench_attempts, "repository": bench_repository, "api": bench_api}
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick
+        }
+    }
+    for name, bench in sections.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = bench(cfg)
+
+    text = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
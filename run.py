@@ -1,4 +1,9 @@
-from timetable_system.main import main
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+        # Subcommands skip the interactive menu's imports, for quick startup in scripts
+        from timetable_system.cli import main
+        sys.exit(main())
+    from timetable_system.main import main
     main()
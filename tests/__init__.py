@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Imported before any test module (and so before timetable_system.config):
+# the tests write to a throwaway database, never to the working directory's timetable.db
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["TT_DB_URL"] = f"sqlite:///{os.path.join(_db_dir.name, 'timetable.db')}"
@@ -1,7 +1,13 @@
 from fastapi.testclient import TestClient
 from api.main import app
+from timetable_system.models import ensure_schema
 import unittest
+import time
+import json
+import csv
+import io
 
+ensure_schema()
 client = TestClient(app)
 
 class TestAPI(unittest.TestCase):
@@ -19,6 +25,224 @@ class TestAPI(unittest.TestCase):
         self.assertIn("12A", data)
         self.assertEqual(len(data["12A"]), 2)
 
+    def test_generate_uses_cache(self):
+        payload = {
+            "periods": 3,
+            "classes": {"CacheA": ["ENG", "CS", "PT"], "CacheB": ["CS", "PT", "ENG"]}
+        }
+        first = client.post("/generate", json=payload)
+        hits = client.get("/cache/stats").json()["hits"]
+
+        # Same multisets under new class names
+        payload["classes"] = {"CacheX": ["PT", "ENG", "CS"], "CacheY": ["ENG", "PT", "CS"]}
+        second = client.post("/generate", json=payload)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(set(second.json()), {"CacheX", "CacheY"})
+        self.assertEqual(sorted(first.json().values()), sorted(second.json().values()))
+        self.assertEqual(client.get("/cache/stats").json()["hits"], hits + 1)
+
+    def test_generate_with_time_budget(self):
+        payload = {
+            "periods": 2,
+            "time_budget": 0.5,
+            "classes": {"BudgetA": ["MATH", "PHY"], "BudgetB": ["MATH", "CHEM"], "BudgetC": ["MATH", "BIO"]}
+        }
+        response = client.post("/generate", json=payload)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data["complete"])
+        self.assertEqual(data["clash_count"], 1)
+        self.assertEqual(data["clashes"][0]["subject"], "MATH")
+        self.assertEqual(data["conflicts"][0]["subject"], "MATH")
+        self.assertIn("candidates", data["stats"])
+
+        payload["classes"]["BudgetC"] = ["BIO", "ENG"]
+        data = client.post("/generate", json=payload).json()
+        self.assertTrue(data["complete"])
+        self.assertEqual(data["clashes"], [])
+
+        payload["time_budget"] = 0
+        self.assertEqual(client.post("/generate", json=payload).status_code, 422)
+
+    def test_best_effort_never_caches_a_clash(self):
+        # T teaches MATH and PHY: a best-effort schedule with both in one period must not be served later
+        payload = {"periods": 2, "engine": "random",
+                   "classes": {"ShareA": ["MATH", "XA"], "ShareB": ["PHY", "YB"]}}
+        saved = client.get("/resources").json()
+        try:
+            client.put("/resources", json={"teachers": {"T": ["MATH", "PHY"]}})
+            data = client.post("/generate", json=dict(payload, time_budget=1e-6)).json()
+            self.assertEqual(data["complete"], data["clash_count"] == 0)
+
+            response = client.post("/generate", json=payload)
+            self.assertEqual(response.status_code, 200)
+            schedule = response.json()
+            self.assertNotEqual(schedule["ShareA"].index("MATH"), schedule["ShareB"].index("PHY"))
+        finally:
+            client.put("/resources", json=saved)
+
+    def test_generate_parallel_timetable(self):
+        payload = {
+            "periods": 2,
+            "parallel": True,
+            "classes": {
+                "12A": ["MATH", "PHY"],
+                "12B": ["MATH", "PHY"]
+            }
+        }
+        response = client.post("/generate", json=payload)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertNotEqual(data["12A"][0], data["12B"][0])
+
+    def test_generate_batch(self):
+        client.delete("/timetables/APIBatch")
+        item = {"periods": 2, "classes": {"BatchA": ["MATH", "PHY"], "BatchB": ["MATH", "CHEM"]}, "save_as": "APIBatch"}
+        renamed = {"periods": 2, "classes": {"BatchX": ["CHEM", "MATH"], "BatchY": ["PHY", "MATH"]}}
+        impossible = {"periods": 1, "classes": {"BatchA": ["MATH"], "BatchB": ["MATH"]}}
+        response = client.post("/generate/batch", json={"items": [item, renamed, impossible]})
+        self.assertEqual(response.status_code, 200)
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        results = {line["index"]: line for line in lines if "index" in line}
+        self.assertEqual(results[0]["status"], "solved")
+        self.assertEqual(set(results[1]["schedule"]), {"BatchX", "BatchY"})
+        self.assertEqual(sorted(results[1]["schedule"]["BatchX"]), ["CHEM", "MATH"])
+        self.assertEqual(results[2]["status"], "infeasible")
+        self.assertEqual(results[2]["conflicts"][0]["subject"], "MATH")
+
+        self.assertEqual(lines[-1]["saved"][0]["name"], "APIBatch")
+        self.assertEqual(lines[-1]["saved"][0]["index"], 0)
+        self.assertEqual(client.get("/timetables/APIBatch").status_code, 200)
+        client.delete("/timetables/APIBatch")
+
+    def test_resources_change_solving(self):
+        payload = {"periods": 1, "classes": {"ResA": ["LIB"], "ResB": ["LIB"]}}
+        self.assertEqual(client.post("/generate", json=payload).status_code, 400)
+        saved = client.get("/resources").json()
+        try:
+            response = client.put("/resources", json={"capacities": {"LIB": 2}})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(client.get("/resources").json()["capacities"], {"LIB": 2})
+            # The cached "impossible" answer was for a different resource model
+            self.assertEqual(client.post("/generate", json=payload).json(), {"ResA": ["LIB"], "ResB": ["LIB"]})
+
+            self.assertEqual(client.put("/resources", json={"capacities": {"LIB": 0}}).status_code, 400)
+        finally:
+            client.put("/resources", json=saved)
+
+    def test_generate_with_soft_constraints(self):
+        payload = {
+            "periods": 4,
+            "classes": {"12A": ["MATH", "MATH", "PT", "ENG"], "12B": ["PHY", "PHY", "LIB", "PT"]},
+            "soft": {"spread": 1, "avoid": [{"subject": "PT", "periods": [0], "weight": 5}]},
+            "optimize_budget": 0.2
+        }
+        response = client.post("/generate", json=payload)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["score"], 0)
+        self.assertEqual(data["breakdown"], {"spread": 0, "heavy": 0, "avoid": 0})
+        self.assertNotEqual(data["schedule"]["12A"][0], "PT")
+        self.assertEqual(client.post("/generate", json=dict(payload, time_budget=1)).status_code, 400)
+        self.assertEqual(client.post("/jobs", json=payload).status_code, 400)
+
+    def test_generate_week_and_save(self):
+        quotas = {"12A": {"MATH": 3, "PHY": 2, "ENG": 1}, "12B": {"MATH": 3, "BIO": 3}}
+        response = client.post("/generate/week", json={"days": 3, "periods": 2, "quotas": quotas})
+        self.assertEqual(response.status_code, 200)
+        week = response.json()["schedule"]
+        self.assertEqual(len(week), 3)
+        self.assertEqual(sum(day["12A"].count("MATH") for day in week), 3)
+
+        client.delete("/timetables/APIWeek")
+        response = client.post("/timetables", json={"name": "APIWeek", "periods": 2, "entries": week})
+        self.assertEqual(response.status_code, 200)
+        data = client.get("/timetables/APIWeek").json()
+        self.assertEqual(data["days"], 3)
+        self.assertEqual({e["day_index"] for e in data["entries"]}, {0, 1, 2})
+        self.assertEqual(client.post("/timetables/APIWeek/repair", json={"classes": {}}).status_code, 400)
+        client.delete("/timetables/APIWeek")
+
+        response = client.post("/generate/week", json={"days": 1, "periods": 2, "quotas": {"12A": {"MATH": 3}}})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["conflicts"][0]["class"], "12A")
+        self.assertEqual(client.post("/generate/week", json={"days": 8, "periods": 2, "quotas": {}}).status_code, 422)
+
+    def test_timetable_revisions(self):
+        client.delete("/timetables/APIRev")
+        client.post("/timetables", json={"name": "APIRev", "periods": 2, "entries": {"12A": ["MATH", "PHY"]}})
+        etag = client.get("/timetables/APIRev").headers["ETag"]
+
+        response = client.put("/timetables/APIRev", json={"periods": 2, "entries": {"12A": ["MATH", "BIO"]},
+                                                          "base_revision": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["revision"], 2)
+        latest = client.get("/timetables/APIRev", headers={"If-None-Match": etag})
+        self.assertEqual(latest.status_code, 200) # The edit invalidated the cached copy
+        self.assertEqual(latest.json()["entries"][1]["subject"], "BIO")
+
+        stale = client.put("/timetables/APIRev", json={"periods": 2, "entries": {"12A": ["ENG"]}, "base_revision": 1})
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(client.put("/timetables/Missing", json={"periods": 2, "entries": {}}).status_code, 404)
+
+        revisions = client.get("/timetables/APIRev/revisions").json()
+        self.assertEqual([(r["number"], r["snapshot"], r["changes"]) for r in revisions], [(1, True, None), (2, False, 1)])
+        first = client.get("/timetables/APIRev/revisions/1").json()
+        self.assertEqual([e["subject"] for e in first["entries"]], ["MATH", "PHY"])
+        self.assertEqual(client.get("/timetables/APIRev/revisions/3").status_code, 404)
+
+        diff = client.get("/timetables/APIRev/diff", params={"from": 1, "to": 2}).json()
+        self.assertEqual(diff["changes"], [
+            {"day_index": 0, "class_name": "12A", "period_index": 1, "before": "PHY", "after": "BIO"}
+        ])
+        client.delete("/timetables/APIRev")
+
+    def test_validate_and_reject_clashing_saves(self):
+        clashing = {"12A": ["MATH", "PHY"], "12B": ["MATH", "BIO"]}
+        response = client.post("/validate", json={"entries": clashing})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data["valid"])
+        self.assertEqual(data["clash_count"], 1)
+        self.assertEqual((data["clashes"][0]["period"], data["clashes"][0]["classes"]), (0, ["12A", "12B"]))
+        self.assertEqual(client.post("/validate", json={"entries": [clashing], "periods": 0}).status_code, 422)
+
+        client.delete("/timetables/APIClash")
+        response = client.post("/timetables", json={"name": "APIClash", "periods": 2, "entries": clashing})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["clashes"][0]["subject"], "MATH")
+        self.assertEqual(client.get("/timetables/APIClash").status_code, 404)
+
+        results = client.post("/timetables/bulk", json=[
+            {"name": "APIClash", "periods": 2, "entries": clashing},
+            {"name": "APIClash", "periods": 2, "entries": {"12A": ["MATH", "PHY"], "12B": ["BIO", "MATH"]}}
+        ]).json()
+        self.assertIn("MATH", results[0]["error"])
+        self.assertIsNone(results[1]["error"])
+        self.assertEqual(client.put("/timetables/APIClash", json={"periods": 2, "entries": clashing}).status_code, 400)
+
+        with client.stream("GET", "/validate/stored") as response:
+            lines = [json.loads(line) for line in response.iter_lines() if line]
+        self.assertIn("APIClash", [line["name"] for line in lines if line.get("valid")])
+        self.assertEqual(lines[-1]["checked"], len(lines) - 1)
+        client.delete("/timetables/APIClash")
+
+    def test_generate_impossible_timetable(self):
+        payload = {
+            "periods": 2,
+            "classes": {
+                "12A": ["MATH", "MATH"],
+                "12B": ["MATH", "PHY"]
+            }
+        }
+        response = client.post("/generate", json=payload)
+        self.assertEqual(response.status_code, 400)
+        data = response.json()
+        self.assertIn("MATH", data["detail"])
+        self.assertEqual(data["conflicts"][0]["subject"], "MATH")
+        self.assertEqual(data["conflicts"][0]["classes"], ["12A", "12B"])
+
     def test_create_and_list_timetables(self):
         # 1. Generate local schedule
         schedule = {
@@ -48,5 +272,153 @@ class TestAPI(unittest.TestCase):
         timetables = response.json()
         self.assertTrue(any(t["name"] == payload["name"] for t in timetables))
 
+    def test_bulk_import(self):
+        names = ["APIBulk1", "APIBulk2"]
+        for name in names:
+            client.delete(f"/timetables/{name}")
+        payload = [
+            {"name": "APIBulk1", "periods": 1, "entries": {"12A": ["MATH"]}},
+            {"name": "APIBulk1", "periods": 1, "entries": {"12A": ["PHY"]}},
+            {"name": "APIBulk2", "periods": 1, "entries": {"12A": ["BIO"]}}
+        ]
+        response = client.post("/timetables/bulk", json=payload)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertIsNone(results[0]["error"])
+        self.assertIsNotNone(results[1]["error"])
+        self.assertIsNone(results[2]["error"])
+        self.assertEqual(client.get("/timetables/APIBulk2").json()["entries"][0]["subject"], "BIO")
+        for name in names:
+            client.delete(f"/timetables/{name}")
+
+    def test_list_pagination(self):
+        names = [f"APIPage{i}" for i in range(3)]
+        for name in names:
+            client.delete(f"/timetables/{name}")
+        client.post("/timetables/bulk", json=[
+            {"name": name, "periods": 1, "entries": {"12A": ["MATH"]}} for name in names
+        ])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/timetables", params=params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()), 1)
+            seen.extend(t["name"] for t in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertTrue(set(names) <= set(seen))
+        self.assertEqual(len(seen), len(set(seen)))
+        # Browsers only let the SPA read the cursor if CORS exposes it
+        response = client.get("/timetables", params={"limit": 1}, headers={"Origin": "http://example.com"})
+        self.assertIn("x-next-cursor", response.headers["access-control-expose-headers"].lower())
+        for name in names:
+            client.delete(f"/timetables/{name}")
+
+    def test_get_timetable_etag(self):
+        payload = {"name": "APIETag", "periods": 1, "entries": {"12A": ["MATH"]}}
+        client.delete("/timetables/APIETag")
+        client.post("/timetables", json=payload)
+
+        first = client.get("/timetables/APIETag")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertEqual(first.json()["entries"][0]["subject"], "MATH")
+
+        second = client.get("/timetables/APIETag", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers["ETag"], etag)
+
+        # Delete + recreate must not serve the cached body
+        client.delete("/timetables/APIETag")
+        self.assertEqual(client.get("/timetables/APIETag").status_code, 404)
+        payload["entries"] = {"12A": ["PHY"]}
+        client.post("/timetables", json=payload)
+        third = client.get("/timetables/APIETag", headers={"If-None-Match": etag})
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()["entries"][0]["subject"], "PHY")
+        client.delete("/timetables/APIETag")
+
+    def test_export(self):
+        client.delete("/timetables/APIExport")
+        client.post("/timetables", json={"name": "APIExport", "periods": 2, "entries": {"12A": ["MATH", "PHY"]}})
+
+        response = client.get("/export", params={"format": "ndjson"})
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        exported = next(t for t in lines if t["name"] == "APIExport")
+        self.assertEqual(exported["entries"], {"12A": ["MATH", "PHY"]})
+        self.assertEqual(exported["periods"], 2)
+
+        # Resuming after it skips it
+        response = client.get("/export", params={"after_id": exported["id"]})
+        self.assertFalse(any(json.loads(line)["name"] == "APIExport" for line in response.text.splitlines()))
+
+        response = client.get("/export", params={"format": "csv"})
+        rows = list(csv.reader(io.StringIO(response.text)))
+        self.assertEqual(rows[0][0], "timetable_id")
+        self.assertIn(["APIExport", "12A", "1", "PHY"], [[r[1], r[3], r[4], r[5]] for r in rows[1:]])
+
+        self.assertEqual(client.get("/export", params={"format": "xml"}).status_code, 422)
+        client.delete("/timetables/APIExport")
+
+    def test_query_endpoints(self):
+        client.delete("/timetables/APIQuery")
+        client.post("/timetables", json={"name": "APIQuery", "periods": 1, "entries": {"12A": ["QSUBJ"]}})
+
+        response = client.get("/query/classes", params={"subject": "QSUBJ", "period_index": 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"timetable": "APIQuery", "class_name": "12A", "day_index": 0, "period_index": 0}])
+
+        response = client.get("/query/load", params={"timetable": "APIQuery"})
+        self.assertEqual(response.json(), [{"subject": "QSUBJ", "day_index": 0, "period_index": 0, "count": 1}])
+        client.delete("/timetables/APIQuery")
+
+    def test_repair_timetable(self):
+        payload = {
+            "name": "APIRepairTable",
+            "periods": 2,
+            "entries": {"12A": ["MATH", "PHY"], "12B": ["PHY", "MATH"]}
+        }
+        client.delete(f"/timetables/{payload['name']}")
+        self.assertEqual(client.post("/timetables", json=payload).status_code, 200)
+
+        response = client.post(
+            f"/timetables/{payload['name']}/repair",
+            json={"classes": {"12B": ["MATH", "BIO"]}}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["schedule"]["12A"], ["MATH", "PHY"])
+        self.assertEqual(data["schedule"]["12B"], ["BIO", "MATH"])
+        self.assertEqual(data["changed_classes"], ["12B"])
+
+        response = client.post("/timetables/Missing/repair", json={"classes": {}})
+        self.assertEqual(response.status_code, 404)
+        client.delete(f"/timetables/{payload['name']}")
+
+    def test_generate_job(self):
+        payload = {
+            "periods": 2,
+            "classes": {"12A": ["MATH", "PHY"], "12B": ["MATH", "PHY"]}
+        }
+        response = client.post("/jobs", json=payload)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+
+        for _ in range(500):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.01)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(sorted(job["result"]["12A"]), ["MATH", "PHY"])
+
+        self.assertEqual(client.get("/jobs/unknown").status_code, 404)
+
 if __name__ == "__main__":
     unittest.main()
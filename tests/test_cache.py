@@ -0,0 +1,81 @@
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from timetable_system.models.timetable import Base
+from timetable_system.services.cache import SolveCache
+from api.read_cache import ReadCache, etag_matches
+
+class TestSolveCache(unittest.TestCase):
+    def test_hit_is_invariant_to_class_names_and_order(self):
+        cache = SolveCache(max_size=10, ttl=60)
+        data = {"12A": ["PHY", "MATH"], "12B": ["BIO", "MATH"]}
+        schedule = {"12A": ["MATH", "PHY"], "12B": ["BIO", "MATH"]}
+        cache.put(data, 2, "backtracking", schedule)
+
+        renamed = {"X": ["MATH", "BIO"], "Y": ["MATH", "PHY"]}
+        hit, result = cache.get(renamed, 2, "backtracking")
+        self.assertTrue(hit)
+        self.assertEqual(result, {"X": ["BIO", "MATH"], "Y": ["MATH", "PHY"]})
+
+        # Periods and engine are part of the key
+        self.assertFalse(cache.get(renamed, 3, "backtracking")[0])
+        self.assertFalse(cache.get(renamed, 2, "random")[0])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_unsatisfiable_is_cached(self):
+        cache = SolveCache(max_size=10, ttl=60)
+        data = {"12A": ["MATH"], "12B": ["MATH"]}
+        cache.put(data, 1, "backtracking", None)
+        self.assertEqual(cache.get(data, 1, "backtracking"), (True, None))
+
+    def test_lru_and_ttl_eviction(self):
+        cache = SolveCache(max_size=2, ttl=60)
+        for i in range(3):
+            cache.put({"A": [f"S{i}"]}, 1, "backtracking", {"A": [f"S{i}"]})
+        self.assertFalse(cache.get({"A": ["S0"]}, 1, "backtracking")[0])
+        self.assertTrue(cache.get({"A": ["S2"]}, 1, "backtracking")[0])
+
+        expired = SolveCache(max_size=2, ttl=0)
+        expired.put({"A": ["S0"]}, 1, "backtracking", {"A": ["S0"]})
+        self.assertFalse(expired.get({"A": ["S0"]}, 1, "backtracking")[0])
+
+    def test_persistent_entries_survive_restart(self):
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        data = {"12A": ["MATH", "PHY"]}
+
+        SolveCache(session_factory=Session, ttl=60).put(data, 2, "backtracking", {"12A": ["PHY", "MATH"]})
+        SolveCache(session_factory=Session, ttl=60).put({"12A": ["MATH"], "12B": ["MATH"]}, 1, "backtracking", None)
+
+        fresh = SolveCache(session_factory=Session, ttl=60)
+        self.assertEqual(fresh.get(data, 2, "backtracking"), (True, {"12A": ["PHY", "MATH"]}))
+        self.assertEqual(fresh.get({"B": ["MATH"], "C": ["MATH"]}, 1, "backtracking"), (True, None))
+
+class TestReadCache(unittest.TestCase):
+    def timetable(self, i):
+        return {"id": i, "name": f"T{i}", "created_at": "2024-01-01T00:00:00", "entries": []}
+
+    def test_bounded_by_bytes(self):
+        body_size = len(ReadCache().put("T0", self.timetable(0))[1])
+        cache = ReadCache(max_bytes=body_size * 2, ttl=60)
+        for i in range(3):
+            cache.put(f"T{i}", self.timetable(i))
+
+        self.assertIsNone(cache.get("T0"))
+        self.assertIsNotNone(cache.get("T2"))
+        self.assertLessEqual(cache.size, body_size * 2)
+
+        cache.invalidate("T2")
+        self.assertIsNone(cache.get("T2"))
+
+    def test_etag(self):
+        etag, body = ReadCache().put("T1", self.timetable(1))
+        self.assertNotEqual(etag, ReadCache().put("T2", self.timetable(2))[0])
+        self.assertTrue(etag_matches(f'"other", {etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches(None, etag))
+
+if __name__ == '__main__':
+    unittest.main()
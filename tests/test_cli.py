@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+from timetable_system.cli import main, read_documents, parse_spec
+from timetable_system.export import main as export_main
+from timetable_system.models import ensure_schema, SessionLocal
+from timetable_system.repositories.timetable_manager import TimetableManager
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        ensure_schema()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.names = ["CLIGen", "CLIImport"]
+        self._cleanup()
+
+    def tearDown(self):
+        self._cleanup()
+        self.tmp.cleanup()
+
+    def _cleanup(self):
+        db = SessionLocal()
+        try:
+            for name in self.names:
+                TimetableManager(db).delete_timetable(name)
+        finally:
+            db.close()
+
+    def _file(self, name: str, text: str) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _lines(self, path: str) -> list:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_read_documents_formats(self):
+        spec = {"classes": {"12A": ["MATH"]}, "periods": 1}
+        ndjson = self._file("a.ndjson", json.dumps(spec) + "\n\n" + json.dumps(spec) + "\n")
+        array = self._file("b.json", json.dumps([spec, spec, spec], indent=2))
+        items = self._file("c.json", json.dumps({"items": [spec]}))
+        single = self._file("d.json", json.dumps(spec, indent=2))
+        self.assertEqual([len(list(read_documents(p))) for p in (ndjson, array, items, single)], [2, 3, 1, 1])
+
+        with self.assertRaises(ValueError):
+            list(read_documents(self._file("bad.json", "{nope")))
+        with self.assertRaises(ValueError):
+            parse_spec({"classes": {"12A": ["MATH"]}, "periods": 0}, "x")
+        with self.assertRaises(ValueError):
+            parse_spec({"classes": {"12A": ["MATH"]}, "periods": 1, "engine": "magic"}, "x")
+
+    def test_generate_list_export_import(self):
+        specs = self._file("specs.ndjson", "\n".join(json.dumps(s) for s in [
+            {"classes": {"12A": ["MATH", "PHY"], "12B": ["PHY", "MATH"]}, "periods": 2, "save_as": "CLIGen"},
+            {"classes": {"12A": ["MATH", "MATH"], "12B": ["MATH"]}, "periods": 2}
+        ]))
+        out = os.path.join(self.tmp.name, "out.ndjson")
+        self.assertEqual(main(["generate", specs, "-o", out]), 1) # The second spec is impossible
+
+        lines = self._lines(out)
+        results = {line["index"]: line for line in lines if "index" in line and "status" in line}
+        self.assertEqual(results[0]["status"], "solved")
+        self.assertEqual(results[1]["status"], "infeasible")
+        self.assertEqual([s["name"] for s in lines[-1]["saved"]], ["CLIGen"])
+
+        self.assertEqual(main(["list", "--json", "-o", out]), 0)
+        self.assertIn("CLIGen", [t["name"] for t in self._lines(out)])
+
+        self.assertEqual(main(["export", "-o", out]), 0)
+        exported = next(t for t in self._lines(out) if t["name"] == "CLIGen")
+        # The old module entry point is the same command
+        alias = os.path.join(self.tmp.name, "alias.ndjson")
+        self.assertEqual(export_main(["-o", alias]), 0)
+        self.assertEqual(self._lines(alias), self._lines(out))
+        backup = self._file("backup.ndjson", json.dumps(dict(exported, name="CLIImport")) + "\n")
+        self.assertEqual(main(["import", backup]), 0)
+        self.assertEqual(main(["import", backup]), 1) # Name taken now
+
+        db = SessionLocal()
+        try:
+            self.assertEqual(TimetableManager(db).get_schedule_by_name("CLIImport"), exported["entries"])
+        finally:
+            db.close()
+
+        self.assertEqual(main(["generate", self._file("bad.json", '[{"periods": 2}]')]), 2)
+
+    def test_validate_and_import_rejects_clashes(self):
+        clashing = self._file("clash.json", json.dumps([
+            {"name": "CLIImport", "periods": 1, "entries": {"12A": ["MATH"], "12B": ["MATH"]}},
+            {"name": "CLIGen", "periods": 1, "entries": {"12A": ["MATH"], "12B": ["PHY"]}}
+        ]))
+        self.assertEqual(main(["import", clashing]), 1) # Only the clashing one fails
+
+        out = os.path.join(self.tmp.name, "report.ndjson")
+        main(["validate", "-o", out])
+        report = self._lines(out)
+        self.assertIn({"name": "CLIGen", "valid": True}, [{k: r[k] for k in ("name", "valid")} for r in report[:-1]])
+        self.assertNotIn("CLIImport", [r.get("name") for r in report])
+        self.assertEqual(report[-1]["checked"], len(report) - 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
 import unittest
 import os
+import tempfile
+from sqlalchemy import text
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from timetable_system.models.timetable import Base, Timetable
+from timetable_system.models.timetable import Base, Timetable, TimetableRevision
+from timetable_system.models.engine import create_db_engine
+from timetable_system.models.grid import encode_grid, decode_grid, encode_week, decode_week
 from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.repositories.resource_manager import ResourceManager
 
 class TestDatabase(unittest.TestCase):
     def setUp(self):
@@ -35,10 +40,274 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(t_fetched.id, t.id)
         self.assertEqual(len(t_fetched.entries), 4) # 2 periods * 2 classes
         
+        # As a grid
+        self.assertEqual(self.tm.get_schedule_by_name(name), entries_data)
+        self.assertIsNone(self.tm.get_schedule_by_name("Missing"))
+
         # Delete
         success = self.tm.delete_timetable(name)
         self.assertTrue(success)
         self.assertIsNone(self.tm.get_timetable_by_name(name))
 
+    def test_keyset_pagination(self):
+        for i in range(5):
+            self.tm.create_timetable(f"Page{i}", {"12A": ["MATH"]}, 1)
+
+        first = self.tm.list_timetables(limit=2)
+        self.assertEqual([t.name for t in first], ["Page0", "Page1"])
+        second = self.tm.list_timetables(limit=2, after_id=first[-1].id)
+        self.assertEqual([t.name for t in second], ["Page2", "Page3"])
+        rest = self.tm.list_timetables(after_id=second[-1].id)
+        self.assertEqual([t.name for t in rest], ["Page4"])
+
+    def test_timetable_data_is_ordered(self):
+        self.tm.create_timetable("Ordered", {"12B": ["BIO", "CHEM"], "12A": ["MATH", "PHY"]}, 2)
+        data = self.tm.get_timetable_data("Ordered")
+
+        self.assertEqual(data["name"], "Ordered")
+        self.assertEqual(
+            [(e["class_name"], e["period_index"]) for e in data["entries"]],
+            [("12A", 0), ("12A", 1), ("12B", 0), ("12B", 1)]
+        )
+        self.assertIsNone(self.tm.get_timetable_data("Missing"))
+
+        self.tm.create_timetable("Empty", {}, 2)
+        self.assertEqual(self.tm.get_timetable_data("Empty")["entries"], [])
+
+    def test_iter_timetables(self):
+        self.tm.create_timetable("E1", {"12B": ["BIO"], "12A": ["MATH", "PHY"]}, 2)
+        TimetableManager(self.db, storage_format="grid").create_timetable("E2", {"11A": ["ENG"]}, 1)
+        self.tm.create_timetable("E3", {}, 1)
+
+        exported = list(self.tm.iter_timetables(batch_size=1))
+        self.assertEqual([t["name"] for t in exported], ["E1", "E2", "E3"])
+        self.assertEqual(exported[0]["entries"], {"12A": ["MATH", "PHY"], "12B": ["BIO"]})
+        self.assertEqual(exported[1]["entries"], {"11A": ["ENG"]})
+        self.assertEqual(exported[2]["entries"], {})
+
+        resumed = list(self.tm.iter_timetables(after_id=exported[0]["id"]))
+        self.assertEqual([t["name"] for t in resumed], ["E2", "E3"])
+
+    def test_cross_timetable_queries(self):
+        self.tm.create_timetable("Q1", {"12A": ["PHY", "MATH"], "12B": ["MATH", "PHY"]}, 2)
+        TimetableManager(self.db, storage_format="grid").create_timetable("Q2", {"11A": ["PHY", "BIO"]}, 2)
+
+        self.assertEqual(self.tm.find_classes("PHY", period_index=0), [
+            {"timetable": "Q1", "class_name": "12A", "day_index": 0, "period_index": 0},
+            {"timetable": "Q2", "class_name": "11A", "day_index": 0, "period_index": 0}
+        ])
+        self.assertEqual(len(self.tm.find_classes("PHY")), 3)
+        self.assertEqual(len(self.tm.find_classes("PHY", timetable="Q1")), 2)
+
+        load = {(r["subject"], r["period_index"]): r["count"] for r in self.tm.subject_load()}
+        self.assertEqual(load, {("PHY", 0): 2, ("MATH", 1): 1, ("MATH", 0): 1, ("PHY", 1): 1, ("BIO", 1): 1})
+        self.assertEqual(len(self.tm.subject_load(timetable="Q2")), 2)
+
+    def test_subject_lookup_uses_index(self):
+        plan = self.db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT timetable_id, class_name FROM timetable_entries "
+            "WHERE subject = 'PHY' AND period_index = 2"
+        )).fetchall()
+        self.assertIn("ix_entries_subject_period", " ".join(str(row) for row in plan))
+
+    def test_bulk_import_reports_conflicts_per_item(self):
+        self.tm.create_timetable("Existing", {"12A": ["MATH"]}, 1)
+        items = [
+            {"name": "Bulk1", "entries": {"12A": ["MATH", "PHY", "BIO"]}, "periods": 2},
+            {"name": "Existing", "entries": {"12A": ["PHY"]}, "periods": 1},
+            {"name": "Bulk2", "entries": {"12A": ["BIO"], "12B": ["CHEM"]}, "periods": 1},
+            {"name": "Bulk1", "entries": {"12A": ["PHY"]}, "periods": 1}
+        ]
+        results = self.tm.create_timetables(items)
+
+        self.assertEqual([r["name"] for r in results], ["Bulk1", "Existing", "Bulk2", "Bulk1"])
+        self.assertIsNotNone(results[0]["id"])
+        self.assertIsNone(results[0]["error"])
+        self.assertIn("already exists", results[1]["error"])
+        self.assertIsNotNone(results[2]["id"])
+        self.assertIn("already exists", results[3]["error"])
+
+        # Entries past `periods` are dropped, as in create_timetable
+        self.assertEqual(self.tm.get_schedule_by_name("Bulk1"), {"12A": ["MATH", "PHY"]})
+        self.assertEqual(self.tm.get_schedule_by_name("Bulk2"), {"12A": ["BIO"], "12B": ["CHEM"]})
+        self.assertEqual(self.tm.get_schedule_by_name("Existing"), {"12A": ["MATH"]})
+
+    def test_weekly_timetable(self):
+        week = [{"12A": ["MATH", "PHY"], "12B": ["PHY"]}, {"12A": ["BIO"], "12B": ["MATH", "BIO"]}]
+        for storage_format in ("rows", "grid"):
+            tm = TimetableManager(self.db, storage_format=storage_format)
+            t = tm.create_timetable(f"Week-{storage_format}", week, 2)
+            self.assertEqual(t.days, 2)
+            self.assertEqual(tm.get_week_by_name(t.name), week)
+            data = tm.get_timetable_data(t.name)
+            self.assertEqual(data["days"], 2)
+            self.assertEqual((data["entries"][3]["day_index"], data["entries"][3]["class_name"]), (1, "12A"))
+            with self.assertRaises(ValueError):
+                tm.get_schedule_by_name(t.name)
+
+        self.assertEqual(
+            [(r["timetable"], r["day_index"], r["period_index"]) for r in self.tm.find_classes("MATH", day_index=1)],
+            [("Week-grid", 1, 0), ("Week-rows", 1, 0)]
+        )
+        load = {(r["subject"], r["day_index"], r["period_index"]): r["count"] for r in self.tm.subject_load("Week-rows")}
+        self.assertEqual(load[("PHY", 0, 0)], 1)
+        self.assertEqual(load[("BIO", 1, 0)], 1)
+
+        exported = {t["name"]: t["entries"] for t in self.tm.iter_timetables()}
+        self.assertEqual(exported["Week-rows"], week)
+        self.assertEqual(exported["Week-grid"], week)
+
+        self.assertEqual(self.tm.convert_storage("grid"), 1)
+        self.assertEqual(self.tm.get_week_by_name("Week-rows"), week)
+        with self.assertRaises(ValueError):
+            self.tm.create_timetable("NoDays", [], 2)
+
+    def test_revision_history(self):
+        for storage_format in ("rows", "grid"):
+            tm = TimetableManager(self.db, storage_format=storage_format)
+            name = f"Rev-{storage_format}"
+            versions = [[{"12A": ["MATH", "PHY"], "12B": ["PHY", "BIO"]}]]
+            tm.create_timetable(name, versions[0][0], 2)
+            self.assertEqual([r["number"] for r in tm.list_revisions(name)], [1])
+
+            # 12 edits: past the snapshot at revision 11, with rows growing, shrinking and a second day
+            for n in range(12):
+                week = [{cls: list(row) for cls, row in day.items()} for day in versions[-1]]
+                week[0]["12A"][n % 2] = f"S{n}"
+                if n == 4:
+                    week[0]["12B"] = ["PHY"]
+                if n == 6:
+                    week.append({"12A": ["ART"], "12B": ["ART", "PE"]})
+                if n == 9:
+                    week = week[:1]
+                tm.update_timetable(name, week if len(week) > 1 else week[0], 2)
+                versions.append(tm.get_week_by_name(name))
+
+            revisions = tm.list_revisions(name)
+            self.assertEqual([r["number"] for r in revisions], list(range(1, 14)))
+            self.assertEqual([r["number"] for r in revisions if r["snapshot"]], [1, 11])
+            self.assertEqual(revisions[1]["changes"], 1) # Only the edited cell is stored
+            self.assertEqual(tm.get_timetable_data(name)["revision"], 13)
+            for number, week in enumerate(versions, start=1):
+                self.assertEqual(tm.get_revision(name, number)["week"], week)
+            self.assertIsNone(tm.get_revision(name, 14))
+
+            self.assertEqual(tm.diff_revisions(name, 5, 6), [
+                {"day_index": 0, "class_name": "12A", "period_index": 0, "before": "S2", "after": "S4"},
+                {"day_index": 0, "class_name": "12B", "period_index": 1, "before": "BIO", "after": None}
+            ])
+            self.assertEqual(len(tm.diff_revisions(name, 7, 8)), 4) # Day 2 added, plus the edit
+            with self.assertRaises(ValueError):
+                tm.update_timetable(name, versions[0][0], 2, base_revision=12)
+            tm.delete_timetable(name)
+        self.assertEqual(self.db.query(TimetableRevision).count(), 0)
+
+    def test_revision_snapshot_setting_changed(self):
+        # Revisions saved with one snapshot spacing must still read back under another
+        tm = TimetableManager(self.db, snapshot_every=10)
+        tm.create_timetable("Respaced", {"12A": ["MATH", "PHY"]}, 2)
+        versions = [tm.get_week_by_name("Respaced")]
+        for n in range(3):
+            tm.update_timetable("Respaced", {"12A": [f"S{n}", "PHY"]}, 2)
+            versions.append(tm.get_week_by_name("Respaced"))
+
+        tm = TimetableManager(self.db, snapshot_every=2)
+        for number, week in enumerate(versions, start=1):
+            self.assertEqual(tm.get_revision("Respaced", number)["week"], week)
+
+        # The next snapshot is due 2 revisions after the last stored one, not at a fixed number
+        for n in range(3, 6):
+            tm.update_timetable("Respaced", {"12A": [f"S{n}", "PHY"]}, 2)
+            versions.append(tm.get_week_by_name("Respaced"))
+        self.assertEqual([r["number"] for r in tm.list_revisions("Respaced") if r["snapshot"]], [1, 5, 7])
+        for number, week in enumerate(versions, start=1):
+            self.assertEqual(tm.get_revision("Respaced", number)["week"], week)
+
+    def test_grid_storage_format(self):
+        tm = TimetableManager(self.db, storage_format="grid")
+        entries_data = {"12B": ["BIO", "CHEM", "MATH"], "12A": ["MATH"]}
+        t = tm.create_timetable("Grid", entries_data, 2)
+
+        # No per-cell rows; the grid is one blob of 2 classes x 2 periods
+        self.assertEqual(t.entries, [])
+        self.assertEqual(len(t.grid), 4)
+        self.assertEqual(tm.get_schedule_by_name("Grid"), {"12A": ["MATH"], "12B": ["BIO", "CHEM"]})
+        self.assertEqual(
+            [(e["class_name"], e["period_index"], e["subject"]) for e in tm.get_timetable_data("Grid")["entries"]],
+            [("12A", 0, "MATH"), ("12B", 0, "BIO"), ("12B", 1, "CHEM")]
+        )
+        self.assertTrue(tm.delete_timetable("Grid"))
+
+    def test_convert_storage(self):
+        entries_data = {"12A": ["MATH", "PHY"], "12B": ["BIO", "CHEM"]}
+        self.tm.create_timetable("Convert", entries_data, 2)
+
+        self.assertEqual(self.tm.convert_storage("grid"), 1)
+        t = self.tm.get_timetable_by_name("Convert")
+        self.assertEqual(t.entries, [])
+        self.assertIsNotNone(t.grid)
+        self.assertEqual(self.tm.get_schedule_by_name("Convert"), entries_data)
+        self.assertEqual(self.tm.convert_storage("grid"), 0)
+
+        self.assertEqual(self.tm.convert_storage("rows"), 1)
+        t = self.tm.get_timetable_by_name("Convert")
+        self.assertIsNone(t.grid)
+        self.assertEqual(len(t.entries), 4)
+        self.assertEqual(self.tm.get_schedule_by_name("Convert"), entries_data)
+
+    def test_resource_model(self):
+        rm = ResourceManager(self.db)
+        self.assertEqual(rm.get_resources(), {"teachers": {}, "capacities": {}})
+
+        model = {"teachers": {"Rao": ["PHY", "MATH"], "Iyer": ["MATH"]}, "capacities": {"LIB": 3}}
+        saved = rm.replace_resources(model)
+        self.assertEqual(saved, {"teachers": {"Iyer": ["MATH"], "Rao": ["MATH", "PHY"]}, "capacities": {"LIB": 3}})
+
+        # Replaces rather than merges
+        self.assertEqual(rm.replace_resources({"capacities": {"PT": 2}}), {"teachers": {}, "capacities": {"PT": 2}})
+
+        with self.assertRaises(ValueError):
+            rm.replace_resources({"capacities": {"LIB": 0}})
+        with self.assertRaises(ValueError):
+            rm.replace_resources({"teachers": {"Rao": ["LIB"]}, "capacities": {"LIB": 2}})
+
+class TestGridCodec(unittest.TestCase):
+    def test_round_trip(self):
+        schedule = {"12A": ["MATH", "PHY"], "11B": ["PHY"]}
+        encoded = encode_grid(schedule, 2)
+        self.assertEqual(len(encoded["grid"]), 4) # 1 byte per cell
+        decoded = decode_grid(encoded["class_names"], encoded["subject_names"], 2, encoded["grid"])
+        self.assertEqual(decoded, schedule)
+
+    def test_wide_dictionary_uses_two_bytes(self):
+        schedule = {f"C{k}": [f"S{k}"] for k in range(300)}
+        encoded = encode_grid(schedule, 1)
+        self.assertEqual(len(encoded["grid"]), 600)
+        decoded = decode_grid(encoded["class_names"], encoded["subject_names"], 1, encoded["grid"])
+        self.assertEqual(decoded, schedule)
+
+    def test_week_round_trip(self):
+        week = [{"12A": ["MATH", "PHY"]}, {"12A": ["PHY"], "11B": ["BIO"]}]
+        encoded = encode_week(week, 2)
+        self.assertEqual(len(encoded["grid"]), 8) # 2 days x 2 classes x 2 periods
+        decoded = decode_week(encoded["class_names"], encoded["subject_names"], 2, 2, encoded["grid"])
+        self.assertEqual(decoded, [{"11B": [], "12A": ["MATH", "PHY"]}, {"11B": ["BIO"], "12A": ["PHY"]}])
+
+class TestEngineFactory(unittest.TestCase):
+    def test_sqlite_file_uses_wal_and_pragmas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'tt.db')}")
+            with engine.connect() as conn:
+                self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1) # NORMAL
+                self.assertGreater(conn.execute(text("PRAGMA busy_timeout")).scalar(), 0)
+            engine.dispose()
+
+    def test_sqlite_memory_engine(self):
+        engine = create_db_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT count(*) FROM timetables")).scalar(), 0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from timetable_system.models.timetable import Base
+from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.services.jobs import JobQueue, QueueFullError
+
+def wait_for(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        # Shared in-memory SQLite so the callback thread sees the same DB
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.queue = JobQueue(workers=1, max_depth=2, session_factory=self.Session)
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def test_job_solves_and_saves(self):
+        data = {"12A": ["MATH", "PHY"], "12B": ["MATH", "PHY"]}
+        job_id = self.queue.submit(data, 2, save_as="JobTable")
+        job = wait_for(self.queue, job_id)
+
+        self.assertEqual(job["status"], "done")
+        self.assertIsNone(job["error"])
+        self.assertNotEqual(job["result"]["12A"][0], job["result"]["12B"][0])
+
+        db = self.Session()
+        saved = TimetableManager(db).get_schedule_by_name("JobTable")
+        db.close()
+        self.assertEqual(saved, job["result"])
+
+    def test_impossible_job_fails(self):
+        job_id = self.queue.submit({"12A": ["MATH"], "12B": ["MATH"]}, 1)
+        job = wait_for(self.queue, job_id)
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["conflicts"][0]["subject"], "MATH")
+
+    def test_slow_save_does_not_hold_up_other_jobs(self):
+        release = threading.Event()
+
+        def slow_session():
+            release.wait(10)
+            return self.Session()
+
+        self.queue.session_factory = slow_session
+        saving = self.queue.submit({"12A": ["MATH"]}, 1, save_as="SlowSave")
+        other = self.queue.submit({"12A": ["PHY"]}, 1)
+        self.assertEqual(wait_for(self.queue, other)["status"], "done")
+        self.assertEqual(self.queue.get(saving)["status"], "running") # Solved, still saving
+        release.set()
+        self.assertEqual(wait_for(self.queue, saving)["status"], "done")
+
+    def test_queue_full(self):
+        data = {"12A": ["MATH"]}
+        ids = [self.queue.submit(data, 1), self.queue.submit(data, 1)]
+        with self.assertRaises(QueueFullError):
+            self.queue.submit(data, 1)
+        for job_id in ids:
+            wait_for(self.queue, job_id)
+        self.queue.submit(data, 1)
+
+if __name__ == '__main__':
+    unittest.main()
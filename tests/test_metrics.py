@@ -0,0 +1,57 @@
+import unittest
+from fastapi.testclient import TestClient
+from api.main import app
+from timetable_system.models import ensure_schema
+from timetable_system.utils.metrics import Registry, SOLVE_TOTAL, SQL_QUERIES
+
+ensure_schema()
+client = TestClient(app)
+
+class TestRegistry(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1))
+        latency.observe(0.05, "/a")
+        latency.observe(0.5, "/a")
+        latency.observe(5, "/a")
+
+        text = registry.render()
+        self.assertIn("# TYPE latency_seconds histogram", text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{route="/a"} 3', text)
+        self.assertIn('latency_seconds_sum{route="/a"} 5.55', text)
+
+    def test_counter_escapes_labels(self):
+        registry = Registry()
+        counter = registry.counter("events_total", "Test events.", ("name",))
+        counter.inc('a"b')
+        counter.inc('a"b', amount=2)
+        self.assertIn('events_total{name="a\\"b"} 3', registry.render())
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def test_generate_is_instrumented(self):
+        solved = SOLVE_TOTAL.value("backtracking", "solved")
+        payload = {"periods": 2, "classes": {"MetricsA": ["GEO", "ART"], "MetricsB": ["ART", "HIS"]}}
+        self.assertEqual(client.post("/generate", json=payload).status_code, 200)
+        self.assertEqual(client.get("/timetables/NoSuchMetricsTimetable").status_code, 404)
+
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        text = response.text
+        self.assertEqual(SOLVE_TOTAL.value("backtracking", "solved"), solved + 1)
+        self.assertIn('tt_solve_attempts_count{engine="backtracking"}', text)
+        # Route templates, not raw paths
+        self.assertIn('method="POST",route="/generate",status="200"', text)
+        self.assertIn('method="GET",route="/timetables/{name}",status="404"', text)
+        self.assertNotIn("NoSuchMetricsTimetable", text)
+
+    def test_sql_statements_are_counted(self):
+        selects = SQL_QUERIES.count("SELECT")
+        client.get("/timetables")
+        self.assertGreater(SQL_QUERIES.count("SELECT"), selects)
+
+if __name__ == '__main__':
+    unittest.main()
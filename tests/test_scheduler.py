@@ -1,5 +1,12 @@
+import time
 import unittest
+import numpy as np
 from timetable_system.services.scheduler import TimetableScheduler
+from timetable_system.services.parallel import ParallelScheduler
+from timetable_system.services.resources import CapacityTable
+from timetable_system.services.weekly import WeeklyScheduler, split_quotas
+from timetable_system.services.optimizer import ScheduleOptimizer
+from timetable_system.services.validator import find_clashes, clash_count
 
 class TestScheduler(unittest.TestCase):
     def test_basic_schedule(self):
@@ -43,6 +50,356 @@ class TestScheduler(unittest.TestCase):
         result = scheduler.solve()
         
         self.assertIsNone(result)
+        self.assertEqual(len(scheduler.conflicts), 1)
+        self.assertEqual(scheduler.conflicts[0]["subject"], "MATH")
+        self.assertEqual(scheduler.conflicts[0]["classes"], ["12A", "12B"])
+        self.assertEqual(scheduler.conflicts[0]["required"], 4)
+        self.assertEqual(scheduler.conflicts[0]["available"], 2)
+
+    def test_feasibility_ragged_rows(self):
+        # 12A only has period 0 checked, so MATH must be there for both classes
+        scheduler = TimetableScheduler({"12A": ["MATH"], "12B": ["MATH"]}, 2)
+        conflicts = scheduler.check_feasibility()
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0]["available"], 1)
+
+        # 12B can move MATH to period 1
+        scheduler = TimetableScheduler({"12A": ["MATH"], "12B": ["MATH", "PHY"]}, 2)
+        self.assertEqual(scheduler.check_feasibility(), [])
+        self.assertIsNotNone(scheduler.solve())
+
+    def test_random_engine(self):
+        data = {
+            "12A": ["MATH", "PHY"],
+            "12B": ["BIO", "CHEM"]
+        }
+        scheduler = TimetableScheduler(data, 2, engine="random")
+        result = scheduler.solve()
+
+        self.assertIsNotNone(result)
+        self.assertEqual(sorted(result["12A"]), ["MATH", "PHY"])
+
+    def test_batch_validation_matches_scalar(self):
+        # Ragged rows: 12A is short, 12B overflows past `periods`
+        data = {
+            "12A": ["MATH", "PHY"],
+            "12B": ["MATH", "PHY", "CHEM", "BIO", "ENG"],
+            "12C": ["PHY", "CHEM", "BIO", "MATH"]
+        }
+        scheduler = TimetableScheduler(data, 4, engine="random", seed=3)
+        names, codes = scheduler._encode()
+        rng = np.random.default_rng(0)
+        perms = [rng.random((300, len(row))).argsort(axis=1) for row in codes]
+        valid = scheduler._batch_is_valid(scheduler._batch_grid(codes, perms, 300, len(names)))
+
+        for b in range(300):
+            candidate = {
+                cls: [names[c] for c in codes[k][perms[k][b]]]
+                for k, cls in enumerate(scheduler.classes)
+            }
+            self.assertEqual(bool(valid[b]), scheduler._is_valid_schedule(candidate))
+        self.assertTrue(valid.any())
+        self.assertFalse(valid.all())
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            TimetableScheduler({"12A": ["MATH"]}, 1, engine="magic")
+
+    def test_backtracking_tight_schedule(self):
+        # 8 classes x 8 periods, every subject used exactly once per period.
+        # Random shuffles essentially never find this; backtracking must.
+        periods = 8
+        subjects = ["MATH", "PHY", "CHEM", "BIO", "ENG", "CS", "PT", "LIB"]
+        data = {
+            f"C{k}": sorted(subjects[(k + i) % 8] for i in range(periods))
+            for k in range(8)
+        }
+
+        scheduler = TimetableScheduler(data, periods, engine="backtracking", seed=1)
+        result = scheduler.solve()
+
+        self.assertIsNotNone(result)
+        self.assertTrue(scheduler._is_valid_schedule(result))
+        for cls in data:
+            self.assertEqual(sorted(result[cls]), sorted(data[cls]))
+
+    def test_backtracking_proves_infeasible(self):
+        # Three classes each need MATH, but there are only 2 periods to put it in
+        data = {
+            "12A": ["MATH", "PHY"],
+            "12B": ["MATH", "CHEM"],
+            "12C": ["MATH", "BIO"]
+        }
+        scheduler = TimetableScheduler(data, 2, engine="backtracking")
+        self.assertIsNone(scheduler.solve())
+
+    def test_backtracking_ragged_rows(self):
+        # Extra subjects past `periods` are kept but never checked for clashes
+        data = {
+            "12A": ["MATH", "PHY", "MATH"],
+            "12B": ["MATH"]
+        }
+        scheduler = TimetableScheduler(data, 2, engine="backtracking")
+        result = scheduler.solve()
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result["12B"], ["MATH"])
+        self.assertEqual(result["12A"][0], "PHY")
+        self.assertEqual(sorted(result["12A"]), ["MATH", "MATH", "PHY"])
+
+    def test_should_stop_aborts_search(self):
+        data = {"12A": ["MATH", "PHY"], "12B": ["MATH", "PHY"], "12C": ["BIO", "CHEM"]}
+        scheduler = TimetableScheduler(data, 2, engine="random", should_stop=lambda: True)
+        self.assertIsNone(scheduler.solve())
+        self.assertTrue(scheduler.stopped)
+
+    def test_parallel_schedule(self):
+        data = {
+            "12A": ["MATH", "MATH", "PHY", "CHEM"],
+            "12B": ["PHY", "CHEM", "MATH", "BIO"]
+        }
+        for engine in ("random", "backtracking"):
+            scheduler = ParallelScheduler(data, 4, engine=engine, workers=2, seed=7)
+            result = scheduler.solve()
+
+            self.assertIsNotNone(result)
+            self.assertTrue(scheduler.scheduler._is_valid_schedule(result))
+
+    def test_parallel_impossible_schedule(self):
+        scheduler = ParallelScheduler({"12A": ["MATH"], "12B": ["MATH"]}, 1, workers=2)
+        self.assertIsNone(scheduler.solve())
+        self.assertEqual(scheduler.conflicts[0]["subject"], "MATH")
+
+    def test_repair_keeps_unchanged_classes(self):
+        current = {
+            "12A": ["MATH", "PHY", "CHEM", "BIO"],
+            "12B": ["PHY", "CHEM", "BIO", "MATH"],
+            "12C": ["CHEM", "BIO", "MATH", "PHY"]
+        }
+        # 12C swaps PHY for ENG; the other two classes should not move
+        data = dict(current, **{"12C": ["CHEM", "BIO", "MATH", "ENG"]})
+        scheduler = TimetableScheduler(data, 4, seed=1)
+        result = scheduler.repair(current)
+
+        self.assertIsNotNone(result)
+        self.assertTrue(scheduler._is_valid_schedule(result))
+        self.assertEqual(result["12A"], current["12A"])
+        self.assertEqual(result["12B"], current["12B"])
+        self.assertEqual(scheduler.repair_stats["changed_classes"], ["12C"])
+        self.assertFalse(scheduler.repair_stats["fallback"])
+
+    def test_repair_resolves_new_clash(self):
+        current = {
+            "12A": ["MATH", "PHY", "CHEM"],
+            "12B": ["PHY", "CHEM", "MATH"]
+        }
+        # New class lands with MATH in period 0, clashing with 12A
+        data = dict(current, **{"12C": ["MATH", "BIO", "ENG"]})
+        scheduler = TimetableScheduler(data, 3, seed=2)
+        result = scheduler.repair(current)
+
+        self.assertIsNotNone(result)
+        self.assertTrue(scheduler._is_valid_schedule(result))
+        self.assertEqual(result["12A"], current["12A"])
+        self.assertEqual(result["12B"], current["12B"])
+        self.assertEqual(sorted(result["12C"]), ["BIO", "ENG", "MATH"])
+
+    def test_best_effort_complete_schedule(self):
+        data = {"12A": ["MATH", "PHY", "CHEM"], "12B": ["MATH", "PHY", "CHEM"], "12C": ["MATH", "PHY", "BIO"]}
+        scheduler = TimetableScheduler(data, 3, seed=3)
+        schedule, clashes = scheduler.solve_best_effort(1.0)
+
+        self.assertEqual(clashes, [])
+        self.assertTrue(scheduler._is_valid_schedule(schedule))
+        self.assertEqual(scheduler.solve_stats["best_clashes"][-1][1], 0)
+
+    def test_best_effort_marks_clashes_on_infeasible_input(self):
+        # MATH is needed 3 times in 2 periods: at least one clash is unavoidable
+        data = {"12A": ["MATH", "PHY"], "12B": ["MATH", "CHEM"], "12C": ["MATH", "BIO"]}
+        for engine in ("backtracking", "random"):
+            scheduler = TimetableScheduler(data, 2, engine=engine, seed=4)
+            schedule, clashes = scheduler.solve_best_effort(1.0)
+
+            self.assertEqual(len(scheduler.conflicts), 1)
+            for cls, subjects in data.items():
+                self.assertEqual(sorted(schedule[cls]), sorted(subjects))
+            # Stops at the proven minimum instead of running out the budget
+            self.assertEqual([(c["subject"], c["capacity"], c["excess"]) for c in clashes], [("MATH", 1, 1)])
+            self.assertEqual(len(clashes[0]["classes"]), 2)
+            self.assertLess(scheduler.solve_stats["elapsed"], 1.0)
+
+    def test_best_effort_shared_teacher(self):
+        # T teaches MATH and PHY, so they can't share a period though each fits alone
+        data = {"A": ["MATH", "X"], "B": ["PHY", "Y"]}
+        resources = {"teachers": {"T": ["MATH", "PHY"]}}
+        scheduler = TimetableScheduler(data, 2, engine="random", seed=1, resources=resources)
+        self.assertEqual([(c["subject"], c["classes"]) for c in scheduler.clash_groups(data)],
+                         [("MATH+PHY", ["A", "B"])])
+
+        # The greedy start puts MATH and PHY in period 0; the local search must see that as a clash
+        schedule, _, timeline = scheduler._min_conflicts(time.perf_counter())
+        self.assertEqual(timeline[0][1], 1)
+        self.assertEqual(timeline[-1][1], 0)
+        self.assertTrue(scheduler._is_valid_schedule(schedule))
+        self.assertEqual(scheduler.clash_groups(schedule), [])
+
+    def test_shared_resource_capacity(self):
+        data = {"12A": ["LIB", "MATH"], "12B": ["LIB", "PHY"], "12C": ["LIB", "CHEM"]}
+        # Without a resource model, LIB is one teacher: 3 copies in 2 periods is impossible
+        self.assertTrue(TimetableScheduler(data, 2).check_feasibility())
+
+        resources = {"capacities": {"LIB": 2}}
+        for engine in ("backtracking", "random"):
+            scheduler = TimetableScheduler(data, 2, engine=engine, seed=5, resources=resources)
+            schedule = scheduler.solve()
+            self.assertIsNotNone(schedule)
+            self.assertTrue(scheduler._is_valid_schedule(schedule))
+            self.assertEqual(max(sum(row[p] == "LIB" for row in schedule.values()) for p in range(2)), 2)
+
+    def test_teacher_pools(self):
+        # Two MATH teachers: both classes may have MATH at once
+        data = {"12A": ["MATH"], "12B": ["MATH"]}
+        resources = {"teachers": {"Rao": ["MATH"], "Iyer": ["MATH"]}}
+        self.assertEqual(TimetableScheduler(data, 1, resources=resources).solve(), data)
+
+        # One teacher covering MATH and PHY: they can never share a period
+        data = {"12A": ["MATH", "ENG"], "12B": ["PHY", "BIO"]}
+        resources = {"teachers": {"Rao": ["MATH", "PHY"]}}
+        for engine in ("backtracking", "random"):
+            scheduler = TimetableScheduler(data, 2, engine=engine, seed=6, resources=resources)
+            schedule = scheduler.solve()
+            self.assertIsNotNone(schedule)
+            self.assertNotEqual(schedule["12A"].index("MATH"), schedule["12B"].index("PHY"))
+        self.assertFalse(scheduler._is_valid_schedule({"12A": ["MATH", "ENG"], "12B": ["PHY", "BIO"]}))
+
+        # ...and with only one period left for both, there is no schedule
+        data = {"12A": ["MATH"], "12B": ["PHY"]}
+        self.assertIsNone(TimetableScheduler(data, 1, resources=resources).solve())
+
+    def test_find_clashes(self):
+        data = {"12A": ["MATH", "PHY", "ENG"], "12B": ["MATH", "BIO"], "12C": ["CHEM", "PHY", "ENG"]}
+        self.assertEqual(
+            [(c["day"], c["period"], c["subject"], c["classes"]) for c in find_clashes(data)],
+            [(0, 0, "MATH", ["12A", "12B"]), (0, 1, "PHY", ["12A", "12C"]), (0, 2, "ENG", ["12A", "12C"])]
+        )
+        # Cells past `periods` never clash; the same rule as the solver's
+        self.assertEqual(len(find_clashes(data, periods=2)), 2)
+        scheduler = TimetableScheduler(data, 3)
+        self.assertEqual(
+            [(c["period"], c["subject"], c["classes"]) for c in find_clashes(data, 3)],
+            [(c["period"], c["subject"], c["classes"]) for c in scheduler.clash_groups(data)]
+        )
+
+        # Rao: MATH+PHY, Iyer: PHY. Each fits alone, but three classes need three teachers
+        resources = {"teachers": {"Rao": ["MATH", "PHY"], "Iyer": ["PHY"]}}
+        week = [{"12A": ["PHY"], "12B": ["PHY"]}, {"12A": ["PHY"], "12B": ["MATH"], "12C": ["PHY"]}]
+        clashes = find_clashes(week, 1, resources)
+        self.assertEqual([(c["day"], c["subject"], c["classes"], c["capacity"]) for c in clashes],
+                         [(1, "MATH+PHY", ["12A", "12B", "12C"], 2)])
+
+        # One teacher for A and B: A clashes, and Rao teaching three classes at once is a clash of its own
+        clashes = find_clashes({"X": ["A"], "Y": ["A"], "Z": ["B"]}, 1, {"teachers": {"Rao": ["A", "B"]}})
+        self.assertEqual([(c["subject"], c["classes"], c["excess"]) for c in clashes],
+                         [("A", ["X", "Y"], 1), ("A+B", ["X", "Y", "Z"], 1)])
+        self.assertEqual(clash_count(clashes), 2)
+
+    def test_capacity_table_hall_constraints(self):
+        # Rao: MATH+PHY, Iyer: PHY. PHY alone fits 2 classes, MATH 1, both together 2
+        table = CapacityTable(["MATH", "PHY", "ENG"], {"teachers": {"Rao": ["MATH", "PHY"], "Iyer": ["PHY"]}})
+        self.assertEqual(table.cap("MATH"), 1)
+        self.assertEqual(table.cap("PHY"), 2)
+        self.assertEqual(table.cap("ENG"), 1)
+        self.assertFalse(table.exclusive)
+
+        room = table.new_room()
+        table.take(room, "PHY")
+        table.take(room, "MATH")
+        self.assertFalse(table.fits(room, "PHY"))
+        self.assertTrue(table.fits(room, "ENG"))
+        self.assertTrue(CapacityTable(["MATH", "PHY"]).exclusive)
+
+    def test_weekly_split_levels_subjects(self):
+        quotas = {f"C{k}": {"MATH": 5, "PHY": 4, "PT": 2, "ENG": 3} for k in range(4)}
+        week = split_quotas(quotas, 5, 3, CapacityTable(["MATH", "PHY", "PT", "ENG"]))
+        self.assertEqual(len(week), 5)
+        for cls, counts in quotas.items():
+            lessons = [s for day in week for s in day[cls]]
+            self.assertEqual({s: lessons.count(s) for s in counts}, counts)
+            self.assertTrue(all(len(day[cls]) <= 3 for day in week))
+            # MATH every day, never twice on one day
+            self.assertTrue(all(day[cls].count("MATH") == 1 for day in week))
+        # 4 classes x 2 PT lessons over 5 days: no day has more than 2
+        self.assertLessEqual(max(sum(day[c].count("PT") for c in quotas) for day in week), 2)
+
+    def test_weekly_solve(self):
+        quotas = {
+            "12A": {"MATH": 6, "PHY": 6, "CHEM": 6, "ENG": 6},
+            "12B": {"MATH": 6, "PHY": 6, "CHEM": 6, "ENG": 6},
+            "11A": {"MATH": 6, "ACC": 6, "ECO": 6, "ENG": 6}
+        }
+        scheduler = WeeklyScheduler(quotas, 6, 4)
+        week = scheduler.solve()
+        self.assertEqual(len(week), 6)
+        self.assertEqual(scheduler.status, "solved")
+        for day in week:
+            for p in range(4):
+                subjects = [day[cls][p] for cls in quotas]
+                self.assertEqual(len(subjects), len(set(subjects)))
+
+    def test_weekly_infeasible(self):
+        scheduler = WeeklyScheduler({"12A": {"MATH": 9}, "12B": {"MATH": 1}}, 2, 4)
+        self.assertIsNone(scheduler.solve())
+        self.assertEqual(scheduler.status, "infeasible")
+        self.assertEqual(scheduler.conflicts[0]["class"], "12A")
+
+        self.assertIn("a week", scheduler.conflicts[0]["reason"])
+
+        # The weekly counts fit, but Rao can't teach both classes in the week's only period
+        scheduler = WeeklyScheduler({"12A": {"MATH": 1}, "12B": {"PHY": 1}}, 1, 1,
+                                    resources={"teachers": {"Rao": ["MATH", "PHY"]}})
+        self.assertIsNone(scheduler.solve())
+        self.assertEqual(scheduler.status, "infeasible")
+        self.assertIsNone(scheduler.failed_day)
+
+        with self.assertRaises(ValueError):
+            WeeklyScheduler({"12A": {"MATH": 1}}, 0, 4)
+
+    def test_weekly_resplits_unsolvable_day(self):
+        # The first split leaves a day that can't be solved; the week can
+        quotas = {"C0": {"D": 2}, "C1": {"A": 3, "D": 3}, "C2": {"B": 3, "E": 3}, "C3": {"E": 2, "A": 2}}
+        scheduler = WeeklyScheduler(quotas, 3, 3)
+        week = scheduler.solve()
+        self.assertEqual(scheduler.status, "solved")
+        for cls, counts in quotas.items():
+            lessons = [s for day in week for s in day[cls]]
+            self.assertEqual({s: lessons.count(s) for s in counts}, counts)
+            self.assertTrue(all(len(day[cls]) <= 3 for day in week))
+        self.assertEqual(find_clashes(week), [])
+
+    def test_optimizer_delta_matches_full_score(self):
+        schedule = {"12A": ["MATH", "PHY", "PHY", "CHEM", "PT", "MATH"], "12B": ["ENG", "MATH", "CHEM", "PHY"]}
+        soft = {"spread": 1.5, "heavy": ["MATH", "PHY", "CHEM"], "max_heavy_run": 2,
+                "avoid": [{"subject": "MATH", "periods": [4, 5], "weight": 2}]}
+        optimizer = ScheduleOptimizer(schedule, 6, soft)
+        for cls, p, q in [("12A", 0, 4), ("12A", 1, 2), ("12A", 3, 5), ("12B", 0, 3), ("12A", 0, 1)]:
+            before = optimizer.score()["score"]
+            change = optimizer.delta(cls, p, q)
+            optimizer._apply(cls, p, q)
+            self.assertAlmostEqual(optimizer.score()["score"] - before, change)
+
+    def test_optimizer_improves_valid_schedule(self):
+        data = {f"C{k}": ["MATH", "MATH", "PHY", "PHY", "CHEM", "ENG", "PT", "LIB"] for k in range(4)}
+        scheduler = TimetableScheduler(data, 8, seed=3)
+        schedule = scheduler.solve()
+        soft = {"spread": 1, "heavy": ["MATH", "PHY", "CHEM"], "max_heavy_run": 1, "heavy_weight": 2}
+        optimizer = ScheduleOptimizer(schedule, 8, soft, seed=3)
+        optimized = optimizer.optimize(0.3)
+
+        self.assertTrue(scheduler._is_valid_schedule(optimized))
+        for cls in data:
+            self.assertEqual(sorted(optimized[cls]), sorted(data[cls]))
+        self.assertLess(optimizer.stats["score"], optimizer.stats["initial_score"])
+        self.assertEqual(optimizer.stats["breakdown"]["spread"], 0)
 
 if __name__ == '__main__':
     unittest.main()
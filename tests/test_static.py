@@ -0,0 +1,58 @@
+import gzip
+import os
+import tempfile
+import unittest
+from api.static import StaticManifest, preferred_encodings
+
+class TestStaticManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "assets"))
+        self.script = b"console.log('timetable');\n" * 200
+        with open(os.path.join(self.tmp.name, "index.html"), "wb") as f:
+            f.write(b"<!doctype html><div id=root></div>")
+        with open(os.path.join(self.tmp.name, "assets", "index-3f2a1b.js"), "wb") as f:
+            f.write(self.script)
+        self.manifest = StaticManifest(self.tmp.name)
+        self.manifest.load()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hashed_asset_is_compressed_and_immutable(self):
+        response = self.manifest.respond("assets/index-3f2a1b.js", accept_encoding="gzip, deflate")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertIn("immutable", response.headers["cache-control"])
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.body), self.script)
+
+        plain = self.manifest.respond("assets/index-3f2a1b.js")
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(plain.body, self.script)
+        self.assertNotEqual(plain.headers["etag"], response.headers["etag"])
+
+    def test_index_revalidates_with_etag(self):
+        first = self.manifest.respond("")
+        self.assertEqual(first.headers["cache-control"], "no-cache")
+        again = self.manifest.respond("", if_none_match=first.headers["etag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.body, b"")
+
+    def test_spa_fallback_but_not_for_missing_assets(self):
+        route = self.manifest.respond("timetables/12A")
+        self.assertEqual(route.status_code, 200)
+        self.assertIn(b"id=root", route.body)
+        self.assertEqual(self.manifest.respond("assets/gone-000000.js").status_code, 404)
+
+    def test_missing_build(self):
+        manifest = StaticManifest(os.path.join(self.tmp.name, "nope"))
+        self.assertEqual(manifest.respond("").status_code, 404)
+
+    def test_preferred_encodings(self):
+        self.assertEqual(preferred_encodings("gzip, br"), ["br", "gzip"])
+        self.assertEqual(preferred_encodings("br;q=0, gzip;q=0.5"), ["gzip"])
+        self.assertEqual(preferred_encodings(None), [])
+
+if __name__ == '__main__':
+    unittest.main()
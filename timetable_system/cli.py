@@ -0,0 +1,274 @@
+"""
+Non-interactive commands, for scripts and cron jobs.
+
+    python run.py generate specs.json [more.json ...]   # or - for stdin
+    python run.py import backup.ndjson
+    python run.py export --format csv -o timetables.csv
+    python run.py list
+    python run.py validate --invalid-only
+
+A spec is {"classes": {class: [subjects]}, "periods": n, "engine": ...,
+"save_as": name}, the same shape as a POST /generate/batch item. Spec
+files hold one JSON object, a JSON array of them, {"items": [...]} or
+NDJSON (one per line). generate solves all specs across the process pool
+(TT_SOLVE_WORKERS), prints one NDJSON result per spec as it finishes and
+saves specs with save_as in bulk. import takes what export --format
+ndjson writes (or a JSON array of {"name", "entries", "periods"}), and
+rejects timetables whose cells clash unless TT_VALIDATE_ON_SAVE=0.
+validate checks every stored timetable, one NDJSON report line each.
+Results go to stdout, the summary to stderr. The exit status is 0 when
+every item succeeded, 1 when some failed and 2 for unusable input.
+"""
+import argparse
+import json
+import sys
+from timetable_system.config import CLI_SAVE_BATCH_SIZE, EXPORT_BATCH_SIZE, VALIDATE_ON_SAVE
+
+COMMANDS = ("generate", "import", "export", "list", "validate")
+
+def read_documents(path: str):
+    """JSON objects in a file ('-' for stdin): one object, an array, {"items": [...]} or NDJSON."""
+    stream = sys.stdin if path == "-" else open(path)
+    try:
+        first = stream.readline()
+        try:
+            doc = json.loads(first) if first.strip() else None
+        except json.JSONDecodeError:
+            doc = None
+        if isinstance(doc, dict) and "items" not in doc:
+            # NDJSON: stream the rest line by line
+            yield doc
+            for n, line in enumerate(stream, start=2):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"{path}:{n}: invalid JSON ({e.msg}).")
+            return
+        try:
+            whole = json.loads(first + stream.read())
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: invalid JSON ({e.msg} at line {e.lineno}).")
+        if isinstance(whole, dict):
+            whole = whole.get("items", [whole])
+        if not isinstance(whole, list):
+            raise ValueError(f"{path}: expected a JSON object or array.")
+        yield from whole
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def parse_spec(doc, where: str) -> dict:
+    from timetable_system.services.scheduler import ENGINES
+
+    if not isinstance(doc, dict):
+        raise ValueError(f"{where}: expected a JSON object.")
+    classes, periods, engine = doc.get("classes"), doc.get("periods"), doc.get("engine")
+    if not isinstance(classes, dict) or not all(isinstance(row, list) for row in classes.values()):
+        raise ValueError(f"{where}: 'classes' must map class names to lists of subjects.")
+    if not isinstance(periods, int) or isinstance(periods, bool) or periods < 1:
+        raise ValueError(f"{where}: 'periods' must be a positive integer.")
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"{where}: unknown engine '{engine}'. Must be one of: {', '.join(ENGINES)}")
+    return {"classes": classes, "periods": periods, "engine": engine, "save_as": doc.get("save_as")}
+
+def _write(out, obj: dict):
+    out.write(json.dumps(obj, separators=(",", ":")) + "\n")
+
+def _session():
+    from timetable_system.models import ensure_schema, SessionLocal
+    ensure_schema()
+    return SessionLocal()
+
+def _resources(db):
+    """The stored resource model, or None when it is empty."""
+    from timetable_system.repositories import ResourceManager
+    from timetable_system.services.resources import resources_fingerprint
+
+    resources = ResourceManager(db).get_resources()
+    return resources if resources_fingerprint(resources) else None
+
+def _save(tm, pending: list, out) -> int:
+    """Saves [(index, create_timetables item)] in one transaction; returns the number that failed."""
+    try:
+        results = tm.create_timetables([item for _, item in pending])
+    except ValueError as e:
+        _write(out, {"saved": [], "error": str(e)})
+        return len(pending)
+    _write(out, {"saved": [dict(result, index=index) for (index, _), result in zip(pending, results)]})
+    return sum(result["error"] is not None for result in results)
+
+def cmd_generate(args, out) -> int:
+    from timetable_system.repositories import TimetableManager
+    from timetable_system.services.batch import solve_batch
+    from timetable_system.services.parallel import shutdown_pool
+
+    specs = [
+        parse_spec(doc, f"{path} item {n}")
+        for path in args.specs for n, doc in enumerate(read_documents(path), start=1)
+    ]
+    db = _session()
+    try:
+        tm = TimetableManager(db)
+        resources = _resources(db)
+
+        solved = failed = save_failed = 0
+        pending = []
+        for result in solve_batch(specs, timeout=args.timeout, resources=resources):
+            spec = specs[result["index"]]
+            result["save_as"] = spec["save_as"]
+            _write(out, result)
+            if result["schedule"] is None:
+                failed += 1
+                continue
+            solved += 1
+            if spec["save_as"] and not args.dry_run:
+                pending.append((result["index"], {"name": spec["save_as"], "entries": result["schedule"],
+                                                  "periods": spec["periods"]}))
+                if len(pending) >= CLI_SAVE_BATCH_SIZE:
+                    save_failed += _save(tm, pending, out)
+                    pending = []
+        if pending:
+            save_failed += _save(tm, pending, out)
+    finally:
+        db.close()
+        shutdown_pool()
+
+    print(f"Solved {solved} of {len(specs)} spec(s); {failed} failed, {save_failed} not saved.", file=sys.stderr)
+    return 1 if failed or save_failed else 0
+
+def cmd_import(args, out) -> int:
+    from timetable_system.repositories import TimetableManager
+    from timetable_system.services.validator import find_clashes
+
+    db = _session()
+    imported = failed = 0
+    try:
+        tm = TimetableManager(db)
+        resources = _resources(db)
+        batch = []
+
+        def flush():
+            nonlocal imported, failed
+            for result in tm.create_timetables(batch):
+                if result["error"] is None:
+                    imported += 1
+                else:
+                    failed += 1
+                    print(f"{result['name']}: {result['error']}", file=sys.stderr)
+            batch.clear()
+
+        for path in args.files:
+            for n, doc in enumerate(read_documents(path), start=1):
+                if not isinstance(doc, dict) or not {"name", "entries", "periods"} <= doc.keys():
+                    raise ValueError(f"{path} item {n}: expected an object with name, entries and periods.")
+                clashes = find_clashes(doc["entries"], doc["periods"], resources) if VALIDATE_ON_SAVE else []
+                if clashes:
+                    failed += 1
+                    print(f"{doc['name']}: {' '.join(c['reason'] for c in clashes)}", file=sys.stderr)
+                    continue
+                batch.append({"name": doc["name"], "entries": doc["entries"], "periods": doc["periods"]})
+                if len(batch) >= CLI_SAVE_BATCH_SIZE:
+                    flush()
+        if batch:
+            flush()
+    finally:
+        db.close()
+
+    print(f"Imported {imported} timetable(s); {failed} failed.", file=sys.stderr)
+    return 1 if failed else 0
+
+def cmd_export(args, out) -> int:
+    from timetable_system.repositories import TimetableManager
+    from timetable_system.services.export import export_lines
+
+    db = _session()
+    try:
+        for chunk in export_lines(TimetableManager(db), args.format, after_id=args.after_id):
+            out.write(chunk)
+    finally:
+        db.close()
+    return 0
+
+def cmd_list(args, out) -> int:
+    from timetable_system.repositories import TimetableManager
+
+    db = _session()
+    try:
+        tm = TimetableManager(db)
+        after_id = None
+        while True:
+            page = tm.list_timetables(limit=EXPORT_BATCH_SIZE, after_id=after_id)
+            for t in page:
+                created_at = t.created_at.isoformat() if t.created_at else None
+                if args.json:
+                    _write(out, {"id": t.id, "name": t.name, "created_at": created_at, "days": t.days})
+                else:
+                    out.write(f"{t.id}\t{t.name}\t{created_at}\t{t.days}\n")
+            if len(page) < EXPORT_BATCH_SIZE:
+                break
+            after_id = page[-1].id
+    finally:
+        db.close()
+    return 0
+
+def cmd_validate(args, out) -> int:
+    from timetable_system.repositories import TimetableManager
+    from timetable_system.services.validator import validation_report
+
+    db = _session()
+    try:
+        for line in validation_report(TimetableManager(db), _resources(db), after_id=args.after_id,
+                                      invalid_only=args.invalid_only):
+            _write(out, line)
+    finally:
+        db.close()
+
+    print(f"Checked {line['checked']} timetable(s); {line['invalid']} with clashes.", file=sys.stderr)
+    return 1 if line["invalid"] else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="run.py", description="Timetable commands without prompts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    generate = sub.add_parser("generate", help="Solve specs and save those with save_as")
+    generate.add_argument("specs", nargs="+", help="Spec files (- for stdin)")
+    generate.add_argument("--timeout", type=float, default=None,
+                          help="Seconds per spec, from when a worker starts it (default: TT_SOLVE_TIMEOUT)")
+    generate.add_argument("--dry-run", action="store_true", help="Solve and print, but save nothing")
+
+    importer = sub.add_parser("import", help="Save timetables from export files")
+    importer.add_argument("files", nargs="+", help="NDJSON or JSON files (- for stdin)")
+
+    export = sub.add_parser("export", help="Stream every saved timetable")
+    export.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    export.add_argument("--after-id", type=int, default=None, help="Resume after this timetable id")
+
+    listing = sub.add_parser("list", help="Saved timetables: id, name, created_at, days")
+    listing.add_argument("--json", action="store_true", help="NDJSON instead of tab-separated lines")
+
+    validate = sub.add_parser("validate", help="Check every saved timetable for clashes")
+    validate.add_argument("--invalid-only", action="store_true", help="Report only timetables with clashes")
+    validate.add_argument("--after-id", type=int, default=None, help="Resume after this timetable id")
+
+    for command in (generate, importer, export, listing, validate):
+        command.add_argument("-o", "--output", default="-", help="File to write (default: stdout)")
+    return parser
+
+HANDLERS = {"generate": cmd_generate, "import": cmd_import, "export": cmd_export, "list": cmd_list,
+            "validate": cmd_validate}
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        return HANDLERS[args.command](args, out)
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,85 @@ import os
 
 # Database Path
 DB_PATH = os.path.join(os.getcwd(), "timetable.db")
-DB_URL = f"sqlite:///{DB_PATH}"
+# Any SQLAlchemy URL; non-SQLite databases need their driver installed
+DB_URL = os.environ.get("TT_DB_URL", f"sqlite:///{DB_PATH}")
+
+# How new timetables store their cells: "rows" (one timetable_entries row
+# per cell) or "grid" (dictionary-encoded blob on the timetables row).
+# find_classes/subject_load use indexes on rows only; they decode every
+# grid timetable per query, so they scale with how many are stored as grids.
+STORAGE_FORMAT = os.environ.get("TT_STORAGE_FORMAT", "rows")
+
+# Reject saved timetables (POST/PUT /timetables, bulk import) whose cells clash
+VALIDATE_ON_SAVE = os.environ.get("TT_VALIDATE_ON_SAVE", "1") == "1"
+
+# Timetable history: every Nth revision is stored in full, the others as changed cells only
+REVISION_SNAPSHOT_EVERY = int(os.environ.get("TT_REVISION_SNAPSHOT_EVERY", 10))
+
+# Connection pool (per process)
+DB_POOL_SIZE = int(os.environ.get("TT_DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("TT_DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = 30 # Seconds to wait for a free connection
+DB_POOL_RECYCLE = 1800 # Seconds before a connection is replaced
+
+# SQLite pragmas applied on every new connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("TT_SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = 20000
 
 # Global Config
 MAX_ATTEMPTS = 500
+RANDOM_BATCH_SIZE = 1024 # Candidates clash-checked per NumPy batch by the random engine
+MAX_REPAIR_STEPS = 10000 # Min-conflicts moves before repair falls back to a full solve
+
+# Resource model: teachers sharing subjects are checked exactly (every subject
+# subset) for groups up to this size, by per-subject and whole-group bounds above it
+HALL_EXACT_MAX_SUBJECTS = 8
+RESOURCE_CACHE_TTL = float(os.environ.get("TT_RESOURCE_CACHE_TTL", 60)) # Seconds other workers may use a stale model
+
+# Time-budgeted (best-effort) solving
+MAX_TIME_BUDGET = float(os.environ.get("TT_MAX_TIME_BUDGET", 60)) # Largest time_budget a request may ask for, seconds
+EXACT_BUDGET_SHARE = 0.5 # Share of the budget the exact engine gets before local search takes over
+
+# Soft-constraint optimization after a solve (GenerateRequest.soft)
+OPTIMIZE_BUDGET = float(os.environ.get("TT_OPTIMIZE_BUDGET", 1)) # Default seconds of annealing, capped by TT_MAX_TIME_BUDGET
+
+# Parallel (portfolio) solving: seeded searches raced across processes
+SOLVE_WORKERS = int(os.environ.get("TT_SOLVE_WORKERS", os.cpu_count() or 1))
+SOLVE_TIMEOUT = float(os.environ.get("TT_SOLVE_TIMEOUT", 30)) # Seconds
+
+# Solver engine used when none is requested: "backtracking" or "random" (legacy)
+SOLVER_ENGINE = os.environ.get("TT_SOLVER_ENGINE", "backtracking")
+
+# POST /generate/batch
+BATCH_MAX_ITEMS = 1000
+
+# Weekly timetables (POST /generate/week)
+MAX_DAYS = 7
+
+# Background solve jobs (POST /jobs)
+JOB_WORKERS = int(os.environ.get("TT_JOB_WORKERS", os.cpu_count() or 1))
+JOB_QUEUE_DEPTH = int(os.environ.get("TT_JOB_QUEUE_DEPTH", 64)) # Queued + running jobs before 429
+JOB_RESULT_TTL = 3600 # Seconds a finished job stays pollable
+
+# /generate result cache
+CACHE_SIZE = 1024 # Entries kept in memory (LRU)
+CACHE_TTL = float(os.environ.get("TT_CACHE_TTL", 3600)) # Seconds
+CACHE_PERSIST = os.environ.get("TT_CACHE_PERSIST", "0") == "1" # Also store entries in the database
+
+# GET /timetables/{name} in-process response cache
+READ_CACHE_MAX_BYTES = 32 * 1024 * 1024
+READ_CACHE_TTL = float(os.environ.get("TT_READ_CACHE_TTL", 60)) # Bounds staleness across workers
+
+# Rows fetched per round trip while streaming /export
+EXPORT_BATCH_SIZE = 1000
+
+# Timetables saved per transaction by the non-interactive CLI (generate, import)
+CLI_SAVE_BATCH_SIZE = 500
+
+# Built frontend served by the catch-all route, held in memory
+STATIC_DIR = os.environ.get("TT_STATIC_DIR", "web/dist")
+STATIC_COMPRESS_MIN_BYTES = 1024 # Smaller files are served uncompressed
+
+# GET /timetables pagination
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
@@ -0,0 +1,15 @@
+"""
+Alias for `python run.py export`, kept for existing scripts:
+
+    python -m timetable_system.export --format csv --after-id 1200 -o rest.csv
+
+takes the same flags (see timetable_system.cli).
+"""
+import sys
+from timetable_system.cli import main as cli_main
+
+def main(argv=None) -> int:
+    return cli_main(["export", *(sys.argv[1:] if argv is None else argv)])
+
+if __name__ == "__main__":
+    sys.exit(main())
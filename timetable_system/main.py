@@ -1,9 +1,12 @@
 import sys
-from timetable_system.models import init_db, SessionLocal
+from timetable_system.models import ensure_schema, SessionLocal
 from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.repositories.resource_manager import ResourceManager
 from timetable_system.services.scheduler import TimetableScheduler
+from timetable_system.services.parallel import ParallelScheduler, shutdown_pool
 from timetable_system.services.input_service import InputService
 from timetable_system.utils.logger import logger
+from timetable_system.cli import COMMANDS, main as cli_main
 
 def collect_class_subjects(class_name: str, allowed_subjects: list, periods: int) -> list:
     print(f"\n--- Entering subjects for {class_name} ---")
@@ -21,7 +24,7 @@ def collect_class_subjects(class_name: str, allowed_subjects: list, periods: int
         
     return result
 
-def create_timetable_flow(tm: TimetableManager):
+def create_timetable_flow(tm: TimetableManager, parallel: bool = False):
     periods = InputService.get_valid_int("Total periods per day > ", min_val=1, max_val=12)
     
     sci_subjects = ["MATH", "PHY", "CHEM", "BIO", "ENG", "CS", "PT", "LIB"]
@@ -40,7 +43,11 @@ def create_timetable_flow(tm: TimetableManager):
         data[cls] = collect_class_subjects(cls, subjects, periods)
         
     logger.info("Generating timetable...")
-    scheduler = TimetableScheduler(data, periods)
+    resources = ResourceManager(tm.db).get_resources()
+    if parallel:
+        scheduler = ParallelScheduler(data, periods, resources=resources)
+    else:
+        scheduler = TimetableScheduler(data, periods, resources=resources)
     schedule = scheduler.solve()
     
     if schedule:
@@ -72,7 +79,7 @@ def list_timetables_flow(tm: TimetableManager):
 
 def view_timetable_flow(tm: TimetableManager):
     name = input("Enter timetable name to view > ")
-    t = tm.get_timetable_by_name(name)
+    t = tm.get_timetable_data(name)
     if not t:
         print("Timetable not found.")
         return
@@ -80,27 +87,30 @@ def view_timetable_flow(tm: TimetableManager):
     # Organize by period
     # We need to reconstruct the grid. 
     # Logic: Find max period, then iterate.
-    if not t.entries:
+    if not t["entries"]:
         print("Empty timetable.")
         return
 
-    max_period = max(e.period_index for e in t.entries)
-    classes = sorted(list(set(e.class_name for e in t.entries)))
-    
-    print(f"\n--- Timetable: {t.name} ---")
-    header = f"{'Period':<8} | " + " | ".join([f"{c:<8}" for c in classes])
-    print(header)
-    print("-" * len(header))
+    max_period = max(e["period_index"] for e in t["entries"])
+    # Entries come back ordered by day, class, then period
+    classes = list(dict.fromkeys(e["class_name"] for e in t["entries"]))
     
-    grid = {p: {c: "" for c in classes} for p in range(max_period + 1)}
-    for entry in t.entries:
-        grid[entry.period_index][entry.class_name] = entry.subject
+    print(f"\n--- Timetable: {t['name']} ---")
+    grid = {(d, p): {c: "" for c in classes} for d in range(t["days"]) for p in range(max_period + 1)}
+    for entry in t["entries"]:
+        grid[(entry["day_index"], entry["period_index"])][entry["class_name"]] = entry["subject"]
         
-    for p in range(max_period + 1):
-        row = f"{p+1:<8} | "
-        for c in classes:
-            row += f"{grid[p][c]:<8} | "
-        print(row)
+    for d in range(t["days"]):
+        if t["days"] > 1:
+            print(f"\nDay {d+1}")
+        header = f"{'Period':<8} | " + " | ".join([f"{c:<8}" for c in classes])
+        print(header)
+        print("-" * len(header))
+        for p in range(max_period + 1):
+            row = f"{p+1:<8} | "
+            for c in classes:
+                row += f"{grid[(d, p)][c]:<8} | "
+            print(row)
 
 def delete_timetable_flow(tm: TimetableManager):
     name = input("Enter timetable name to delete > ")
@@ -109,8 +119,14 @@ def delete_timetable_flow(tm: TimetableManager):
     else:
         logger.error("Timetable not found.")
 
-def main():
-    init_db()
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        # generate/import/export/list run without prompts (see timetable_system.cli)
+        sys.exit(cli_main(argv))
+    # --parallel: race seeded solver runs across SOLVE_WORKERS processes
+    parallel = "--parallel" in argv
+    ensure_schema()
     db = SessionLocal()
     tm = TimetableManager(db)
     
@@ -125,7 +141,7 @@ def main():
         choice = input("Select option > ")
         
         if choice == "1":
-            create_timetable_flow(tm)
+            create_timetable_flow(tm, parallel)
         elif choice == "2":
             list_timetables_flow(tm)
         elif choice == "3":
@@ -134,6 +150,7 @@ def main():
             delete_timetable_flow(tm)
         elif choice == "5":
             print("Exiting...")
+            shutdown_pool()
             break
         else:
             print("Invalid option.")
@@ -0,0 +1,26 @@
+"""
+Convert stored timetables between storage formats.
+
+    python -m timetable_system.migrate_storage grid   # row-per-cell -> compact grid
+    python -m timetable_system.migrate_storage rows   # back to row-per-cell
+"""
+import sys
+from timetable_system.models import ensure_schema, SessionLocal
+from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.utils.logger import logger
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in ("rows", "grid"):
+        print(__doc__.strip())
+        sys.exit(2)
+
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        converted = TimetableManager(db).convert_storage(sys.argv[1])
+        logger.info(f"Converted {converted} timetable(s) to '{sys.argv[1]}' storage.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
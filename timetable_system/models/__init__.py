@@ -1,10 +1,82 @@
-from sqlalchemy import create_engine
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import sessionmaker
-from timetable_system.config import DB_URL
-from .timetable import Base, Timetable, TimetableEntry
+from timetable_system.utils.metrics import instrument_engine
+from .engine import create_db_engine
+from .timetable import Base, Timetable, TimetableEntry, TimetableRevision
+from .cache import SolveCacheEntry
+from .resources import Teacher, TeacherSubject, SubjectCapacity
 
-engine = create_engine(DB_URL)
+engine = create_db_engine()
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_schema_verified = False
+
+# Indexes superseded by wider ones (day_index); dropped from existing databases
+RETIRED_INDEXES = ("ix_entries_timetable_class_period", "ix_entries_subject_period")
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    # create_all skips indexes of tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    _drop_retired_indexes()
+
+def missing_schema() -> list:
+    """Names of tables, columns and indexes the models expect but the database lacks."""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            missing.append(table.name)
+            continue
+        columns = {col["name"] for col in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{col.name}" for col in table.columns if col.name not in columns)
+        indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        missing.extend(index.name for index in table.indexes if index.name not in indexes)
+    return missing
+
+def _add_missing_columns():
+    """Schema migration for columns added after a table was created (nullable or with a server default)."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            columns = {col["name"] for col in inspector.get_columns(table.name)}
+            for col in table.columns:
+                if col.name not in columns:
+                    col_type = col.type.compile(dialect=engine.dialect)
+                    ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"
+                    if col.server_default is not None:
+                        ddl += f" DEFAULT {col.server_default.arg}"
+                    if not col.nullable:
+                        ddl += " NOT NULL"
+                    conn.execute(text(ddl))
+
+def _drop_retired_indexes():
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in inspector.get_indexes(table.name):
+                if index["name"] in RETIRED_INDEXES:
+                    conn.execute(text(f"DROP INDEX {index['name']}"))
+
+def ensure_schema():
+    """
+    Verify the schema once per process with read-only inspection and only
+    run DDL when something is missing. Safe when several workers start at
+    once: a worker that loses the CREATE race just re-verifies.
+    """
+    global _schema_verified
+    if _schema_verified:
+        return
+    if missing_schema():
+        try:
+            init_db()
+        except (OperationalError, ProgrammingError):
+            if missing_schema():
+                raise
+    _schema_verified = True
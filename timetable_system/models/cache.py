@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Text, DateTime
+from datetime import datetime
+from .timetable import Base
+
+class SolveCacheEntry(Base):
+    __tablename__ = 'solve_cache'
+
+    key = Column(String(64), primary_key=True) # sha256 of the canonical request
+    schedule = Column(Text, nullable=True)     # JSON rows in canonical class order; NULL = unsatisfiable
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SolveCacheEntry({self.key[:12]})>"
@@ -0,0 +1,35 @@
+# A change is [day, class, period, subject]; subject None removes the cell
+# (only ever at the end of a row, as rows have no gaps)
+
+def cell_changes(old: list, new: list):
+    """Yields (day, class, period, before, after) for every cell that differs between two weeks."""
+    for day in range(max(len(old), len(new))):
+        before = old[day] if day < len(old) else {}
+        after = new[day] if day < len(new) else {}
+        for cls in sorted(set(before) | set(after)):
+            o, n = before.get(cls, []), after.get(cls, [])
+            for i in range(max(len(o), len(n))):
+                a = o[i] if i < len(o) else None
+                b = n[i] if i < len(n) else None
+                if a != b:
+                    yield day, cls, i, a, b
+
+def week_changes(old: list, new: list) -> list:
+    """The changes turning `old` into `new` (both one {class: [subjects]} per day)."""
+    return [[day, cls, i, after] for day, cls, i, _, after in cell_changes(old, new)]
+
+def apply_changes(week: list, changes: list, days: int) -> list:
+    """A new week: `week` with `changes` applied, cut or padded to `days` days."""
+    week = [{cls: list(row) for cls, row in schedule.items()} for schedule in week[:days]]
+    week.extend({} for _ in range(days - len(week)))
+    for day, cls, i, subject in changes:
+        if day >= days:
+            continue
+        row = week[day].setdefault(cls, [])
+        if subject is None:
+            del row[i:]
+        elif i < len(row):
+            row[i] = subject
+        else:
+            row.append(subject)
+    return week
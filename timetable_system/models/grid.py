@@ -0,0 +1,60 @@
+import json
+import sys
+from array import array
+
+# Cell code 0 marks an empty cell (a class with fewer subjects than periods)
+EMPTY = 0
+
+def encode_grid(schedule: dict, periods: int) -> dict:
+    """
+    Dictionary-encode a schedule for the compact storage format.
+    Returns the Timetable column values: class_names and subject_names as
+    JSON lists, and grid as a classes x periods blob of subject codes
+    (1 byte per cell when there are fewer than 256 subjects, else 2).
+    """
+    return encode_week([schedule], periods)
+
+def encode_week(week: list, periods: int) -> dict:
+    """encode_grid for a weekly timetable (one schedule per day): a days x classes x periods blob."""
+    classes = sorted(set().union(*week))
+    subject_ids = {}
+    codes = []
+    for schedule in week:
+        for cls in classes:
+            row = schedule.get(cls, [])[:periods]
+            codes.extend(subject_ids.setdefault(s, len(subject_ids) + 1) for s in row)
+            codes.extend([EMPTY] * (periods - len(row)))
+
+    cells = array("B" if len(subject_ids) < 256 else "H", codes)
+    if cells.itemsize > 1 and sys.byteorder == "big":
+        cells.byteswap() # Stored little-endian
+    return {
+        "class_names": json.dumps(classes),
+        "subject_names": json.dumps(list(subject_ids)),
+        "grid": cells.tobytes()
+    }
+
+def decode_grid(class_names: str, subject_names: str, periods: int, grid: bytes) -> dict:
+    """Inverse of encode_grid. Returns class -> [subjects], classes sorted by name."""
+    return decode_week(class_names, subject_names, periods, 1, grid)[0]
+
+def decode_week(class_names: str, subject_names: str, periods: int, days: int, grid: bytes) -> list:
+    """Inverse of encode_week. Returns one class -> [subjects] per day; every class appears each day."""
+    classes = json.loads(class_names)
+    subjects = [None] + json.loads(subject_names)
+    if not classes or not periods:
+        return [{cls: [] for cls in classes} for _ in range(days)]
+
+    cells = array("B" if len(grid) == days * len(classes) * periods else "H")
+    cells.frombytes(grid)
+    if cells.itemsize > 1 and sys.byteorder == "big":
+        cells.byteswap()
+
+    week = []
+    for day in range(days):
+        schedule = {}
+        for k, cls in enumerate(classes):
+            start = (day * len(classes) + k) * periods
+            schedule[cls] = [subjects[c] for c in cells[start:start + periods] if c != EMPTY]
+        week.append(schedule)
+    return week
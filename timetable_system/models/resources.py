@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import relationship
+from .timetable import Base
+
+class Teacher(Base):
+    __tablename__ = 'teachers'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True, nullable=False)
+
+    subjects = relationship("TeacherSubject", back_populates="teacher", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<Teacher(name='{self.name}')>"
+
+class TeacherSubject(Base):
+    __tablename__ = 'teacher_subjects'
+
+    teacher_id = Column(Integer, ForeignKey('teachers.id'), primary_key=True)
+    subject = Column(String(50), primary_key=True)
+
+    teacher = relationship("Teacher", back_populates="subjects")
+
+class SubjectCapacity(Base):
+    __tablename__ = 'subject_capacities'
+
+    subject = Column(String(50), primary_key=True) # Shared resource, e.g. LIB or PT
+    capacity = Column(Integer, nullable=False)     # Classes it can host per period
+
+    def __repr__(self):
+        return f"<SubjectCapacity({self.subject}: {self.capacity})>"
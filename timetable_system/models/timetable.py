@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, Text, LargeBinary
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 
@@ -10,9 +10,19 @@ class Timetable(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(50), unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    periods = Column(Integer, nullable=True) # NULL for timetables saved before it was recorded
+    days = Column(Integer, nullable=False, default=1, server_default="1") # > 1 for weekly timetables
+    revision = Column(Integer, nullable=False, default=1, server_default="1") # Number of the current revision
+
+    # Compact "grid" storage format (see models/grid.py); NULL when the cells
+    # live in timetable_entries instead
+    class_names = Column(Text, nullable=True)   # JSON list, position = class id
+    subject_names = Column(Text, nullable=True) # JSON list, position + 1 = cell code
+    grid = Column(LargeBinary, nullable=True)   # days x classes x periods cell codes
     
     # Relationship to entries
     entries = relationship("TimetableEntry", back_populates="timetable", cascade="all, delete-orphan")
+    revisions = relationship("TimetableRevision", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Timetable(name='{self.name}')>"
@@ -22,11 +32,45 @@ class TimetableEntry(Base):
 
     id = Column(Integer, primary_key=True)
     timetable_id = Column(Integer, ForeignKey('timetables.id'), nullable=False)
+    day_index = Column(Integer, nullable=False, default=0, server_default="0") # 0-indexed day of the week
     period_index = Column(Integer, nullable=False)  # 0-indexed period number
     class_name = Column(String(20), nullable=False) # e.g., "12B", "11A"
     subject = Column(String(50), nullable=False)
 
     timetable = relationship("Timetable", back_populates="entries")
 
+    __table_args__ = (
+        # Serves "entries of one timetable, ordered by day, class and period"
+        Index('ix_entries_timetable_day_class_period', 'timetable_id', 'day_index', 'class_name', 'period_index'),
+        # Serves "who has subject X (in period P)" and per-subject load; covering
+        Index('ix_entries_subject_period_day', 'subject', 'period_index', 'day_index', 'timetable_id', 'class_name'),
+    )
+
+    def __repr__(self):
+        return f"<Entry({self.class_name}, Day {self.day_index}, Period {self.period_index}: {self.subject})>"
+
+class TimetableRevision(Base):
+    """
+    History of an edited timetable; its current cells stay in the timetable
+    itself. Revision 1 is recorded on the first edit. A revision stores
+    either a full snapshot (revision 1, then every REVISION_SNAPSHOT_EVERY
+    revisions after the last one) or just the cells changed from revision
+    number - 1 (see models/delta.py).
+    """
+    __tablename__ = 'timetable_revisions'
+
+    id = Column(Integer, primary_key=True)
+    timetable_id = Column(Integer, ForeignKey('timetables.id'), nullable=False)
+    number = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    periods = Column(Integer, nullable=True)
+    days = Column(Integer, nullable=False)
+    snapshot = Column(Text, nullable=True) # JSON list of {class: [subjects]}, one per day
+    changes = Column(Text, nullable=True)  # JSON [[day, class, period, subject or null], ...]
+
+    __table_args__ = (
+        Index('ix_revisions_timetable_number', 'timetable_id', 'number', unique=True),
+    )
+
     def __repr__(self):
-        return f"<Entry({self.class_name}, Period {self.period_index}: {self.subject})>"
+        return f"<Revision({self.timetable_id} #{self.number})>"
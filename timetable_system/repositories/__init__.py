@@ -1 +1,2 @@
-from .timetable_manager import TimetableManager
+from .timetable_manager import TimetableManager, RevisionConflictError
+from .resource_manager import ResourceManager
@@ -0,0 +1,54 @@
+from sqlalchemy.orm import Session
+from timetable_system.models import Teacher, TeacherSubject, SubjectCapacity
+
+class ResourceManager:
+    """
+    The school's resource model: teachers with the subjects they teach, and
+    per-period capacities of shared resources. Shape:
+    { "teachers": {teacher: [subjects]}, "capacities": {subject: n} }
+    """
+    # Callables notified (no arguments) after the model is replaced
+    change_listeners = []
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_resources(self) -> dict:
+        teachers = {name: [] for (name,) in self.db.query(Teacher.name).order_by(Teacher.name)}
+        rows = (
+            self.db.query(Teacher.name, TeacherSubject.subject)
+            .join(TeacherSubject, TeacherSubject.teacher_id == Teacher.id)
+            .order_by(Teacher.name, TeacherSubject.subject)
+        )
+        for name, subject in rows:
+            teachers[name].append(subject)
+        capacities = dict(self.db.query(SubjectCapacity.subject, SubjectCapacity.capacity).order_by(SubjectCapacity.subject))
+        return {"teachers": teachers, "capacities": capacities}
+
+    def replace_resources(self, resources: dict) -> dict:
+        """Replace the whole model in one transaction. Raises ValueError if it is invalid."""
+        teachers = resources.get("teachers") or {}
+        capacities = resources.get("capacities") or {}
+        for subject, capacity in capacities.items():
+            if capacity < 1:
+                raise ValueError(f"Capacity of '{subject}' must be at least 1.")
+        for name, subjects in teachers.items():
+            if not name.strip():
+                raise ValueError("Teacher names cannot be empty.")
+            shared = [s for s in subjects if s in capacities]
+            if shared:
+                raise ValueError(
+                    f"Teacher '{name}' teaches {', '.join(shared)}, which is a shared resource with a fixed capacity."
+                )
+
+        self.db.query(TeacherSubject).delete()
+        self.db.query(Teacher).delete()
+        self.db.query(SubjectCapacity).delete()
+        for name, subjects in teachers.items():
+            self.db.add(Teacher(name=name, subjects=[TeacherSubject(subject=s) for s in sorted(set(subjects))]))
+        self.db.add_all(SubjectCapacity(subject=s, capacity=n) for s, n in capacities.items())
+        self.db.commit()
+
+        for listener in self.change_listeners:
+            listener()
+        return self.get_resources()
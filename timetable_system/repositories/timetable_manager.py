@@ -1,25 +1,258 @@
+import json
+from sqlalchemy import insert, func, select, bindparam, and_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from timetable_system.models import Timetable, TimetableEntry
+from timetable_system.config import STORAGE_FORMAT, REVISION_SNAPSHOT_EVERY
+from timetable_system.models import Timetable, TimetableEntry, TimetableRevision
+from timetable_system.models.grid import encode_week, decode_week
+from timetable_system.models.delta import cell_changes, week_changes, apply_changes
+
+# get_timetable_data's query, built once: constructing it costs more than running it
+_TIMETABLE_DATA = (
+    select(
+        Timetable.id, Timetable.name, Timetable.created_at, Timetable.periods, Timetable.days, Timetable.revision,
+        Timetable.class_names, Timetable.subject_names, Timetable.grid,
+        TimetableEntry.day_index, TimetableEntry.period_index, TimetableEntry.class_name, TimetableEntry.subject
+    )
+    .outerjoin(TimetableEntry, TimetableEntry.timetable_id == Timetable.id)
+    .where(Timetable.name == bindparam("name"))
+    .order_by(TimetableEntry.day_index, TimetableEntry.class_name, TimetableEntry.period_index)
+)
+
+# One entry row, for writing a revision's changed cells (executemany)
+_entries = TimetableEntry.__table__
+_CELL = and_(
+    _entries.c.timetable_id == bindparam("t"), _entries.c.day_index == bindparam("d"),
+    _entries.c.class_name == bindparam("c"), _entries.c.period_index == bindparam("p")
+)
+_UPDATE_CELL = _entries.update().where(_CELL).values(subject=bindparam("s"))
+_DELETE_CELL = _entries.delete().where(_CELL)
+
+class RevisionConflictError(ValueError):
+    """The timetable moved past the revision an edit was based on."""
 
 class TimetableManager:
-    def __init__(self, db: Session):
+    # Callables notified with a timetable name after it is created, edited or deleted
+    change_listeners = []
+
+    def __init__(self, db: Session, storage_format: str = None, snapshot_every: int = None):
         self.db = db
+        # Format for new timetables; reads handle both
+        self.storage_format = storage_format or STORAGE_FORMAT
+        # Revisions per full snapshot for new edits; reads find the snapshots wherever they are
+        self.snapshot_every = snapshot_every or REVISION_SNAPSHOT_EVERY
 
     def get_all_timetables(self):
-        """Retrieve all saved timetables."""
-        return self.db.query(Timetable).all()
+        """Retrieve all saved timetables (id, name, created_at, days only)."""
+        return self.list_timetables()
+
+    def list_timetables(self, limit: int = None, after_id: int = None):
+        """
+        Timetable headers ordered by id, without loading entries or ORM objects.
+        Keyset pagination: pass the last id of the previous page as after_id.
+        """
+        query = self.db.query(Timetable.id, Timetable.name, Timetable.created_at, Timetable.days).order_by(Timetable.id)
+        if after_id is not None:
+            query = query.filter(Timetable.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
 
     def get_timetable_by_name(self, name: str):
         """Retrieve a timetable by its unique name."""
         return self.db.query(Timetable).filter(Timetable.name == name).first()
 
-    def create_timetable(self, name: str, entries_data: dict, periods: int):
+    def get_timetable_data(self, name: str):
+        """
+        Retrieve a timetable and its entries in a single query, entries ordered
+        by day, class and period (in SQL for row storage).
+        Returns { "id", "name", "created_at", "days", "revision", "entries": [{day_index, period_index, class_name, subject}] } or None.
+        """
+        rows = self.db.execute(_TIMETABLE_DATA, {"name": name}).all()
+        if not rows:
+            return None
+
+        head = rows[0]
+        if head.grid is not None:
+            week = decode_week(head.class_names, head.subject_names, head.periods, head.days, head.grid)
+            entries = [
+                {"day_index": day, "period_index": i, "class_name": cls, "subject": subject}
+                for day, schedule in enumerate(week)
+                for cls, subjects in schedule.items()
+                for i, subject in enumerate(subjects)
+            ]
+        else:
+            # Positional unpacking of the trailing entry columns; much cheaper than attribute access per row
+            entries = [
+                {"day_index": day, "period_index": period, "class_name": cls, "subject": subject}
+                for day, period, cls, subject in (r[9:] for r in rows) if cls is not None
+            ]
+        return {"id": head.id, "name": head.name, "created_at": head.created_at, "days": head.days,
+                "revision": head.revision, "entries": entries}
+
+    def get_week_by_name(self, name: str):
+        """
+        Retrieve a saved timetable as one grid per day (a single-day timetable has one).
+        Returns [{ "12B": ["MATH", "PHY", ...], ... }, ...] or None if not found.
+        """
+        data = self.get_timetable_data(name)
+        if data is None:
+            return None
+
+        week = [{} for _ in range(data["days"])]
+        for entry in data["entries"]:
+            week[entry["day_index"]].setdefault(entry["class_name"], []).append(entry["subject"])
+        return self._fill_classes(week)
+
+    @staticmethod
+    def _fill_classes(week: list) -> list:
+        """Every class present on every day (with no lessons where it had none)."""
+        classes = set().union(*week)
+        for schedule in week:
+            for cls in classes:
+                schedule.setdefault(cls, [])
+        return week
+
+    def get_schedule_by_name(self, name: str):
+        """
+        Retrieve a saved single-day timetable as a grid.
+        Returns { "12B": ["MATH", "PHY", ...], ... } or None if not found.
+        Raises ValueError for a weekly timetable (see get_week_by_name).
+        """
+        week = self.get_week_by_name(name)
+        if week is None:
+            return None
+        if len(week) > 1:
+            raise ValueError(f"Timetable '{name}' spans {len(week)} days.")
+        return week[0]
+
+    def iter_timetables(self, after_id: int = None, batch_size: int = 1000):
+        """
+        Stream every timetable (id > after_id) in id order as
+        { "id", "name", "created_at", "periods", "entries": {class: [subjects]} },
+        entries being a list of those, one per day, for a weekly timetable.
+        Rows are fetched batch_size at a time from one cursor, so memory stays
+        at one timetable no matter how many are stored.
+        """
+        query = (
+            self.db.query(
+                Timetable.id, Timetable.name, Timetable.created_at, Timetable.periods, Timetable.days,
+                Timetable.class_names, Timetable.subject_names, Timetable.grid,
+                TimetableEntry.day_index, TimetableEntry.class_name, TimetableEntry.subject
+            )
+            .outerjoin(TimetableEntry, TimetableEntry.timetable_id == Timetable.id)
+            .order_by(Timetable.id, TimetableEntry.day_index, TimetableEntry.class_name, TimetableEntry.period_index)
+            .yield_per(batch_size)
+        )
+        if after_id is not None:
+            query = query.filter(Timetable.id > after_id)
+
+        current = None
+        for row in query:
+            if current is None or current["id"] != row.id:
+                if current is not None:
+                    yield self._finish_export(current)
+                current = {"id": row.id, "name": row.name, "created_at": row.created_at,
+                           "periods": row.periods, "entries": [{} for _ in range(row.days)]}
+                if row.grid is not None:
+                    current["entries"] = decode_week(row.class_names, row.subject_names, row.periods, row.days, row.grid)
+            if row.class_name is not None:
+                current["entries"][row.day_index].setdefault(row.class_name, []).append(row.subject)
+        if current is not None:
+            yield self._finish_export(current)
+
+    def _finish_export(self, timetable: dict) -> dict:
+        week = timetable["entries"]
+        if timetable["periods"] is None:
+            timetable["periods"] = max((len(row) for schedule in week for row in schedule.values()), default=0)
+        if len(week) == 1:
+            timetable["entries"] = week[0]
+        return timetable
+
+    def find_classes(self, subject: str, period_index: int = None, timetable: str = None, day_index: int = None) -> list:
+        """
+        Which classes have `subject` (in `period_index`, on `day_index`) across
+        all timetables, or just `timetable`. An index seek on (subject, period_index).
+        Returns [{ "timetable", "class_name", "day_index", "period_index" }] ordered by timetable, day, period, class.
+        """
+        query = (
+            self.db.query(Timetable.name, TimetableEntry.class_name, TimetableEntry.day_index, TimetableEntry.period_index)
+            .join(Timetable, Timetable.id == TimetableEntry.timetable_id)
+            .filter(TimetableEntry.subject == subject)
+        )
+        if period_index is not None:
+            query = query.filter(TimetableEntry.period_index == period_index)
+        if day_index is not None:
+            query = query.filter(TimetableEntry.day_index == day_index)
+        if timetable is not None:
+            query = query.filter(Timetable.name == timetable)
+
+        results = [
+            {"timetable": name, "class_name": class_name, "day_index": day, "period_index": period}
+            for name, class_name, day, period in query.all()
+        ]
+        for name, week in self._grid_schedules(timetable):
+            for day, schedule in enumerate(week):
+                if day_index not in (None, day):
+                    continue
+                for class_name, subjects in schedule.items():
+                    for period, s in enumerate(subjects):
+                        if s == subject and period_index in (None, period):
+                            results.append({"timetable": name, "class_name": class_name,
+                                            "day_index": day, "period_index": period})
+
+        results.sort(key=lambda r: (r["timetable"], r["day_index"], r["period_index"], r["class_name"]))
+        return results
+
+    def subject_load(self, timetable: str = None) -> list:
+        """
+        Number of classes taking each subject in each period of each day, aggregated in SQL.
+        Returns [{ "subject", "day_index", "period_index", "count" }] ordered by subject, day, period.
+        """
+        query = self.db.query(
+            TimetableEntry.subject, TimetableEntry.day_index, TimetableEntry.period_index, func.count().label("count")
+        )
+        if timetable is not None:
+            query = query.join(Timetable, Timetable.id == TimetableEntry.timetable_id).filter(Timetable.name == timetable)
+        load = {
+            (subject, day, period): count
+            for subject, day, period, count in query.group_by(
+                TimetableEntry.subject, TimetableEntry.period_index, TimetableEntry.day_index
+            )
+        }
+
+        for _, week in self._grid_schedules(timetable):
+            for day, schedule in enumerate(week):
+                for subjects in schedule.values():
+                    for period, subject in enumerate(subjects):
+                        load[(subject, day, period)] = load.get((subject, day, period), 0) + 1
+
+        return [
+            {"subject": subject, "day_index": day, "period_index": period, "count": count}
+            for (subject, day, period), count in sorted(load.items())
+        ]
+
+    def _grid_schedules(self, timetable: str = None):
+        """
+        Yields (name, week) for grid-format timetables, which have no entry
+        rows to query: each is decoded here, so cost grows with their number.
+        """
+        query = self.db.query(
+            Timetable.name, Timetable.class_names, Timetable.subject_names, Timetable.periods, Timetable.days,
+            Timetable.grid
+        ).filter(Timetable.grid.isnot(None))
+        if timetable is not None:
+            query = query.filter(Timetable.name == timetable)
+        for name, class_names, subject_names, periods, days, grid in query:
+            yield name, decode_week(class_names, subject_names, periods, days, grid)
+
+    def create_timetable(self, name: str, entries_data, periods: int):
         """
         Save a generated timetable.
-        entries_data format: { "12B": ["MATH", "PHY", ...], "12N": [...] }
+        entries_data format: { "12B": ["MATH", "PHY", ...], "12N": [...] },
+        or a list of those, one per day, for a weekly timetable.
         """
-        timetable = Timetable(name=name)
+        timetable = self._new_timetable(name, entries_data, periods)
         self.db.add(timetable)
         
         try:
@@ -28,25 +261,293 @@ class TimetableManager:
             self.db.rollback()
             raise ValueError(f"Timetable with name '{name}' already exists.")
 
-        for class_name, subjects in entries_data.items():
-            for i, subject in enumerate(subjects):
-                if i >= periods: break
-                entry = TimetableEntry(
-                    timetable_id=timetable.id,
-                    period_index=i,
-                    class_name=class_name,
-                    subject=subject
-                )
-                self.db.add(entry)
-        
+        if timetable.grid is None:
+            self._insert_entries(self._entry_rows(timetable.id, entries_data, periods))
         self.db.commit()
+        self._notify(name)
         return timetable
 
+    def create_timetables(self, items: list) -> list:
+        """
+        Import many timetables in one transaction.
+        items: [{ "name": ..., "entries": {...} or [{...}, ...], "periods": ... }, ...]
+        Returns one result per item, in order: { "name", "id", "error" }.
+        Name conflicts and invalid items fail only their own item.
+        """
+        names = [item["name"] for item in items]
+        taken = {
+            name for (name,) in
+            self.db.query(Timetable.name).filter(Timetable.name.in_(set(names)))
+        }
+
+        results, created = [], []
+        for item in items:
+            name = item["name"]
+            if name in taken:
+                results.append({"name": name, "id": None, "error": f"Timetable with name '{name}' already exists."})
+                continue
+            try:
+                timetable = self._new_timetable(name, item["entries"], item["periods"])
+            except ValueError as e:
+                results.append({"name": name, "id": None, "error": str(e)})
+                continue
+            taken.add(name)
+            self.db.add(timetable)
+            created.append((timetable, item))
+            results.append({"name": name, "id": None, "error": None})
+
+        try:
+            self.db.flush() # One round for all the new IDs
+        except IntegrityError:
+            # Lost a race with a concurrent writer; nothing was stored
+            self.db.rollback()
+            raise ValueError("A timetable name was taken while importing; retry the batch.")
+
+        rows = []
+        for timetable, item in created:
+            if timetable.grid is None:
+                rows.extend(self._entry_rows(timetable.id, item["entries"], item["periods"]))
+        self._insert_entries(rows)
+        self.db.commit()
+        for timetable, _ in created:
+            self._notify(timetable.name)
+
+        ids = {timetable.name: timetable.id for timetable, _ in created}
+        for result in results:
+            if result["error"] is None:
+                result["id"] = ids[result["name"]]
+        return results
+
+    def convert_storage(self, storage_format: str) -> int:
+        """
+        Migrate every stored timetable to `storage_format` ("rows" or "grid").
+        Each timetable is converted and committed on its own.
+        Returns the number of timetables converted.
+        """
+        if storage_format not in ("rows", "grid"):
+            raise ValueError(f"Unknown storage format '{storage_format}'.")
+        if storage_format == "grid":
+            pending = self.db.query(Timetable.name).filter(Timetable.grid.is_(None))
+        else:
+            pending = self.db.query(Timetable.name).filter(Timetable.grid.isnot(None))
+
+        converted = 0
+        for (name,) in pending.all():
+            week = self.get_week_by_name(name)
+            timetable = self.get_timetable_by_name(name)
+            periods = timetable.periods or max((len(row) for schedule in week for row in schedule.values()), default=0)
+            if storage_format == "grid":
+                self.db.query(TimetableEntry).filter(TimetableEntry.timetable_id == timetable.id).delete()
+                for column, value in encode_week(week, periods).items():
+                    setattr(timetable, column, value)
+            else:
+                timetable.class_names = timetable.subject_names = timetable.grid = None
+                self._insert_entries(self._entry_rows(timetable.id, week, periods))
+            timetable.periods = periods
+            self.db.commit()
+            converted += 1
+        return converted
+
+    def update_timetable(self, name: str, entries_data, periods: int, base_revision: int = None):
+        """
+        Save new contents for a timetable as its next revision (the first
+        edit also records the original as revision 1). The revision keeps
+        only the cells changed from its parent, or a full snapshot once
+        snapshot_every revisions have passed since the last one (counted
+        from the stored snapshots, so changing the setting is safe); row
+        storage rewrites only the
+        changed entry rows. If base_revision is given and is no longer the
+        current revision, raises RevisionConflictError and saves nothing.
+        Returns the new revision (see list_revisions), or None if not found.
+        """
+        timetable = self.get_timetable_by_name(name)
+        if timetable is None:
+            return None
+        if base_revision is not None and base_revision != timetable.revision:
+            raise RevisionConflictError(
+                f"Timetable '{name}' is at revision {timetable.revision}, not {base_revision}."
+            )
+
+        old = self.get_week_by_name(name)
+        new = [{cls: list(row[:periods]) for cls, row in schedule.items()} for schedule in self._as_week(entries_data)]
+        changes = week_changes(old, new)
+        if timetable.revision == 1:
+            self.db.add(TimetableRevision(
+                timetable_id=timetable.id, number=1, created_at=timetable.created_at,
+                periods=timetable.periods, days=timetable.days, snapshot=json.dumps(old)
+            ))
+            last_snapshot = 1
+        else:
+            last_snapshot = self._last_snapshot(timetable.id, timetable.revision)
+        revision = TimetableRevision(timetable_id=timetable.id, number=timetable.revision + 1,
+                                     periods=periods, days=len(new))
+        if revision.number - last_snapshot >= self.snapshot_every:
+            revision.snapshot = json.dumps(new)
+        else:
+            revision.changes = json.dumps(changes)
+        self.db.add(revision)
+
+        if timetable.grid is not None:
+            for column, value in encode_week(new, periods).items():
+                setattr(timetable, column, value)
+        else:
+            self._write_changes(timetable.id, old, changes)
+        timetable.periods, timetable.days, timetable.revision = periods, len(new), revision.number
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Another edit took this revision number first
+            self.db.rollback()
+            raise RevisionConflictError(f"Timetable '{name}' was changed concurrently; retry the edit.")
+        self._notify(name)
+        return {"number": revision.number, "created_at": revision.created_at, "periods": periods,
+                "days": revision.days, "snapshot": revision.snapshot is not None, "changes": len(changes)}
+
+    def _write_changes(self, timetable_id: int, old: list, changes: list):
+        """Applies a revision's changes to the entry rows, one executemany per kind of write."""
+        updates, deletes, inserts = [], [], []
+        for day, cls, period, subject in changes:
+            key = {"t": timetable_id, "d": day, "c": cls, "p": period}
+            if subject is None:
+                deletes.append(key)
+            elif day < len(old) and period < len(old[day].get(cls, ())):
+                updates.append(dict(key, s=subject))
+            else:
+                inserts.append({"timetable_id": timetable_id, "day_index": day, "period_index": period,
+                                "class_name": cls, "subject": subject})
+        if updates:
+            self.db.execute(_UPDATE_CELL, updates)
+        if deletes:
+            self.db.execute(_DELETE_CELL, deletes)
+        self._insert_entries(inserts)
+
+    def list_revisions(self, name: str):
+        """
+        A timetable's revisions, oldest first, without their cells:
+        [{ "number", "created_at", "periods", "days", "snapshot", "changes" }],
+        changes being the number of cells changed from the parent (None for snapshots).
+        None if the timetable does not exist.
+        """
+        timetable = self.get_timetable_by_name(name)
+        if timetable is None:
+            return None
+        if timetable.revision == 1:
+            return [{"number": 1, "created_at": timetable.created_at, "periods": timetable.periods,
+                     "days": timetable.days, "snapshot": True, "changes": None}]
+        rows = (
+            self.db.query(TimetableRevision)
+            .filter(TimetableRevision.timetable_id == timetable.id)
+            .order_by(TimetableRevision.number)
+        )
+        return [
+            {"number": r.number, "created_at": r.created_at, "periods": r.periods, "days": r.days,
+             "snapshot": r.snapshot is not None, "changes": None if r.changes is None else len(json.loads(r.changes))}
+            for r in rows
+        ]
+
+    def get_revision(self, name: str, number: int):
+        """
+        A timetable as it was at revision `number`:
+        { "number", "created_at", "periods", "days", "week": [{class: [subjects]}, ...] },
+        or None if the timetable or revision does not exist. The current
+        revision is read as stored; older ones are rebuilt from the last
+        stored snapshot at or before them plus the deltas after it.
+        """
+        timetable = self.get_timetable_by_name(name)
+        if timetable is None or not 1 <= number <= timetable.revision:
+            return None
+        if timetable.revision == 1:
+            return {"number": 1, "created_at": timetable.created_at, "periods": timetable.periods,
+                    "days": timetable.days, "week": self.get_week_by_name(name)}
+
+        base = self._last_snapshot(timetable.id, number)
+        chain = (
+            self.db.query(TimetableRevision)
+            .filter(TimetableRevision.timetable_id == timetable.id,
+                    TimetableRevision.number.between(base, number))
+            .order_by(TimetableRevision.number)
+            .all()
+        )
+        target = chain[-1]
+        if number == timetable.revision:
+            week = self.get_week_by_name(name)
+        else:
+            week = json.loads(chain[0].snapshot)
+            for revision in chain[1:]:
+                week = apply_changes(week, json.loads(revision.changes), revision.days)
+            week = self._fill_classes(week)
+        return {"number": number, "created_at": target.created_at, "periods": target.periods,
+                "days": target.days, "week": week}
+
+    def _last_snapshot(self, timetable_id: int, number: int) -> int:
+        """Number of the newest revision at or before `number` stored as a full snapshot."""
+        return self.db.query(func.max(TimetableRevision.number)).filter(
+            TimetableRevision.timetable_id == timetable_id,
+            TimetableRevision.number <= number,
+            TimetableRevision.snapshot.isnot(None)
+        ).scalar()
+
+    def diff_revisions(self, name: str, from_number: int, to_number: int):
+        """
+        Cells that differ between two revisions:
+        [{ "day_index", "class_name", "period_index", "before", "after" }],
+        before/after None where the cell does not exist. None if either revision is missing.
+        """
+        before = self.get_revision(name, from_number)
+        after = self.get_revision(name, to_number)
+        if before is None or after is None:
+            return None
+        return [
+            {"day_index": day, "class_name": cls, "period_index": period, "before": a, "after": b}
+            for day, cls, period, a, b in cell_changes(before["week"], after["week"])
+        ]
+
+    def _notify(self, name: str):
+        for listener in self.change_listeners:
+            listener(name)
+
+    @staticmethod
+    def _as_week(entries_data) -> list:
+        """entries_data as one schedule per day."""
+        if isinstance(entries_data, dict):
+            return [entries_data]
+        if not entries_data:
+            raise ValueError("A weekly timetable needs at least one day.")
+        return list(entries_data)
+
+    def _new_timetable(self, name: str, entries_data, periods: int) -> Timetable:
+        week = self._as_week(entries_data)
+        timetable = Timetable(name=name, periods=periods, days=len(week))
+        if self.storage_format == "grid":
+            for column, value in encode_week(week, periods).items():
+                setattr(timetable, column, value)
+        return timetable
+
+    def _entry_rows(self, timetable_id: int, entries_data, periods: int) -> list:
+        rows = []
+        for day, schedule in enumerate(self._as_week(entries_data)):
+            for class_name, subjects in schedule.items():
+                for i, subject in enumerate(subjects[:periods]):
+                    rows.append({
+                        "timetable_id": timetable_id,
+                        "day_index": day,
+                        "period_index": i,
+                        "class_name": class_name,
+                        "subject": subject
+                    })
+        return rows
+
+    def _insert_entries(self, rows: list):
+        """Single executemany INSERT, bypassing per-object unit-of-work bookkeeping."""
+        if rows:
+            self.db.execute(insert(TimetableEntry), rows)
+
     def delete_timetable(self, name: str):
         """Delete a timetable by name."""
         timetable = self.get_timetable_by_name(name)
         if timetable:
             self.db.delete(timetable)
             self.db.commit()
+            self._notify(name)
             return True
         return False
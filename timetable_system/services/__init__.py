@@ -1,2 +1,5 @@
 from .scheduler import TimetableScheduler
+from .parallel import ParallelScheduler
 from .input_service import InputService
+from .jobs import JobQueue, QueueFullError
+from .cache import SolveCache
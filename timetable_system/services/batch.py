@@ -0,0 +1,77 @@
+from timetable_system.utils.metrics import record_solve
+from .cache import SolveCache
+from .parallel import solve_each
+from .scheduler import TimetableScheduler
+
+FAILURE_MESSAGES = {
+    "infeasible": "Could not generate a conflict-free timetable.",
+    "failed": "Could not generate a conflict-free timetable.",
+    "timeout": "Timed out before a conflict-free timetable was found."
+}
+
+def _rename(schedule: dict, from_order: list, to_order: list) -> dict:
+    """Maps a schedule onto another request with the same canonical form."""
+    return {to: list(schedule[frm]) for frm, to in zip(from_order, to_order)}
+
+def _result(index: int, status: str, schedule, conflicts: list, cached: bool) -> dict:
+    error = None
+    if status != "solved":
+        error = " ".join(c["reason"] for c in conflicts) or FAILURE_MESSAGES[status]
+    return {
+        "index": index,
+        "status": status,
+        "schedule": schedule,
+        "conflicts": conflicts,
+        "error": error,
+        "cached": cached
+    }
+
+def solve_batch(requests: list, cache: SolveCache = None, timeout: float = None, resources: dict = None):
+    """
+    Solves many independent requests ({"classes", "periods", "engine"}) and
+    yields one result per request as soon as it is known:
+    { "index", "status", "schedule", "conflicts", "error", "cached" },
+    status being solved, infeasible, timeout or failed (see solve_outcome).
+    Requests with the same canonical form (SolveCache.canonical) are solved
+    once; cache hits come first, the rest in completion order.
+    """
+    schedulers = [
+        TimetableScheduler(r["classes"], r["periods"], engine=r.get("engine"), resources=resources) for r in requests
+    ]
+    groups = {} # key -> [(index, canonical class order)]
+    for i, (r, scheduler) in enumerate(zip(requests, schedulers)):
+        key, order = SolveCache.canonical(r["classes"], r["periods"], scheduler.engine, resources)
+        groups.setdefault(key, []).append((i, order))
+
+    def fan_out(members, schedule, conflicts, status, cached):
+        """One result per member; conflicts are rebuilt so they name each request's classes."""
+        first, first_order = members[0]
+        for i, order in members:
+            own = schedulers[i].check_feasibility() if conflicts and i != first else conflicts
+            mapped = _rename(schedule, first_order, order) if schedule is not None else None
+            yield _result(i, status, mapped, own, cached)
+
+    misses = []
+    for members in groups.values():
+        first = members[0][0]
+        scheduler = schedulers[first]
+        if cache is not None:
+            hit, schedule = cache.get(requests[first]["classes"], requests[first]["periods"], scheduler.engine, resources)
+            if hit:
+                conflicts = scheduler.check_feasibility() if schedule is None else []
+                yield from fan_out(members, schedule, conflicts, "solved" if schedule else "infeasible", True)
+                continue
+        misses.append(members)
+
+    problems = [
+        (requests[m[0][0]]["classes"], requests[m[0][0]]["periods"], schedulers[m[0][0]].engine)
+        for m in misses
+    ]
+    for k, schedule, conflicts, stats in solve_each(problems, timeout=timeout, resources=resources):
+        record_solve(*stats)
+        status = stats[3]
+        data, periods, engine = problems[k]
+        # A random-engine miss or a timeout proves nothing, so don't cache it
+        if cache is not None and status in ("solved", "infeasible"):
+            cache.put(data, periods, engine, schedule, resources)
+        yield from fan_out(misses[k], schedule, conflicts, status, False)
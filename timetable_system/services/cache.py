@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from timetable_system.config import CACHE_SIZE, CACHE_TTL
+from timetable_system.models import SolveCacheEntry
+from .resources import resources_fingerprint
+
+class SolveCache:
+    """
+    Memoizes solve results keyed on a canonical form of the request:
+    each class's subjects as a sorted multiset, classes sorted by that
+    multiset (so renaming classes still hits), plus periods, engine and
+    the resource model, if any.
+    In-memory LRU with TTL; pass session_factory to also persist entries
+    in the solve_cache table so they survive restarts.
+    A cached None means the input is known to be unsatisfiable.
+    """
+    def __init__(self, max_size: int = None, ttl: float = None, session_factory=None):
+        self.max_size = max_size or CACHE_SIZE
+        self.ttl = ttl if ttl is not None else CACHE_TTL
+        self.session_factory = session_factory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (stored_at, rows or None)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def canonical(data: dict, periods: int, engine: str, resources: dict = None):
+        """Returns (key, class names in canonical order)."""
+        forms = {cls: sorted(subjects) for cls, subjects in data.items()}
+        order = sorted(data, key=lambda cls: forms[cls])
+        parts = [periods, engine, [forms[cls] for cls in order]]
+        fingerprint = resources_fingerprint(resources)
+        if fingerprint: # Keys without a resource model stay as they were
+            parts.append(fingerprint)
+        payload = json.dumps(parts, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest(), order
+
+    def get(self, data: dict, periods: int, engine: str, resources: dict = None):
+        """Returns (hit, schedule). schedule is None for cached unsatisfiable inputs."""
+        key, order = self.canonical(data, periods, engine, resources)
+        found, rows = self._lookup(key)
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not found:
+            return False, None
+        if rows is None:
+            return True, None
+        # Classes with equal multisets are interchangeable, so any mapping is valid
+        return True, {cls: list(row) for cls, row in zip(order, rows)}
+
+    def put(self, data: dict, periods: int, engine: str, schedule, resources: dict = None):
+        key, order = self.canonical(data, periods, engine, resources)
+        rows = [schedule[cls] for cls in order] if schedule is not None else None
+        self._remember(key, time.time(), rows)
+
+        if self.session_factory:
+            db = self.session_factory()
+            try:
+                db.merge(SolveCacheEntry(
+                    key=key,
+                    schedule=json.dumps(rows) if rows is not None else None,
+                    created_at=datetime.utcnow()
+                ))
+                db.commit()
+            finally:
+                db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def _lookup(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, rows = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    return True, rows
+                del self._entries[key]
+
+        if not self.session_factory:
+            return False, None
+
+        db = self.session_factory()
+        try:
+            row = db.get(SolveCacheEntry, key)
+            if row is None:
+                return False, None
+            if row.created_at < datetime.utcnow() - timedelta(seconds=self.ttl):
+                db.delete(row)
+                db.commit()
+                return False, None
+            rows = json.loads(row.schedule) if row.schedule is not None else None
+            stored_at = now - (datetime.utcnow() - row.created_at).total_seconds()
+        finally:
+            db.close()
+        self._remember(key, stored_at, rows)
+        return True, rows
+
+    def _remember(self, key: str, stored_at: float, rows):
+        with self._lock:
+            self._entries[key] = (stored_at, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
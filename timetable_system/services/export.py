@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from timetable_system.config import EXPORT_BATCH_SIZE
+from timetable_system.repositories.timetable_manager import TimetableManager
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CSV_HEADER = ["timetable_id", "timetable_name", "created_at", "class_name", "period_index", "subject", "day_index"]
+
+def export_lines(tm: TimetableManager, fmt: str, after_id: int = None):
+    """
+    Yield the export as text chunks, one timetable at a time.
+    ndjson: one object per timetable, re-importable through POST /timetables/bulk.
+    csv: one row per cell.
+    To resume, pass the id of the last timetable fully received as after_id.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    timetables = tm.iter_timetables(after_id=after_id, batch_size=EXPORT_BATCH_SIZE)
+    if fmt == "ndjson":
+        for t in timetables:
+            t["created_at"] = t["created_at"].isoformat() if t["created_at"] else None
+            yield json.dumps(t, separators=(",", ":")) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for t in timetables:
+        created_at = t["created_at"].isoformat() if t["created_at"] else ""
+        week = t["entries"] if isinstance(t["entries"], list) else [t["entries"]]
+        for day, schedule in enumerate(week):
+            for class_name, subjects in schedule.items():
+                for i, subject in enumerate(subjects):
+                    writer.writerow([t["id"], t["name"], created_at, class_name, i, subject, day])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Manager
+from timetable_system.config import JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL
+from timetable_system.repositories.timetable_manager import TimetableManager
+from timetable_system.utils.logger import logger
+from timetable_system.utils.metrics import record_solve, solve_outcome
+from .scheduler import TimetableScheduler
+
+class QueueFullError(Exception):
+    """Raised when JOB_QUEUE_DEPTH jobs are already queued or running."""
+
+def _run_job(job_id: str, running, data: dict, periods: int, engine: str, resources: dict):
+    """Worker-side solve. Returns (schedule, conflicts, metrics for record_solve)."""
+    # Marked here: futures already handed to a worker process look running while still queued
+    running[job_id] = True
+    scheduler = TimetableScheduler(data, periods, engine=engine, resources=resources)
+    started = time.perf_counter()
+    schedule = scheduler.solve()
+    stats = (scheduler.engine, time.perf_counter() - started, scheduler.attempts, solve_outcome(scheduler, schedule))
+    return schedule, scheduler.conflicts, stats
+
+class JobQueue:
+    """
+    Background solve jobs on a bounded process pool.
+    Jobs move queued -> running -> done | failed; finished jobs are kept
+    for JOB_RESULT_TTL seconds so clients can poll for the result.
+    Results with save_as are saved on a thread of their own, so a slow
+    database write never holds up the pool's result handling or other jobs.
+    """
+    def __init__(self, workers: int = None, max_depth: int = None, session_factory=None):
+        self.workers = workers or JOB_WORKERS
+        self.max_depth = max_depth or JOB_QUEUE_DEPTH
+        # Needed only for jobs that save their result
+        self.session_factory = session_factory
+        self.jobs = {}
+        self._futures = {}
+        self._pool = None
+        self._manager = None
+        self._started = None # job id -> True once a worker picks the job up (shared with the workers)
+        self._finisher = None
+        self._lock = threading.Lock()
+
+    def submit(self, data: dict, periods: int, engine: str = None, save_as: str = None,
+               resources: dict = None) -> str:
+        """Queue a solve and return its job id. Raises QueueFullError when saturated."""
+        with self._lock:
+            self._prune()
+            if len(self._futures) >= self.max_depth:
+                raise QueueFullError(f"Job queue is full ({self.max_depth} jobs pending).")
+            if self._pool is None:
+                self._manager = Manager()
+                self._started = self._manager.dict()
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._finisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-finish")
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "created_at": time.time(),
+                "finished_at": None,
+                "save_as": save_as,
+                "result": None,
+                "conflicts": [],
+                "error": None
+            }
+            future = self._pool.submit(_run_job, job_id, self._started, data, periods, engine, resources)
+            self._futures[job_id] = future
+            finisher = self._finisher
+        future.add_done_callback(lambda f: self._on_done(job_id, periods, f, finisher))
+        return job_id
+
+    def get(self, job_id: str):
+        """Return a snapshot of the job, or None if unknown or expired."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            started = self._started
+            if job["status"] == "queued" and started is not None and job_id in started:
+                job["status"] = "running"
+            return dict(job)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            manager, self._manager, self._started = self._manager, None, None
+            finisher, self._finisher = self._finisher, None
+        if pool is not None:
+            # Outside the lock: cancelling pending jobs runs their _finish, which takes it
+            pool.shutdown(cancel_futures=True)
+            finisher.shutdown() # After the pool: its last callbacks may still queue saves
+            manager.shutdown()
+
+    def _on_done(self, job_id: str, periods: int, future, finisher: ThreadPoolExecutor):
+        """Done-callback, on the pool's result thread: saves go to the finisher thread."""
+        if self.jobs[job_id]["save_as"] and not future.cancelled() and future.exception() is None:
+            finisher.submit(self._finish, job_id, periods, future)
+        else:
+            self._finish(job_id, periods, future)
+
+    def _finish(self, job_id: str, periods: int, future):
+        job = self.jobs[job_id]
+        update = {"finished_at": time.time()}
+        try:
+            schedule, conflicts, stats = future.result()
+        except Exception as e:
+            update.update(status="failed", error=str(e))
+        else:
+            # Recorded here: worker processes don't share this process's registry
+            record_solve(*stats)
+            update.update(result=schedule, conflicts=conflicts)
+            if schedule is None:
+                update.update(status="failed", error="Could not generate a conflict-free timetable.")
+            else:
+                update["status"] = "done"
+                if job["save_as"]:
+                    update["error"] = self._save(job["save_as"], schedule, periods)
+
+        with self._lock:
+            job.update(update)
+            self._futures.pop(job_id, None)
+            if self._started is not None:
+                self._started.pop(job_id, None)
+
+    def _save(self, name: str, schedule: dict, periods: int):
+        """Store a finished result. Returns an error message or None."""
+        db = self.session_factory()
+        try:
+            TimetableManager(db).create_timetable(name, schedule, periods)
+            return None
+        except ValueError as e:
+            logger.error(f"Job result not saved: {e}")
+            return str(e)
+        finally:
+            db.close()
+
+    def _prune(self):
+        """Drop finished jobs older than JOB_RESULT_TTL. Caller holds the lock."""
+        cutoff = time.time() - JOB_RESULT_TTL
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
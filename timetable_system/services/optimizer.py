@@ -0,0 +1,256 @@
+import math
+import random
+import time
+from timetable_system.config import OPTIMIZE_BUDGET
+from .resources import CapacityTable
+
+# Moves between clock checks
+CHECK_EVERY = 256
+# Final temperature as a share of the starting one
+COOLING_RATIO = 0.001
+
+class SoftConstraints:
+    """
+    Weighted preferences over a valid schedule, each a penalty (lower is better).
+    soft: {
+        "spread": w,            # per pair of adjacent periods with the same subject
+        "heavy": [subjects], "max_heavy_run": n, "heavy_weight": w,
+                                # per heavy subject beyond n in a row (MATH, PHY, PHY counts 1 for n = 2)
+        "avoid": [{"subject", "periods", "weight"}]
+                                # per lesson of the subject in one of those periods
+    }
+    Every term touches at most max_heavy_run + 1 neighbouring cells, so the
+    cost change of a swap is found locally (see ScheduleOptimizer.delta).
+    """
+    def __init__(self, soft: dict):
+        self.spread = float(soft.get("spread") or 0)
+        self.heavy = frozenset(soft.get("heavy") or ())
+        self.max_run = int(soft.get("max_heavy_run") or 2)
+        self.heavy_weight = float(soft.get("heavy_weight", 1) if self.heavy else 0)
+        self.avoid = {} # subject -> {period: weight}
+        for rule in soft.get("avoid") or ():
+            periods = self.avoid.setdefault(rule["subject"], {})
+            for p in rule["periods"]:
+                periods[p] = periods.get(p, 0) + float(rule.get("weight", 1))
+        if self.spread < 0 or self.heavy_weight < 0 or any(w < 0 for ps in self.avoid.values() for w in ps.values()):
+            raise ValueError("Soft constraint weights must not be negative.")
+        if self.max_run < 1:
+            raise ValueError("max_heavy_run must be at least 1.")
+
+    def unary(self, subject: str, period: int) -> float:
+        rule = self.avoid.get(subject)
+        return rule.get(period, 0) if rule else 0
+
+    def breakdown(self, row: list) -> dict:
+        """Penalty of one class's scheduled cells, per constraint kind (the full, slow count)."""
+        spread = sum(self.spread for i in range(len(row) - 1) if row[i] == row[i + 1])
+        heavy, run = 0, 0
+        for subject in row:
+            run = run + 1 if subject in self.heavy else 0
+            if run > self.max_run:
+                heavy += self.heavy_weight
+        avoid = sum(self.unary(s, p) for p, s in enumerate(row))
+        return {"spread": spread, "heavy": heavy, "avoid": avoid}
+
+class ScheduleOptimizer:
+    """
+    Improves a valid schedule against SoftConstraints by simulated annealing
+    over period swaps (see optimize). A move is only made when every subject
+    still fits its new period (CapacityTable), so the result stays valid.
+    Soft costs are per class row, and a row's cost change is computed from
+    the few cells a swap touches, with running heavy-window counts, so it is
+    O(1) whatever the grid size. Only each class's first min(len, periods)
+    cells move.
+    """
+    def __init__(self, schedule: dict, periods: int, soft: dict, resources: dict = None, seed: int = None):
+        self.soft = SoftConstraints(soft)
+        self.periods = periods
+        self.rows = {cls: list(row) for cls, row in schedule.items()}
+        self.limits = {cls: min(len(row), periods) for cls, row in self.rows.items()}
+        self.capacity = CapacityTable((s for row in self.rows.values() for s in row), resources)
+        self.windows = {cls: self._windows(row, self.limits[cls]) for cls, row in self.rows.items()}
+        self.rng = random.Random(seed)
+        self.stats = {}
+
+    def score(self) -> dict:
+        """{"score", "spread", "heavy", "avoid"} of the current rows."""
+        totals = {"spread": 0, "heavy": 0, "avoid": 0}
+        for cls, row in self.rows.items():
+            for kind, value in self.soft.breakdown(row[:self.limits[cls]]).items():
+                totals[kind] += value
+        totals = {kind: round(value, 6) for kind, value in totals.items()}
+        return {"score": round(sum(totals.values()), 6), **totals}
+
+    def _windows(self, row: list, limit: int) -> list:
+        """Heavy cells in each window of max_run + 1 periods, by window start."""
+        size = self.soft.max_run + 1
+        heavy = [int(s in self.soft.heavy) for s in row[:limit]]
+        return [sum(heavy[w:w + size]) for w in range(limit - size + 1)]
+
+    def delta(self, cls: str, p: int, q: int) -> float:
+        """Cost change of swapping periods p < q of `cls`, from the cells around them."""
+        soft, row = self.soft, self.rows[cls]
+        a, b = row[p], row[q]
+        change = soft.unary(b, p) + soft.unary(a, q) - soft.unary(a, p) - soft.unary(b, q)
+
+        if soft.spread:
+            limit = self.limits[cls]
+            pairs = {i for i in (p - 1, p, q - 1, q) if 0 <= i < limit - 1}
+            before = sum(row[i] == row[i + 1] for i in pairs)
+            row[p], row[q] = b, a
+            after = sum(row[i] == row[i + 1] for i in pairs)
+            row[p], row[q] = a, b
+            change += soft.spread * (after - before)
+
+        if soft.heavy_weight and (a in soft.heavy) != (b in soft.heavy):
+            # p loses a heavy cell and q gains one, or the reverse; windows holding both don't change
+            windows, size = self.windows[cls], soft.max_run + 1
+            lose, gain = (p, q) if a in soft.heavy else (q, p)
+            for w in range(max(0, lose - size + 1), min(lose, len(windows) - 1) + 1):
+                if not w <= gain < w + size and windows[w] == size:
+                    change -= soft.heavy_weight
+            for w in range(max(0, gain - size + 1), min(gain, len(windows) - 1) + 1):
+                if not w <= lose < w + size and windows[w] == size - 1:
+                    change += soft.heavy_weight
+        return change
+
+    def _apply(self, cls: str, p: int, q: int):
+        row, soft = self.rows[cls], self.soft
+        a, b = row[p], row[q]
+        row[p], row[q] = b, a
+        if soft.heavy_weight and (a in soft.heavy) != (b in soft.heavy):
+            windows, size = self.windows[cls], soft.max_run + 1
+            lose, gain = (p, q) if a in soft.heavy else (q, p)
+            for w in range(max(0, lose - size + 1), min(lose, len(windows) - 1) + 1):
+                windows[w] -= 1
+            for w in range(max(0, gain - size + 1), min(gain, len(windows) - 1) + 1):
+                windows[w] += 1
+
+    def _chain(self, cls: str, p: int, q: int, where: list):
+        """
+        Classes that must swap periods p and q along with `cls` (a Kempe
+        chain): whoever holds, in the period a subject moves into, that same
+        subject swaps too. None if one of them can't (its row ends before q).
+        """
+        chain, stack = {cls}, [cls]
+        while stack:
+            row = self.rows[stack.pop()]
+            for period, incoming in ((q, row[p]), (p, row[q])):
+                for other in where[period].get(incoming, ()):
+                    if other not in chain:
+                        if self.limits[other] <= q:
+                            return None
+                        chain.add(other)
+                        stack.append(other)
+        return chain
+
+    def _chain_fits(self, rooms: list, chain: set, p: int, q: int) -> bool:
+        """Moves the chain's cells in the room tables if every one still fits; unchanged otherwise."""
+        capacity = self.capacity
+        moved = [(self.rows[c][p], self.rows[c][q]) for c in chain]
+        for a, b in moved:
+            capacity.release(rooms[p], a)
+            capacity.release(rooms[q], b)
+        taken = []
+        for a, b in moved:
+            if not (capacity.fits(rooms[p], b) and capacity.fits(rooms[q], a)):
+                break
+            capacity.take(rooms[p], b)
+            capacity.take(rooms[q], a)
+            taken.append((a, b))
+        else:
+            return True
+        for a, b in taken:
+            capacity.release(rooms[p], b)
+            capacity.release(rooms[q], a)
+        for a, b in moved:
+            capacity.take(rooms[p], a)
+            capacity.take(rooms[q], b)
+        return False
+
+    def optimize(self, time_budget: float = None) -> dict:
+        """
+        Anneal for up to `time_budget` seconds (OPTIMIZE_BUDGET by default),
+        or until the score reaches 0. Each move picks a class and two of its
+        periods and swaps them in the whole Kempe chain (see _chain), so it
+        can get past cells that a lone swap would clash with. Returns the
+        best schedule found; self.stats has the initial and final scores,
+        moves tried and accepted, and elapsed seconds.
+        """
+        budget = time_budget if time_budget is not None else OPTIMIZE_BUDGET
+        start = time.perf_counter()
+        initial = self.score()
+        rooms = [self.capacity.new_room() for _ in range(self.periods)]
+        where = [{} for _ in range(self.periods)] # period -> subject -> classes holding it
+        for cls, row in self.rows.items():
+            for p in range(self.limits[cls]):
+                self.capacity.take(rooms[p], row[p])
+                where[p].setdefault(row[p], set()).add(cls)
+
+        movable = [cls for cls in self.rows if self.limits[cls] > 1 and len(set(self.rows[cls][:self.limits[cls]])) > 1]
+        current = best = initial["score"]
+        best_rows = {cls: list(row) for cls, row in self.rows.items()}
+        tried = accepted = 0
+        temperature = start_temperature = self._start_temperature(movable)
+        rng = self.rng
+
+        while movable and best > 0:
+            if tried % CHECK_EVERY == 0:
+                progress = (time.perf_counter() - start) / budget if budget > 0 else 1
+                if progress >= 1:
+                    break
+                temperature = start_temperature * COOLING_RATIO ** progress
+            tried += 1
+
+            cls = movable[rng.randrange(len(movable))]
+            p, q = rng.sample(range(self.limits[cls]), 2)
+            if p > q:
+                p, q = q, p
+            if self.rows[cls][p] == self.rows[cls][q]:
+                continue
+            chain = self._chain(cls, p, q, where)
+            if chain is None:
+                continue
+            change = sum(self.delta(c, p, q) for c in chain)
+            if change > 0 and (temperature <= 0 or rng.random() >= math.exp(-change / temperature)):
+                continue
+            if not self._chain_fits(rooms, chain, p, q):
+                continue
+
+            for c in chain:
+                a, b = self.rows[c][p], self.rows[c][q]
+                where[p][a].discard(c)
+                where[q][b].discard(c)
+                where[p].setdefault(b, set()).add(c)
+                where[q].setdefault(a, set()).add(c)
+                self._apply(c, p, q)
+            accepted += 1
+            current += change
+            if current < best - 1e-9:
+                best = current
+                best_rows = {c: list(r) for c, r in self.rows.items()}
+
+        self.rows = best_rows
+        final = self.score()
+        self.stats = {
+            "initial_score": initial["score"],
+            "score": final["score"],
+            "breakdown": {kind: final[kind] for kind in ("spread", "heavy", "avoid")},
+            "moves": tried,
+            "accepted": accepted,
+            "elapsed": round(time.perf_counter() - start, 4)
+        }
+        return best_rows
+
+    def _start_temperature(self, movable: list, samples: int = 100) -> float:
+        """Mean cost increase of random swaps, so early uphill moves are accepted about a third of the time."""
+        if not movable:
+            return 0
+        uphill = []
+        for _ in range(samples):
+            cls = movable[self.rng.randrange(len(movable))]
+            p, q = sorted(self.rng.sample(range(self.limits[cls]), 2))
+            change = self.delta(cls, p, q)
+            if change > 0:
+                uphill.append(change)
+        return sum(uphill) / len(uphill) if uphill else 0
@@ -0,0 +1,144 @@
+import random
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from multiprocessing import Manager
+from timetable_system.config import SOLVE_WORKERS, SOLVE_TIMEOUT
+from timetable_system.utils.metrics import solve_outcome
+from .scheduler import TimetableScheduler
+
+# Shared across requests: spinning up processes per solve would eat the gain
+_pool = None
+_manager = None
+_lock = threading.Lock()
+
+def _get_pool():
+    global _pool, _manager
+    with _lock:
+        if _pool is None:
+            _manager = Manager()
+            _pool = ProcessPoolExecutor(max_workers=SOLVE_WORKERS)
+        return _pool, _manager
+
+def shutdown_pool():
+    """Stop the worker processes (e.g. on application shutdown)."""
+    global _pool, _manager
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _manager.shutdown()
+            _pool, _manager = None, None
+
+def _stoppable_scheduler(data: dict, periods: int, engine: str, cancel, deadline: float, resources: dict,
+                         seed: int = None) -> TimetableScheduler:
+    """A scheduler that gives up once `cancel` is set or time.time() passes `deadline`."""
+    def should_stop():
+        return cancel.is_set() or time.time() >= deadline
+
+    return TimetableScheduler(data, periods, engine=engine, seed=seed, should_stop=should_stop, resources=resources)
+
+def _solve_worker(data: dict, periods: int, engine: str, seed: int, cancel, deadline: float, resources: dict):
+    """Runs one seeded search. Returns (schedule, stopped, attempts)."""
+    scheduler = _stoppable_scheduler(data, periods, engine, cancel, deadline, resources, seed=seed)
+    return scheduler.solve(), scheduler.stopped, scheduler.attempts
+
+def _solve_one(data: dict, periods: int, engine: str, cancel, timeout: float, resources: dict):
+    """
+    Worker side of solve_each. The timeout counts from here, not from
+    submission, so items queued behind others keep their full time.
+    Returns (schedule, conflicts, metrics for record_solve).
+    """
+    scheduler = _stoppable_scheduler(data, periods, engine, cancel, time.time() + timeout, resources)
+    started = time.perf_counter()
+    schedule = scheduler.solve()
+    stats = (scheduler.engine, time.perf_counter() - started, scheduler.attempts, solve_outcome(scheduler, schedule))
+    return schedule, scheduler.conflicts, stats
+
+def solve_each(problems: list, timeout: float = None, resources: dict = None):
+    """
+    Solves independent (data, periods, engine) problems across the shared
+    pool and yields (index, schedule, conflicts, stats) as each finishes.
+    Each gets `timeout` seconds (SOLVE_TIMEOUT by default) from when a
+    worker starts it; closing the generator cancels the rest.
+    """
+    if not problems:
+        return
+    pool, manager = _get_pool()
+    cancel = manager.Event()
+    timeout = timeout if timeout is not None else SOLVE_TIMEOUT
+    futures = {
+        pool.submit(_solve_one, data, periods, engine, cancel, timeout, resources): i
+        for i, (data, periods, engine) in enumerate(problems)
+    }
+    try:
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+    finally:
+        cancel.set()
+        for future in futures:
+            future.cancel()
+
+class ParallelScheduler:
+    """
+    Portfolio solver: runs several independently seeded TimetableScheduler
+    searches across a process pool, returns the first valid schedule and
+    cancels the rest. Same solve() contract as TimetableScheduler.
+    """
+    def __init__(self, data: dict, periods: int, engine: str = None, workers: int = None,
+                 timeout: float = None, seed: int = None, resources: dict = None):
+        # Validates the engine and runs the pre-solve checks in-process
+        self.scheduler = TimetableScheduler(data, periods, engine=engine, resources=resources)
+        self.resources = resources
+        self.data = data
+        self.periods = periods
+        self.engine = self.scheduler.engine
+        self.workers = workers or SOLVE_WORKERS
+        self.timeout = timeout if timeout is not None else SOLVE_TIMEOUT
+        self.seed = seed
+        self.conflicts = []
+        self.stopped = False
+        self.attempts = 0 # Summed over the workers that reported back
+
+    def check_feasibility(self) -> list:
+        return self.scheduler.check_feasibility()
+
+    def solve(self):
+        """
+        Returns a dict of class -> [subjects] or None if failed.
+        self.stopped is True when the timeout hit before any worker finished.
+        """
+        self.stopped = False
+        self.attempts = 0
+        self.conflicts = self.check_feasibility()
+        if self.conflicts:
+            return None
+
+        pool, manager = _get_pool()
+        cancel = manager.Event()
+        deadline = time.time() + self.timeout
+        base = self.seed if self.seed is not None else random.randrange(2 ** 32)
+
+        pending = {
+            pool.submit(_solve_worker, self.data, self.periods, self.engine, base + i, cancel, deadline, self.resources)
+            for i in range(self.workers)
+        }
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(0, deadline - time.time()), return_when=FIRST_COMPLETED)
+                if not done:
+                    self.stopped = True
+                    return None
+                for future in done:
+                    schedule, stopped, attempts = future.result()
+                    self.attempts += attempts
+                    if schedule is not None:
+                        return schedule
+                    # An exhaustive search that ran to completion proves infeasibility
+                    if self.engine == "backtracking" and not stopped:
+                        return None
+                    self.stopped = self.stopped or stopped
+            return None
+        finally:
+            cancel.set()
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import threading
+import time
+from itertools import combinations
+from timetable_system.config import HALL_EXACT_MAX_SUBJECTS, RESOURCE_CACHE_TTL
+from timetable_system.repositories.resource_manager import ResourceManager
+
+def resources_fingerprint(resources: dict) -> str:
+    """Stable hash of a resource model, '' when it is empty (legacy behaviour)."""
+    if not resources or not (resources.get("teachers") or resources.get("capacities")):
+        return ""
+    canonical = {
+        "teachers": {t: sorted(set(s)) for t, s in sorted((resources.get("teachers") or {}).items())},
+        "capacities": dict(sorted((resources.get("capacities") or {}).items()))
+    }
+    payload = json.dumps(canonical, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class CapacityTable:
+    """
+    A resource model compiled for one set of subjects.
+    resources: {"teachers": {teacher: [subjects]}, "capacities": {subject: n}}
+    - A subject in `capacities` is a shared resource (LIB, PT, ...): up to n
+      classes may have it in the same period.
+    - A subject some teacher covers can run in as many classes per period as
+      there are teachers free for it. Teachers covering several subjects tie
+      those subjects together: every subset S of a group of linked subjects
+      may use at most |teachers of S| slots per period (Hall's condition,
+      exact for groups of up to HALL_EXACT_MAX_SUBJECTS subjects; larger
+      groups get the per-subject and whole-group bounds only).
+    - Any other subject keeps the legacy rule: one class per period.
+    Each constraint is an integer id with a capacity; each subject maps to
+    the ids it counts against. Per period the solver keeps a `room` list
+    (capacity left per constraint), so a clash check is a few list reads.
+    """
+    def __init__(self, subjects, resources: dict = None):
+        resources = resources or {}
+        capacities = resources.get("capacities") or {}
+        pools = {}
+        for teacher, taught in (resources.get("teachers") or {}).items():
+            for subject in taught:
+                pools.setdefault(subject, set()).add(teacher)
+
+        self.caps = [] # constraint id -> capacity
+        self.of = {}   # subject -> tuple of constraint ids
+        teacher_bound = []
+        for subject in sorted(set(subjects)):
+            if subject in capacities:
+                self.of[subject] = (self._constraint(capacities[subject]),)
+            elif subject in pools:
+                self.of[subject] = ()
+                teacher_bound.append(subject)
+            else:
+                self.of[subject] = (self._constraint(1),)
+
+        for group in self._linked_groups(teacher_bound, pools):
+            if len(group) <= HALL_EXACT_MAX_SUBJECTS:
+                subsets = [c for size in range(1, len(group) + 1) for c in combinations(group, size)]
+            else:
+                subsets = [(s,) for s in group] + [tuple(group)]
+            for subset in subsets:
+                teachers = set().union(*(pools[s] for s in subset))
+                # A subset whose pools don't overlap is implied by its members
+                if len(subset) > 1 and len(teachers) == sum(len(pools[s]) for s in subset):
+                    continue
+                c = self._constraint(len(teachers))
+                for s in subset:
+                    self.of[s] += (c,)
+
+        # subject -> its only constraint id, when no subject counts against two;
+        # lets hot loops test room[single[s]] > 0 inline
+        self.single = {s: ids[0] for s, ids in self.of.items()} \
+            if all(len(ids) == 1 for ids in self.of.values()) else None
+        # Every subject alone in a capacity-1 constraint: the legacy rule
+        self.exclusive = self.single is not None and all(self.caps[c] == 1 for c in self.single.values())
+
+    def _constraint(self, capacity: int) -> int:
+        self.caps.append(capacity)
+        return len(self.caps) - 1
+
+    @staticmethod
+    def _linked_groups(subjects: list, pools: dict) -> list:
+        """Subjects connected through shared teachers (connected components)."""
+        groups, seen = [], set()
+        for start in subjects:
+            if start in seen:
+                continue
+            group, stack = [], [start]
+            seen.add(start)
+            while stack:
+                s = stack.pop()
+                group.append(s)
+                for other in subjects:
+                    if other not in seen and pools[s] & pools[other]:
+                        seen.add(other)
+                        stack.append(other)
+            groups.append(sorted(group))
+        return groups
+
+    def new_room(self) -> list:
+        """Capacity left per constraint in an empty period."""
+        return list(self.caps)
+
+    def fits(self, room: list, subject: str) -> bool:
+        for c in self.of[subject]:
+            if room[c] <= 0:
+                return False
+        return True
+
+    def take(self, room: list, subject: str):
+        for c in self.of[subject]:
+            room[c] -= 1
+
+    def release(self, room: list, subject: str):
+        for c in self.of[subject]:
+            room[c] += 1
+
+    def room_for(self, room: list, subject: str) -> int:
+        """How many more classes can have `subject` in this period."""
+        return min(room[c] for c in self.of[subject])
+
+    def cap(self, subject: str) -> int:
+        """Classes that may have `subject` in the same period, ignoring other subjects."""
+        return min(self.caps[c] for c in self.of[subject])
+
+class ResourceCache:
+    """
+    The stored resource model for solves, loaded at most every `ttl` seconds
+    (changes made by other workers show up within that window) and dropped
+    at once when this process replaces it. None when no model is stored.
+    """
+    def __init__(self, session_factory, ttl: float = None):
+        self.session_factory = session_factory
+        self.ttl = ttl if ttl is not None else RESOURCE_CACHE_TTL
+        self._loaded = None # (loaded_at, resources or None)
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._loaded is not None and time.time() - self._loaded[0] <= self.ttl:
+                return self._loaded[1]
+
+        db = self.session_factory()
+        try:
+            resources = ResourceManager(db).get_resources()
+        finally:
+            db.close()
+        resources = resources if resources_fingerprint(resources) else None
+        with self._lock:
+            self._loaded = (time.time(), resources)
+        return resources
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = None
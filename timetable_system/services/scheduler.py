@@ -1,46 +1,639 @@
 import random
-from timetable_system.config import MAX_ATTEMPTS
+import time
+from collections import Counter, defaultdict
+import numpy as np
+from timetable_system.config import (
+    MAX_ATTEMPTS, MAX_REPAIR_STEPS, RANDOM_BATCH_SIZE, SOLVER_ENGINE, EXACT_BUDGET_SHARE
+)
+from .resources import CapacityTable
+from .validator import find_clashes
+
+ENGINES = ("random", "backtracking")
+
+# How often (in attempts / search nodes) the solvers poll should_stop
+STOP_CHECK_INTERVAL = 256
+
+class _Stopped(Exception):
+    pass
 
 class TimetableScheduler:
-    def __init__(self, data: dict, periods: int):
+    def __init__(self, data: dict, periods: int, engine: str = None, seed: int = None, should_stop=None,
+                 resources: dict = None):
         self.data = data
         self.periods = periods
         self.classes = list(data.keys())
+        # Teachers and shared-resource capacities (see CapacityTable); None = one class per subject per period
+        self.resources = resources
+        self.capacity = CapacityTable((s for subjects in data.values() for s in subjects), resources)
+        self.engine = engine or SOLVER_ENGINE
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown solver engine '{self.engine}'. Must be one of: {', '.join(ENGINES)}")
+        self.rng = random.Random(seed)
+        self.conflicts = []
+        # Optional callable polled during search; returning True aborts it
+        self.should_stop = should_stop
+        self.stopped = False
+        self._nodes = 0
+        # Candidates drawn (random) or search nodes visited (backtracking) by the last solve
+        self.attempts = 0
+        self.repair_stats = {}
+        self.solve_stats = {}
 
     def solve(self):
         """
         Attempts to generate a conflict-free schedule.
         Returns a dict of class -> [subjects] or None if failed.
+        If the input is provably impossible, self.conflicts explains why.
+        If should_stop aborted the search, self.stopped is True.
+        """
+        self.stopped = False
+        self.attempts = 0
+        self.conflicts = self.check_feasibility()
+        if self.conflicts:
+            return None
+
+        if self.engine == "backtracking":
+            return self._solve_backtracking()
+        return self._solve_random()
+
+    def check_feasibility(self) -> list:
+        """
+        Pre-solve analysis: counting checks that run before any search.
+        A subject can be taught cap times per period (once by default), so the
+        copies of it that must land in the first t periods cannot exceed
+        t * cap (Hall's condition).
+        A class with n subjects only has periods 0..min(n, periods)-1 checked,
+        and subjects past `periods` may absorb some copies.
+        Returns a list of conflict dicts, empty if no contradiction was found.
+        """
+        # subject -> [(last checked period + 1, forced copies, class)]
+        forced = {}
+        for cls, subjects in self.data.items():
+            limit = min(len(subjects), self.periods)
+            slack = len(subjects) - limit
+            for subject, count in Counter(subjects).items():
+                if count > slack:
+                    forced.setdefault(subject, []).append((limit, count - slack, cls))
+
+        conflicts = []
+        for subject, demands in forced.items():
+            demands.sort(key=lambda d: d[0])
+            required, classes = 0, []
+            for i, (limit, count, cls) in enumerate(demands):
+                required += count
+                classes.append(cls)
+                # Only test at the end of each group of equal limits
+                if i + 1 < len(demands) and demands[i + 1][0] == limit:
+                    continue
+                cap = self.capacity.cap(subject)
+                if required > limit * cap:
+                    per_period = "once" if cap == 1 else f"{cap} times"
+                    conflicts.append({
+                        "subject": subject,
+                        "classes": list(classes),
+                        "required": required,
+                        "available": limit * cap,
+                        "reason": (
+                            f"{subject} is needed {required} times within the first {limit} "
+                            f"period(s) by {', '.join(classes)}, but can only be taught {per_period} per period."
+                        )
+                    })
+                    break
+        return conflicts
+
+    def solve_best_effort(self, time_budget: float):
+        """
+        Anytime solve that stops after `time_budget` seconds with the best
+        schedule found so far, even for infeasible input (self.conflicts then
+        says why no perfect schedule exists).
+        The exact engine gets EXACT_BUDGET_SHARE of the budget; if it finds
+        nothing, min-conflicts local search improves a greedy schedule until
+        the deadline or zero clashes.
+        Returns (schedule, clashes): clashes lists the cells still in conflict
+        (clash_groups). self.solve_stats has the
+        candidates evaluated, best clash count over time and elapsed seconds.
+        """
+        start = time.perf_counter()
+        outer_stop = self.should_stop
+
+        def stop_at(moment):
+            return lambda: time.perf_counter() >= moment or (outer_stop is not None and outer_stop())
+
+        self.should_stop = stop_at(start + time_budget * EXACT_BUDGET_SHARE)
+        try:
+            schedule = self.solve()
+        finally:
+            self.should_stop = outer_stop
+        conflicts = self.conflicts
+        nodes = self.attempts if self.engine == "backtracking" else 0
+        candidates = self.attempts if self.engine == "random" else 0
+
+        if schedule is not None:
+            timeline = [[round(time.perf_counter() - start, 4), 0]]
+        else:
+            self.stopped = False
+            self.should_stop = stop_at(start + time_budget)
+            # Each conflict forces at least required - available clashes, so stop there
+            floor = sum(c["required"] - c["available"] for c in conflicts)
+            try:
+                schedule, steps, timeline = self._min_conflicts(start, floor)
+            finally:
+                self.should_stop = outer_stop
+            candidates += steps
+
+        self.conflicts = conflicts
+        self.solve_stats = {
+            "engine": self.engine,
+            "candidates": candidates,
+            "nodes": nodes,
+            "best_clashes": timeline,
+            "elapsed": round(time.perf_counter() - start, 4)
+        }
+        return schedule, self.clash_groups(schedule)
+
+    def _min_conflicts(self, start: float, floor: int = 0):
+        """
+        Local search for solve_best_effort: greedy rows, then swaps within a
+        row that most reduce the clash count, until should_stop or the clash
+        count reaches `floor` (a proven lower bound).
+        Clashes are counted per constraint id (CapacityTable), so subjects
+        sharing a teacher clash together: the count is the placements beyond
+        each constraint's capacity, summed over periods.
+        Returns (best schedule, steps, [[elapsed, clash count]] per improvement).
+        """
+        caps, of = self.capacity.caps, self.capacity.of
+        members = defaultdict(list) # constraint id -> subjects counting against it
+        for subject, ids in of.items():
+            for c in ids:
+                members[c].append(subject)
+        limits = {cls: min(len(self.data[cls]), self.periods) for cls in self.classes}
+        where = [defaultdict(set) for _ in range(self.periods)]
+        use = [[0] * len(caps) for _ in range(self.periods)]
+        clashes = set() # (period, constraint id) over capacity
+        excess = 0
+
+        def place(cls, p, subject):
+            nonlocal excess
+            if p < limits[cls]:
+                where[p][subject].add(cls)
+                for c in of[subject]:
+                    use[p][c] += 1
+                    if use[p][c] > caps[c]:
+                        excess += 1
+                        clashes.add((p, c))
+
+        def unplace(cls, p, subject):
+            nonlocal excess
+            if p < limits[cls]:
+                where[p][subject].discard(cls)
+                for c in of[subject]:
+                    if use[p][c] > caps[c]:
+                        excess -= 1
+                    use[p][c] -= 1
+                    if use[p][c] <= caps[c]:
+                        clashes.discard((p, c))
+
+        rows = {}
+        for cls in self.classes:
+            rows[cls] = self._seed_row(self.data[cls], [], where, limits[cls])
+            for p, subject in enumerate(rows[cls]):
+                place(cls, p, subject)
+
+        best, best_excess = {cls: list(row) for cls, row in rows.items()}, excess
+        timeline = [[round(time.perf_counter() - start, 4), excess]]
+        steps = 0
+        while best_excess > floor:
+            if steps % 16 == 0 and self._stop_requested():
+                break
+            steps += 1
+            p, c = self.rng.choice(sorted(clashes))
+            holders = sorted(cls for s in members[c] for cls in where[p][s])
+
+            moves, best_delta = [], None
+            for cls in holders:
+                row = rows[cls]
+                for q in range(len(row)):
+                    if row[q] == row[p]:
+                        continue
+                    delta = self._constraint_swap_delta(use, limits[cls], p, q, row[p], row[q])
+                    if best_delta is None or delta < best_delta:
+                        moves, best_delta = [(cls, q)], delta
+                    elif delta == best_delta:
+                        moves.append((cls, q))
+            if not moves:
+                break # Every holder's row is this subject only
+
+            cls, q = self.rng.choice(moves)
+            # Random walk now and then to escape plateaus
+            if best_delta >= 0 and self.rng.random() < 0.1:
+                cls = self.rng.choice(holders)
+                q = self.rng.randrange(len(rows[cls]))
+            row = rows[cls]
+            a, b = row[p], row[q]
+            unplace(cls, p, a)
+            unplace(cls, q, b)
+            row[p], row[q] = b, a
+            place(cls, p, b)
+            place(cls, q, a)
+
+            if excess < best_excess:
+                best, best_excess = {k: list(r) for k, r in rows.items()}, excess
+                timeline.append([round(time.perf_counter() - start, 4), excess])
+        return best, steps, timeline
+
+    def _constraint_swap_delta(self, use: list, limit: int, p: int, q: int, a: str, b: str) -> int:
+        """_swap_clash_delta for _min_conflicts, on per-period use of each constraint id."""
+        caps, of = self.capacity.caps, self.capacity.of
+        delta = 0
+        for period, out, into in ((p, a, b), (q, b, a)):
+            if period < limit:
+                change = Counter(of[into])
+                change.subtract(of[out])
+                for c, d in change.items():
+                    n = use[period][c]
+                    delta += max(0, n + d - caps[c]) - max(0, n - caps[c])
+        return delta
+
+    def clash_groups(self, schedule: dict) -> list:
+        """
+        Cells in conflict, as validator.find_clashes reports them: per period,
+        every constraint over capacity, subjects sharing a teacher included.
+        """
+        return find_clashes(schedule, self.periods, self.resources)
+
+    def _table_for(self, schedule: dict) -> CapacityTable:
+        """self.capacity, or a wider one if `schedule` has subjects the input lacks."""
+        subjects = {s for row in schedule.values() for s in row}
+        if subjects <= self.capacity.of.keys():
+            return self.capacity
+        return CapacityTable(subjects | self.capacity.of.keys(), self.resources)
+
+    def _solve_random(self):
         """
-        for attempts in range(MAX_ATTEMPTS):
-            # Shuffle subjects for each class initially
-            shuffled_data = {
-                cls: random.sample(subjects, len(subjects)) 
-                for cls, subjects in self.data.items()
-            }
-            
-            if self._is_valid_schedule(shuffled_data):
-                return shuffled_data
-        
+        Legacy engine: random restarts, up to MAX_ATTEMPTS shuffles.
+        Candidates are drawn and clash-checked RANDOM_BATCH_SIZE at a time
+        on integer-encoded grids; the first valid one (in draw order) wins.
+        """
+        names, codes = self._encode()
+        np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        attempts = 0
+        while attempts < MAX_ATTEMPTS:
+            if self._stop_requested():
+                return None
+
+            size = min(RANDOM_BATCH_SIZE, MAX_ATTEMPTS - attempts)
+            # One uniform shuffle per class per candidate: argsort of random keys
+            perms = [np_rng.random((size, len(row))).argsort(axis=1) for row in codes]
+            valid = self._batch_is_valid(self._batch_grid(codes, perms, size, len(names)), names)
+
+            hits = np.flatnonzero(valid)
+            if hits.size:
+                b = hits[0]
+                self.attempts = attempts + int(b) + 1
+                return {
+                    cls: [names[c] for c in codes[k][perms[k][b]]]
+                    for k, cls in enumerate(self.classes)
+                }
+            attempts += size
+            self.attempts = attempts
+
         return None
 
+    def _encode(self):
+        """Interns subjects to small ints. Returns (names, per-class code arrays)."""
+        ids = {}
+        codes = [
+            np.array([ids.setdefault(s, len(ids)) for s in self.data[cls]], dtype=np.int32)
+            for cls in self.classes
+        ]
+        return list(ids), codes
+
+    def _batch_grid(self, codes, perms, size, n_subjects):
+        """
+        Builds a candidates x classes x periods array.
+        Periods past the end of a class's list get a per-class sentinel that
+        can never clash, matching the `i < len(schedule[cls])` rule.
+        """
+        grid = np.empty((size, len(codes), self.periods), dtype=np.int32)
+        for k, row in enumerate(codes):
+            limit = min(len(row), self.periods)
+            grid[:, k, :limit] = row[perms[k][:, :limit]]
+            grid[:, k, limit:] = n_subjects + k
+        return grid
+
+    def _batch_is_valid(self, grid, names=None):
+        """
+        Vectorized _is_valid_schedule. With the legacy one-class-per-subject
+        rule: sort each period across classes, compare neighbours. Otherwise
+        sum per-constraint usage through a subject x constraint membership
+        matrix and compare with the capacities.
+        """
+        if self.capacity.exclusive:
+            ordered = np.sort(grid, axis=1)
+            return ~(ordered[:, 1:, :] == ordered[:, :-1, :]).any(axis=(1, 2))
+
+        table = self.capacity
+        # Rows past the named subjects are the per-class sentinels: no usage
+        member = np.zeros((len(names) + len(self.classes), len(table.caps)), dtype=np.int16)
+        for code, subject in enumerate(names):
+            member[code, list(table.of[subject])] = 1
+        usage = member[grid].sum(axis=1) # candidates x periods x constraints
+        return (usage <= np.array(table.caps)).all(axis=(1, 2))
+
+    def _solve_backtracking(self):
+        """
+        Systematic engine: assigns (class, period) cells one at a time.
+        - Picks the cell with the fewest remaining options first (MRV).
+        - Forward checks every class after each assignment.
+        - Backtracks on dead ends, so None means no schedule exists.
+        Only periods below min(len(subjects), periods) are checked for clashes,
+        same as _is_valid_schedule. Leftover subjects are appended unchanged.
+        Per period, `room` holds the capacity left per CapacityTable constraint.
+        """
+        # Per-class state: remaining subject counts and the cells still open
+        remaining = {cls: Counter(subjects) for cls, subjects in self.data.items()}
+        open_cells = {
+            cls: set(range(min(len(subjects), self.periods)))
+            for cls, subjects in self.data.items()
+        }
+        room = [self.capacity.new_room() for _ in range(self.periods)]
+        grid = {cls: {} for cls in self.classes}
+
+        # Global demand left per subject, used for value ordering
+        demand = Counter()
+        for counts in remaining.values():
+            demand.update(counts)
+
+        self._nodes = 0
+        try:
+            if not self._search(remaining, open_cells, room, grid, demand):
+                return None
+        except _Stopped:
+            return None
+        finally:
+            self.attempts = self._nodes
+
+        schedule = {}
+        for cls in self.classes:
+            row = [grid[cls][i] for i in range(len(grid[cls]))]
+            for subject, count in remaining[cls].items():
+                row.extend([subject] * count)
+            schedule[cls] = row
+        return schedule
+
+    def _search(self, remaining, open_cells, room, grid, demand) -> bool:
+        self._nodes += 1
+        if self._nodes % STOP_CHECK_INTERVAL == 0 and self._stop_requested():
+            raise _Stopped()
+
+        cell, options = self._select_cell(remaining, open_cells, room)
+        if cell is None:
+            return True  # Every checked cell is filled
+        if not options:
+            return False
+
+        cls, period = cell
+        # Most demanded subjects first, random tie-break so seeds diversify
+        options.sort(key=lambda s: (-demand[s], self.rng.random()))
+
+        open_cells[cls].discard(period)
+        for subject in options:
+            remaining[cls][subject] -= 1
+            demand[subject] -= 1
+            self.capacity.take(room[period], subject)
+            grid[cls][period] = subject
+
+            if self._forward_check(remaining, open_cells, room, cls, subject) and \
+                    self._search(remaining, open_cells, room, grid, demand):
+                return True
+
+            del grid[cls][period]
+            self.capacity.release(room[period], subject)
+            demand[subject] += 1
+            remaining[cls][subject] += 1
+        open_cells[cls].add(period)
+        return False
+
+    def _select_cell(self, remaining, open_cells, room):
+        """Returns the open cell with the smallest domain, and that domain."""
+        fits, single = self.capacity.fits, self.capacity.single
+        best, best_options = None, None
+        for cls in self.classes:
+            subjects = [s for s, n in remaining[cls].items() if n > 0]
+            for period in open_cells[cls]:
+                left = room[period]
+                if single is not None:
+                    options = [s for s in subjects if left[single[s]] > 0]
+                else:
+                    options = [s for s in subjects if fits(left, s)]
+                if best is None or len(options) < len(best_options):
+                    best, best_options = (cls, period), options
+                    if not options:
+                        return best, best_options
+        return best, best_options
+
+    def _forward_check(self, remaining, open_cells, room, cls, subject) -> bool:
+        """
+        After placing `subject`, check that no class is left unsolvable:
+        - the class just assigned can still fit each of its subjects
+        - every other class can still place its copies of `subject`
+        - each affected subject still has enough free periods school-wide
+        """
+        fits, single = self.capacity.fits, self.capacity.single
+        touched = {s for s, n in remaining[cls].items() if n > 0}
+        touched.add(subject)
+        needed = Counter()
+        periods = {s: set() for s in touched}
+
+        for other in self.classes:
+            cells = open_cells[other]
+            # Subjects beyond the checked periods can absorb this many copies
+            slack = sum(remaining[other].values()) - len(cells)
+            for s in touched:
+                forced = remaining[other][s] - slack
+                if forced <= 0:
+                    continue
+                if single is not None:
+                    c = single[s]
+                    free = [p for p in cells if room[p][c] > 0]
+                else:
+                    free = [p for p in cells if fits(room[p], s)]
+                if len(free) < forced:
+                    return False
+                needed[s] += forced
+                periods[s].update(free)
+
+        if self.capacity.exclusive:
+            # One copy of a subject per period across all classes
+            return all(needed[s] <= len(periods[s]) for s in touched)
+        # Otherwise as many copies per period as the subject has room for
+        room_for = self.capacity.room_for
+        return all(needed[s] <= sum(room_for(room[p], s) for p in periods[s]) for s in touched)
+
+    def repair(self, current: dict):
+        """
+        Min-conflicts repair of an existing schedule.
+        `current` is the saved grid (class -> [subjects by period]); self.data is
+        the new input. Classes whose subject multiset is unchanged start from
+        their saved row, changed ones are re-seeded around their old row, then
+        clashes are removed by swapping cells within a row. Moving cells of
+        unchanged classes is penalised, so edits stay local to the change.
+        Falls back to solve() if no repair is found in MAX_REPAIR_STEPS.
+        Returns a dict of class -> [subjects] or None if failed.
+        """
+        self.stopped = False
+        self.conflicts = self.check_feasibility()
+        if self.conflicts:
+            return None
+
+        limits = {cls: min(len(self.data[cls]), self.periods) for cls in self.classes}
+        # where[p][s]: classes holding subject s in checked period p
+        where = [defaultdict(set) for _ in range(self.periods)]
+        clashes = set()
+
+        cap = self.capacity.cap
+
+        def place(cls, p, subject):
+            if p < limits[cls]:
+                holders = where[p][subject]
+                holders.add(cls)
+                if len(holders) > cap(subject):
+                    clashes.add((p, subject))
+
+        def unplace(cls, p, subject):
+            if p < limits[cls]:
+                holders = where[p][subject]
+                holders.discard(cls)
+                if len(holders) <= cap(subject):
+                    clashes.discard((p, subject))
+
+        rows, changed = {}, set()
+        for cls in self.classes:
+            old = current.get(cls)
+            if old is not None and Counter(old) == Counter(self.data[cls]):
+                rows[cls] = list(old)
+                for p, subject in enumerate(rows[cls]):
+                    place(cls, p, subject)
+            else:
+                changed.add(cls)
+        for cls in self.classes:
+            if cls in changed:
+                rows[cls] = self._seed_row(self.data[cls], current.get(cls) or [], where, limits[cls])
+                for p, subject in enumerate(rows[cls]):
+                    place(cls, p, subject)
+
+        def stability(cls, p, subject):
+            """1 if putting `subject` at p moves an unchanged class off its saved cell."""
+            return int(cls not in changed and current[cls][p] != subject)
+
+        # A clash always outweighs any number of moved cells
+        weight = sum(len(row) for row in rows.values()) + 1
+        steps = 0
+        while clashes and steps < MAX_REPAIR_STEPS:
+            steps += 1
+            p, subject = self.rng.choice(sorted(clashes))
+            holders = where[p][subject]
+            candidates = [c for c in holders if c in changed] or list(holders)
+
+            best, best_delta = [], None
+            for cls in candidates:
+                row = rows[cls]
+                for q in range(len(row)):
+                    other = row[q]
+                    if other == subject:
+                        continue
+                    delta = weight * self._swap_clash_delta(where, limits[cls], p, q, subject, other)
+                    delta += stability(cls, p, other) + stability(cls, q, subject)
+                    delta -= stability(cls, p, subject) + stability(cls, q, other)
+                    if best_delta is None or delta < best_delta:
+                        best, best_delta = [(cls, q)], delta
+                    elif delta == best_delta:
+                        best.append((cls, q))
+            if not best:
+                break
+
+            # Random walk now and then to escape plateaus
+            cls, q = self.rng.choice(best)
+            if best_delta >= 0 and self.rng.random() < 0.1:
+                cls = self.rng.choice(candidates)
+                q = self.rng.randrange(len(rows[cls]))
+            row = rows[cls]
+            a, b = row[p], row[q]
+            unplace(cls, p, a)
+            unplace(cls, q, b)
+            row[p], row[q] = b, a
+            place(cls, p, b)
+            place(cls, q, a)
+
+        # Teachers shared between subjects are only checked here, not per swap
+        fallback = bool(clashes) or not self._is_valid_schedule(rows)
+        schedule = self.solve() if fallback else rows
+        self.repair_stats = {
+            "steps": steps,
+            "fallback": fallback,
+            "changed_classes": sorted(changed),
+            "moved_cells": self._moved_cells(current, schedule) if schedule else None
+        }
+        return schedule
+
+    def _seed_row(self, subjects: list, old: list, where, limit: int) -> list:
+        """
+        Starting row for a changed class: keep every old cell whose subject is
+        still wanted, fill the gaps with the least clashing leftover subjects.
+        """
+        left = Counter(subjects)
+        row = [None] * len(subjects)
+        for p, subject in enumerate(old[:len(subjects)]):
+            if left[subject] > 0:
+                row[p] = subject
+                left[subject] -= 1
+        for p in range(len(row)):
+            if row[p] is None:
+                options = [s for s, n in left.items() if n > 0]
+                if p < limit:
+                    options.sort(key=lambda s: len(where[p][s]) - self.capacity.cap(s))
+                row[p] = options[0]
+                left[row[p]] -= 1
+        return row
+
+    def _swap_clash_delta(self, where, limit: int, p: int, q: int, a: str, b: str) -> int:
+        """Change in clash count if a class swaps `a` at p with `b` at q."""
+        cap = self.capacity.cap
+        delta = 0
+        for period, out, into in ((p, a, b), (q, b, a)):
+            if period < limit:
+                delta -= len(where[period][out]) > cap(out)
+                delta += len(where[period][into]) >= cap(into)
+        return delta
+
+    def _moved_cells(self, current: dict, schedule: dict) -> int:
+        """Cells of classes present in `current` that now hold a different subject."""
+        moved = 0
+        for cls, old in current.items():
+            new = schedule.get(cls, [])
+            moved += sum(1 for p in range(max(len(old), len(new)))
+                         if p >= len(old) or p >= len(new) or old[p] != new[p])
+        return moved
+
+    def _stop_requested(self) -> bool:
+        if self.should_stop is not None and self.should_stop():
+            self.stopped = True
+        return self.stopped
+
     def _is_valid_schedule(self, schedule: dict) -> bool:
         """
         Validation:
-        Check if any teacher/subject clashes exist in the same period across classes.
-        Assumes 1 subject = 1 Teacher.
+        Check if any teacher/resource clashes exist in the same period across classes.
+        Without a resource model, 1 subject = 1 Teacher.
         """
+        table = self._table_for(schedule)
         for i in range(self.periods):
-            # Get subjects for all classes in period 'i'
-            current_slot_subjects = []
+            room = table.new_room()
             for cls in self.classes:
                 if i < len(schedule[cls]):
-                    current_slot_subjects.append(schedule[cls][i])
-            
-            # Check for duplicates (Teacher clash)
-            # Filter out "FREE" or "LIBRARY" periods if they don't consume teacher resources?
-            # For now, we assume ALL subjects are unique resources.
-            if len(current_slot_subjects) != len(set(current_slot_subjects)):
-                return False
-        
+                    subject = schedule[cls][i]
+                    if not table.fits(room, subject):
+                        return False
+                    table.take(room, subject)
+
         return True
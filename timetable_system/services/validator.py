@@ -0,0 +1,108 @@
+import json
+from collections import Counter
+from itertools import zip_longest
+from timetable_system.config import EXPORT_BATCH_SIZE
+from timetable_system.repositories.timetable_manager import TimetableManager
+from .resources import CapacityTable
+
+def find_clashes(entries_data, periods: int = None, resources: dict = None) -> list:
+    """
+    Every clash in a timetable ({class: [subjects]}, or a list of those per
+    day): one {"day", "period", "subject", "classes", "capacity", "excess",
+    "reason"} per period where more classes have a subject than its
+    capacity allows (CapacityTable). Subjects sharing teachers that are over
+    capacity together are reported too, "subject" joining them with "+".
+    Only the first `periods` cells of a row count, as when saving; all of
+    them when periods is None.
+    Each period's column is counted in one pass (Counter over the cells)
+    and compared with the capacity of each constraint id the subjects
+    intern to; classes are only collected for periods that clash.
+    """
+    week = [entries_data] if isinstance(entries_data, dict) else list(entries_data)
+    table = CapacityTable((s for schedule in week for row in schedule.values() for s in row), resources)
+    caps = table.caps
+
+    clashes = []
+    for day, schedule in enumerate(week):
+        classes = list(schedule)
+        rows = [schedule[cls][:periods] for cls in classes]
+        for p, column in enumerate(zip_longest(*rows)):
+            counts = Counter(column)
+            counts.pop(None, None)
+            if table.single is not None:
+                if all(n <= caps[table.single[s]] for s, n in counts.items()):
+                    continue
+            clashes.extend(_period_clashes(table, counts, classes, column, day, p))
+    return clashes
+
+def _period_clashes(table: CapacityTable, counts: Counter, classes: list, column: tuple, day: int, p: int) -> list:
+    """
+    Clashes in one period from its subject counts: every constraint over
+    capacity, unless the same classes were already reported together.
+    "excess" is how many of its placements must move once the clashes
+    before it are fixed (greedy, exact for one constraint per subject).
+    """
+    usage, subjects_of = Counter(), {}
+    for subject, n in counts.items():
+        for c in table.of[subject]:
+            usage[c] += n
+            subjects_of.setdefault(c, []).append(subject)
+
+    left, moved = Counter(counts), Counter() # Placements still in the period after the moves so far
+    clashes, reported = [], []
+    # Constraint ids are created per subject before the shared-teacher subsets, in increasing size
+    for c in sorted(usage):
+        if usage[c] <= table.caps[c]:
+            continue
+        subjects = sorted(subjects_of[c])
+        excess = 0
+        while usage[c] - moved[c] > table.caps[c]:
+            s = next(s for s in subjects if left[s])
+            left[s] -= 1
+            for other in table.of[s]:
+                moved[other] += 1
+            excess += 1
+
+        holders = [cls for cls, s in zip(classes, column) if s in subjects]
+        if not excess and any(set(holders) <= seen for seen in reported):
+            continue
+        reported.append(set(holders))
+        subject = "+".join(subjects)
+        per_period = "once" if table.caps[c] == 1 else f"{table.caps[c]} times"
+        clashes.append({
+            "day": day,
+            "period": p,
+            "subject": subject,
+            "classes": holders,
+            "capacity": table.caps[c],
+            "excess": excess,
+            "reason": (
+                f"Day {day + 1}, period {p + 1}: {subject} is taken by {', '.join(holders)}, "
+                f"but can only be taught {per_period} per period."
+            )
+        })
+    return clashes
+
+def clash_count(clashes: list) -> int:
+    """Placements that must move to clear every clash."""
+    return sum(c["excess"] for c in clashes)
+
+def validation_report(tm: TimetableManager, resources: dict = None, after_id: int = None, invalid_only: bool = False):
+    """
+    Checks every stored timetable (id > after_id), yielding one
+    {"id", "name", "valid", "clashes"} per timetable (only the invalid ones
+    with invalid_only), then {"checked", "invalid"}. Streams like export.
+    """
+    checked = invalid = 0
+    for t in tm.iter_timetables(after_id=after_id, batch_size=EXPORT_BATCH_SIZE):
+        clashes = find_clashes(t["entries"], t["periods"], resources)
+        checked += 1
+        invalid += bool(clashes)
+        if clashes or not invalid_only:
+            yield {"id": t["id"], "name": t["name"], "valid": not clashes, "clashes": clashes}
+    yield {"checked": checked, "invalid": invalid}
+
+def report_lines(tm: TimetableManager, resources: dict = None, after_id: int = None, invalid_only: bool = False):
+    """validation_report as NDJSON lines."""
+    for line in validation_report(tm, resources, after_id=after_id, invalid_only=invalid_only):
+        yield json.dumps(line, separators=(",", ":")) + "\n"
@@ -0,0 +1,285 @@
+import random
+from collections import Counter
+from timetable_system.config import SOLVER_ENGINE, MAX_DAYS
+from .batch import solve_batch
+from .cache import SolveCache
+from .resources import CapacityTable
+from .scheduler import ENGINES, TimetableScheduler
+
+# Re-splits of a failed day before falling back to solve_flattened
+MAX_RESPLITS = 50
+# Lessons moved per re-split while the changed days fail their counting checks
+MAX_COUNT_MOVES = 200
+# Share of those moves chosen at random rather than by counting shortfall
+RANDOM_MOVE_RATE = 0.2
+
+def split_quotas(quotas: dict, days: int, periods: int, capacity: CapacityTable) -> list:
+    """
+    Spread weekly quotas ({class: {subject: lessons}}) over `days` days.
+    Returns one {class: [subjects]} per day, every class present each day.
+    A class's lessons of a subject go to different days where possible, its
+    days never exceed `periods`, and each subject's lessons across classes
+    are levelled day to day so no day asks more of it than its per-period
+    capacity allows. Scarcest subjects are placed first.
+    """
+    week = [{cls: [] for cls in quotas} for _ in range(days)]
+    demand = Counter()
+    for counts in quotas.values():
+        demand.update(counts)
+
+    for subject in sorted(demand, key=lambda s: (-demand[s] / capacity.cap(s), s)):
+        load = [0] * days # lessons of this subject per day, all classes
+        for cls in sorted(quotas, key=lambda c: (-quotas[c].get(subject, 0), c)):
+            mine = [0] * days
+            for _ in range(quotas[cls].get(subject, 0)):
+                day = min(
+                    (d for d in range(days) if len(week[d][cls]) < periods),
+                    key=lambda d: (mine[d], load[d], len(week[d][cls]), d)
+                )
+                week[day][cls].append(subject)
+                mine[day] += 1
+                load[day] += 1
+    return week
+
+class WeeklyScheduler:
+    """
+    Solves a week of `days` days x `periods` periods from weekly quotas
+    ({class: {subject: lessons per week}}). The quotas are split across days
+    first (split_quotas); each day is then an ordinary single-day problem,
+    and the days are independent, so they are solved in parallel through
+    solve_batch (identical days are solved once). A week costs about as
+    much as its hardest day. The split can make a day unsolvable when the
+    week is not: a failed day then has lessons moved between it and other
+    days and only the changed days are solved again (_resplit), with
+    solve_flattened as the last resort. Neither is proof of infeasibility.
+    """
+    def __init__(self, quotas: dict, days: int, periods: int, engine: str = None, resources: dict = None,
+                 timeout: float = None):
+        if not 1 <= days <= MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_DAYS}.")
+        if periods < 1:
+            raise ValueError("periods must be at least 1.")
+        for cls, counts in quotas.items():
+            for subject, lessons in counts.items():
+                if lessons < 0:
+                    raise ValueError(f"{cls} has a negative quota for {subject}.")
+        self.quotas = quotas
+        self.days = days
+        self.periods = periods
+        self.engine = engine or SOLVER_ENGINE
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown solver engine '{self.engine}'. Must be one of: {', '.join(ENGINES)}")
+        self.resources = resources
+        self.timeout = timeout
+        self.capacity = CapacityTable((s for counts in quotas.values() for s in counts), resources)
+        self.conflicts = []
+        self.day_data = None # The split, one {class: [subjects]} per day
+        self.status = None # solved, infeasible, timeout or failed (see solve_outcome)
+        self.failed_day = None
+
+    def check_feasibility(self) -> list:
+        """Weekly counting checks: every class and subject must fit in days x periods slots."""
+        slots = self.days * self.periods
+        conflicts = []
+        for cls, counts in self.quotas.items():
+            required = sum(counts.values())
+            if required > slots:
+                conflicts.append({
+                    "class": cls,
+                    "required": required,
+                    "available": slots,
+                    "reason": f"{cls} needs {required} lessons a week but only has {slots} periods."
+                })
+
+        demand, takers = Counter(), {}
+        for cls, counts in self.quotas.items():
+            for subject, lessons in counts.items():
+                if lessons:
+                    demand[subject] += lessons
+                    takers.setdefault(subject, []).append(cls)
+        for subject, required in demand.items():
+            cap = self.capacity.cap(subject)
+            if required > slots * cap:
+                per_period = "once" if cap == 1 else f"{cap} times"
+                conflicts.append({
+                    "subject": subject,
+                    "classes": takers[subject],
+                    "required": required,
+                    "available": slots * cap,
+                    "reason": (
+                        f"{subject} is needed {required} times a week by {', '.join(takers[subject])}, "
+                        f"but can only be taught {per_period} per period."
+                    )
+                })
+        return conflicts
+
+    def split(self) -> list:
+        return split_quotas(self.quotas, self.days, self.periods, self.capacity)
+
+    def solve(self, cache: SolveCache = None):
+        """
+        Returns one class -> [subjects] per day, or None. On failure
+        self.status says why: infeasible only when proven (the weekly
+        counts, or a one-day week), with self.conflicts explaining it;
+        failed when no split worked; timeout with self.failed_day set.
+        """
+        self.conflicts, self.failed_day = self.check_feasibility(), None
+        if self.conflicts:
+            self.status = "infeasible"
+            return None
+
+        self.day_data = self.split()
+        rng = random.Random(self.days * 1000 + self.periods)
+        week = [None] * self.days
+        for _ in range(MAX_RESPLITS + 1):
+            failed = self._solve_days([d for d in range(self.days) if week[d] is None], week, cache)
+            if failed is None:
+                self.status = "solved"
+                return week
+            day = failed["index"]
+            if failed["status"] == "timeout":
+                self.status, self.failed_day = "timeout", day
+                return None
+            if self.days == 1:
+                # The day is the whole week, so its proof stands
+                self.status = failed["status"]
+                self.conflicts = [dict(c, day=0, reason=f"Day 1: {c['reason']}") for c in failed["conflicts"]]
+                return None
+            # This split made the day unsolvable, which says nothing about the week
+            moved = self._resplit(day, failed["conflicts"], rng)
+            if not moved:
+                break
+            for d in moved:
+                week[d] = None
+
+        week = self.solve_flattened(cache)
+        if week is None and self.status != "timeout":
+            self.status = "failed"
+        return week
+
+    def _solve_days(self, days: list, week: list, cache: SolveCache):
+        """Solves the split's `days` into `week`. Returns the first failed result, or None."""
+        problems = [{"classes": self.day_data[d], "periods": self.periods, "engine": self.engine} for d in days]
+        results = solve_batch(problems, cache=cache, timeout=self.timeout, resources=self.resources)
+        try:
+            for result in results:
+                if result["schedule"] is None:
+                    # The other days can wait for the next split; closing cancels them
+                    return dict(result, index=days[result["index"]])
+                week[days[result["index"]]] = result["schedule"]
+        finally:
+            results.close()
+        return None
+
+    def _resplit(self, day: int, conflicts: list, rng: random.Random):
+        """
+        Changes the split around a failed day (_move), then keeps moving
+        lessons off days that fail their counting checks, which needs no
+        solve, for up to MAX_COUNT_MOVES moves. Returns the days changed,
+        or None when nothing could move.
+        """
+        other = self._move(day, conflicts, rng)
+        if other is None:
+            return None
+        changed = {day, other}
+        for _ in range(MAX_COUNT_MOVES):
+            failing = {d: self._day_conflicts(d) for d in changed}
+            failing = {d: found for d, found in failing.items() if found}
+            if not failing:
+                break
+            d = rng.choice(sorted(failing))
+            other = self._move(d, failing[d], rng)
+            if other is None:
+                break
+            changed.add(other)
+        return changed
+
+    def _move(self, day: int, conflicts: list, rng: random.Random):
+        """
+        One change to the split, for a class holding a conflicting subject
+        on `day` (any of the day's subjects when no conflict names one):
+        move that lesson to another day with a free period, swap it for
+        another day's lesson of a different subject, or pull a lesson in
+        from another day (a longer row frees the day's first periods).
+        The move leaving the least counting shortfall on the two days is
+        made, ties broken at random, except for a share (RANDOM_MOVE_RATE)
+        of random moves that get the search out of local minima. Returns
+        the other day, or None.
+        """
+        split = self.day_data
+        subjects = {c["subject"] for c in conflicts if "subject" in c}
+        subjects = subjects or {s for row in split[day].values() for s in row}
+        moves = []
+        for cls, row in split[day].items():
+            for other in range(self.days):
+                if other == day:
+                    continue
+                target = split[other][cls]
+                # Sorted: set order changes with the hash seed, which would make the walk unrepeatable
+                for subject in sorted(set(row) & subjects):
+                    if len(target) < self.periods:
+                        moves.append((cls, other, subject, None))
+                    moves.extend((cls, other, subject, back) for back in sorted(set(target)) if back != subject)
+                if set(row) & subjects and len(row) < self.periods:
+                    moves.extend((cls, other, None, back) for back in sorted(set(target)))
+        if not moves:
+            return None
+
+        def apply(move, undo=False):
+            cls, other, out, back = move
+            src, dst = (other, day) if undo else (day, other)
+            if out is not None:
+                split[src][cls].remove(out)
+                split[dst][cls].append(out)
+            if back is not None:
+                split[dst][cls].remove(back)
+                split[src][cls].append(back)
+
+        def shortfall(d):
+            return sum(c["required"] - c["available"] for c in self._day_conflicts(d))
+
+        if rng.random() < RANDOM_MOVE_RATE:
+            move = rng.choice(moves)
+            apply(move)
+            return move[1]
+
+        rng.shuffle(moves)
+        scored = []
+        for move in moves:
+            apply(move)
+            scored.append((shortfall(day) + shortfall(move[1]), move))
+            apply(move, undo=True)
+        best = min(score for score, _ in scored)
+        move = rng.choice([m for score, m in scored if score == best])
+        apply(move)
+        return move[1]
+
+    def _day_conflicts(self, day: int) -> list:
+        """The split's day through the single-day counting checks."""
+        return TimetableScheduler(self.day_data[day], self.periods, resources=self.resources).check_feasibility()
+
+    def solve_flattened(self, cache: SolveCache = None):
+        """
+        Last resort: the week as one problem of days x periods periods, cut
+        into days. Each class's lessons fill its first periods, so they pack
+        into the first days; any schedule found is a valid week.
+        """
+        classes = {
+            cls: [s for s, lessons in sorted(counts.items()) for _ in range(lessons)]
+            for cls, counts in self.quotas.items()
+        }
+        problem = {"classes": classes, "periods": self.days * self.periods, "engine": self.engine}
+        results = solve_batch([problem], cache=cache, timeout=self.timeout, resources=self.resources)
+        try:
+            result = next(results)
+        finally:
+            results.close()
+
+        if result["schedule"] is None:
+            self.status = result["status"]
+            return None
+        self.status = "solved"
+        return [
+            {cls: row[day * self.periods:(day + 1) * self.periods] for cls, row in result["schedule"].items()}
+            for day in range(self.days)
+        ]
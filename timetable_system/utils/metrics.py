@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import event
+
+# Latency buckets in seconds (Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+STATEMENT_KINDS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter, one series per label combination."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in items]
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, one series per label combination.
+    observe() is a bisect plus a few additions under a lock.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {} # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series else 0
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+                labels = _format_labels(self.labels, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    "tt_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status")
+)
+SOLVE_DURATION = registry.histogram(
+    "tt_solve_duration_seconds", "Solver wall time (cache misses only).", ("engine",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+)
+SOLVE_ATTEMPTS = registry.histogram(
+    "tt_solve_attempts", "Candidates drawn (random) or search nodes visited (backtracking).", ("engine",),
+    buckets=(1, 10, 100, 1000, 10000, 100000, 1000000)
+)
+SOLVE_TOTAL = registry.counter(
+    "tt_solve_total", "Solves by outcome: solved, infeasible, timeout, failed or partial (best effort).", ("engine", "outcome")
+)
+SQL_QUERIES = registry.histogram(
+    "tt_sql_query_duration_seconds", "SQL statement execution time by statement type.", ("statement",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+)
+
+def solve_outcome(scheduler, schedule) -> str:
+    if schedule is not None:
+        return "solved"
+    # Conflicts or an exhaustive search that ran to completion prove it
+    if scheduler.conflicts or (scheduler.engine == "backtracking" and not scheduler.stopped):
+        return "infeasible"
+    return "timeout" if scheduler.stopped else "failed"
+
+def record_solve(engine: str, seconds: float, attempts: int, outcome: str):
+    SOLVE_DURATION.observe(seconds, engine)
+    SOLVE_ATTEMPTS.observe(attempts, engine)
+    SOLVE_TOTAL.inc(engine, outcome)
+
+def instrument_engine(engine):
+    """Time every statement through SQLAlchemy cursor events."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._tt_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_tt_started", None)
+        if started is not None:
+            kind = statement.lstrip()[:6].upper()
+            SQL_QUERIES.observe(time.perf_counter() - started, kind if kind in STATEMENT_KINDS else "OTHER")
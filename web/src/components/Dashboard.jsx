@@ -13,8 +13,15 @@ export default function Dashboard() {
 
     const loadTimetables = async () => {
         try {
-            const { data } = await getTimetables();
-            setTimetables(data);
+            // Follow X-Next-Cursor until the last page; the API returns one page per request
+            const all = [];
+            let cursor;
+            do {
+                const { data, headers } = await getTimetables(cursor ? { cursor } : undefined);
+                all.push(...data);
+                cursor = headers['x-next-cursor'];
+            } while (cursor);
+            setTimetables(all);
         } catch (error) {
             console.error("Failed to load timetables", error);
         } finally {
@@ -7,6 +7,7 @@ export default function TimetableView() {
     const { name } = useParams();
     const [timetable, setTimetable] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [day, setDay] = useState(0);
 
     useEffect(() => {
         loadTimetable();
@@ -27,14 +28,15 @@ export default function TimetableView() {
     if (!timetable) return <div className="p-8 text-center">Timetable not found</div>;
 
     // Transform entries into grid
-    // entries: [{class_name, period_index, subject}, ...]
-    // We need distinct classes and max periods.
+    // entries: [{day_index, class_name, period_index, subject}, ...]
+    // We need distinct classes and max periods; weekly timetables show one day at a time.
+    const days = Array.from({ length: timetable.days || 1 }, (_, i) => i);
     const classes = [...new Set(timetable.entries.map(e => e.class_name))].sort();
     const maxPeriod = Math.max(...timetable.entries.map(e => e.period_index)) + 1;
     const periods = Array.from({ length: maxPeriod }, (_, i) => i);
 
     const grid = {};
-    timetable.entries.forEach(e => {
+    timetable.entries.filter(e => (e.day_index || 0) === day).forEach(e => {
         if (!grid[e.class_name]) grid[e.class_name] = {};
         grid[e.class_name][e.period_index] = e.subject;
     });
@@ -53,6 +55,20 @@ export default function TimetableView() {
                 </button>
             </div>
 
+            {days.length > 1 && (
+                <div className="flex space-x-2 no-print">
+                    {days.map(d => (
+                        <button
+                            key={d}
+                            onClick={() => setDay(d)}
+                            className={`px-3 py-1 rounded ${d === day ? 'bg-indigo-600 text-white' : 'bg-gray-100 text-gray-700 hover:bg-gray-200'}`}
+                        >
+                            Day {d + 1}
+                        </button>
+                    ))}
+                </div>
+            )}
+
             <div className="bg-white shadow overflow-hidden rounded-lg print:shadow-none">
                 <div className="overflow-x-auto">
                     <table className="min-w-full divide-y divide-gray-200 text-center">
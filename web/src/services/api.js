@@ -4,7 +4,7 @@ const api = axios.create({
     baseURL: '/'
 });
 
-export const getTimetables = () => api.get('/timetables');
+export const getTimetables = (params) => api.get('/timetables', { params });
 export const getTimetable = (name) => api.get(`/timetables/${name}`);
 export const deleteTimetable = (name) => api.delete(`/timetables/${name}`);
 export const generateTimetable = (data) => api.post('/generate', data);